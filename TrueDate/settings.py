@@ -51,12 +51,23 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Builds request.user from the signed token claims: no per-request user query
+        'api.authentication.jwt_claims.ClaimsJWTAuthentication',
     ),
      'EXCEPTION_HANDLER': 'api.utils.exception_handlers.custom_exception_handler',  # Custom handler for exceptions
+    # Per-route rate limits, see THROTTLE_POLICIES
+    'DEFAULT_THROTTLE_CLASSES': ['api.throttling.throttles.RoutePolicyThrottle'],
+    'NUM_PROXIES': int(os.environ['NUM_PROXIES']) if os.getenv('NUM_PROXIES') else None,
+    # orjson encoding; the browsable API only in development, so production skips its negotiation
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.utils.renderers.ORJSONRenderer',
+        *(['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
+    ],
 }
 
 MIDDLEWARE = [
+    'api.middleware.correlation.RequestIDMiddleware',  # Correlation ID for every log record of the request
+    'api.middleware.instrumentation.RequestMetricsMiddleware',  # Times the whole stack below
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -85,6 +96,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'TrueDate.wsgi.application'
+ASGI_APPLICATION = 'TrueDate.asgi.application'
+
+# Route the profile and auth endpoints to their async views. Enable when serving
+# TrueDate.asgi; under WSGI the sync views avoid an event loop per request.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False').lower() == 'true'
 
 
 # Database
@@ -98,8 +114,50 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # Persistent connections, checked before reuse; ignored when DB_POOL is on
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# With DB_POOL, psycopg 3's connection pool replaces persistent connections (Django
+# requires CONN_MAX_AGE = 0 with a pool). Each process holds up to DB_POOL_MAX_SIZE
+# connections per alias.
+if os.getenv('DB_POOL', 'False').lower() == 'true':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        },
+    }
+
+# Read replicas: one alias per host in DB_REPLICA_HOSTS, otherwise configured like the
+# primary. Only reads that opt in through api.db.routers.replica_reads() use them.
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+    DATABASES[f'replica_{index}'] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['api.db.routers.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))  # Reads pinned to the primary after a write
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared cache
+# (e.g. django.core.cache.backends.redis.RedisCache) in production.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'truedate'),
     }
 }
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    # The default of 300 entries evicts constantly once profiles are cached (two keys each)
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '100000'))}
 
 
 # Password validation
@@ -138,36 +196,212 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded files (profile pictures)
+MEDIA_URL = os.getenv('MEDIA_URL', '/media/')
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', str(BASE_DIR / 'media'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Logging
+# LOG_FORMAT is "text" or "json" (one object per line). With LOG_ASYNC, request threads
+# only enqueue records and a listener thread writes them; LOG_SAMPLE_RATE keeps that
+# fraction of requests' INFO/DEBUG records. See api.utils.logger.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_FILE = os.getenv('LOG_FILE', 'debug.log')
+LOG_ASYNC = os.getenv('LOG_ASYNC', 'True').lower() == 'true'
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))  # Records buffered before new ones are dropped
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '1.0'))
+
+LOGGING_CONFIG = 'api.utils.logger.configure_logging'
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'text': {
+            '()': 'logging.Formatter',
+            'fmt': '%(levelname)s [%(request_id)s] %(message)s',
+            'defaults': {'request_id': '-'},
+        },
+        'json': {
+            '()': 'api.utils.logger.JsonFormatter',
+        },
+    },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
+            'formatter': LOG_FORMAT,
         },
         'file': {
-            'level': 'DEBUG',
             'class': 'logging.FileHandler',
-            'filename': 'debug.log',
+            'filename': LOG_FILE,
+            'formatter': LOG_FORMAT,
+            'delay': True,
         },
     },
     'loggers': {
         'django': {
             'handlers': ['console', 'file'],
-            'level': 'DEBUG',
+            'level': LOG_LEVEL,
             'propagate': True,
         },
         'api': {
             'handlers': ['console', 'file'],
-            'level': 'DEBUG',
+            'level': LOG_LEVEL,
             'propagate': True,
         },
     },
 }
 
 
+# Matching
+# Candidate discovery prefilters on a bounding box over the indexed latitude/longitude
+# columns, so a query only touches profiles in the searcher's neighbourhood.
+
+MATCH_CANDIDATE_LIMIT = int(os.getenv('MATCH_CANDIDATE_LIMIT', '200'))  # Max candidates returned per query
+MATCH_MAX_DISTANCE = int(os.getenv('MATCH_MAX_DISTANCE', '500'))  # Upper bound on a search radius (miles)
+MATCH_INITIAL_RADIUS = int(os.getenv('MATCH_INITIAL_RADIUS', '5'))  # First search ring (miles), doubled until the limit is met
+MATCH_RANKING_POOL = int(os.getenv('MATCH_RANKING_POOL', '2000'))  # Candidates scored per ranking pass
+MATCH_PAGE_SIZE = int(os.getenv('MATCH_PAGE_SIZE', '20'))
+MATCH_AGE_SPREAD = 6.0  # Years of age difference at which the age score falls to ~37%
+MATCH_BIO_DIMENSIONS = 512  # Hashed bag-of-words size used for bio similarity
+MATCH_SCORE_WEIGHTS = {
+    'distance': 0.4,
+    'age': 0.25,
+    'reciprocity': 0.2,
+    'bio': 0.15,
+}
+MATCH_FEED_SIZE = int(os.getenv('MATCH_FEED_SIZE', '500'))  # Ranked candidates stored per precomputed feed
+MATCH_FEED_REFRESH_BATCH = int(os.getenv('MATCH_FEED_REFRESH_BATCH', '100'))  # Stale feeds rebuilt per refresh pass
+
+# Swipes
+# Buffered per process and written by a flusher thread with one bulk_create per batch;
+# see api.services.swipe_service.
+SWIPE_BATCH_SIZE = int(os.getenv('SWIPE_BATCH_SIZE', '500'))  # Swipes written per bulk_create
+SWIPE_FLUSH_INTERVAL = float(os.getenv('SWIPE_FLUSH_INTERVAL', '0.05'))  # Seconds a partial batch waits
+SWIPE_MAX_PENDING = 20_000  # Beyond this, requests write a batch themselves (back-pressure)
+SWIPE_MAX_PER_REQUEST = 100
+# Each user's swiped profiles are kept in a growing Bloom filter (api.services.seen_service).
+# A profile never swiped is wrongly hidden with probability up to about 2 * SEEN_SET_ERROR_RATE.
+SEEN_SET_CAPACITY = 256  # Swipes held by a filter's first layer; each added layer doubles it
+SEEN_SET_ERROR_RATE = float(os.getenv('SEEN_SET_ERROR_RATE', '0.01'))
+
+# Profile listing
+PROFILE_LIST_PAGE_SIZE = int(os.getenv('PROFILE_LIST_PAGE_SIZE', '20'))
+PROFILE_LIST_MAX_PAGE_SIZE = 100
+PROFILE_BATCH_MAX_IDS = 300  # Profiles per /api/user/profiles/batch/ request
+
+# Request metrics
+# RequestMetricsMiddleware records per-view latency, SQL query count and time, and render
+# time, served at /api/metrics/. QUERY_BUDGETS maps URL names ("name" or "name:METHOD")
+# to the most queries a request may run; overruns are logged and counted, and fail
+# assert_query_budget in tests. Counts are for PostgreSQL, where BEGIN is implicit; on
+# SQLite the explicit BEGIN of an atomic block adds one.
+
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1').split(',')
+METRICS_RESPONSE_HEADERS = DEBUG  # Adds X-Query-Count and Server-Timing headers
+QUERY_BUDGETS = {
+    # Email check, user insert, zipcode lookup, profile insert, match feed invalidation,
+    # match feed task insert (DatabaseTaskBackend)
+    'register': 6,
+    'token_obtain_pair': 1,  # Login: the email lookup only
+    'userprofile-list:GET': 1,
+    # A cache miss reads the payload; a conditional one that doesn't match reads the validators first
+    'userprofile-detail:GET': 2,
+    'userprofile-batch:GET': 1,  # One in_bulk query for whatever the cache doesn't hold
+    # Profile by primary key (token claim) and the feed page; an empty first page adds the
+    # feed's built check, then the page again or the build task's insert (DatabaseTaskBackend)
+    'match-feed': 4,
+}
+
+# Profile cache
+PROFILE_CACHE_TIMEOUT = int(os.getenv('PROFILE_CACHE_TIMEOUT', '300'))  # Seconds a serialized profile is kept
+PROFILE_CACHE_LOCK_TIMEOUT = 5  # Seconds other readers wait on a single-flight recompute
+
+# Profile pictures
+# Uploads are streamed to disk and hashed, then processed off the request as a
+# background task: EXIF is stripped and every size below is written as JPEG and WebP. Identical
+# uploads share one stored copy (see api.services.picture_service).
+PROFILE_PICTURE_MAX_BYTES = int(os.getenv('PROFILE_PICTURE_MAX_BYTES', str(10 * 1024 * 1024)))
+PROFILE_PICTURE_MAX_PIXELS = 40_000_000  # Larger images are refused before being decoded
+PROFILE_PICTURE_MAX_DIMENSION = 2048  # Longest side of the stored original
+PROFILE_PICTURE_SIZES = {'small': 96, 'medium': 320, 'large': 720}  # Longest side of each variant
+PROFILE_PICTURE_JPEG_QUALITY = 85
+PROFILE_PICTURE_WEBP_QUALITY = 80
+
+# Background tasks
+# Service functions decorated with api.tasks.registry.task are queued with .enqueue().
+# TASK_BACKEND runs them on TASK_LOCAL_WORKERS threads of the web process
+# (LocalTaskBackend: nothing to deploy, but queued tasks die with the process) or
+# stores them in the database for the run_task_workers process pool
+# (api.tasks.backends.DatabaseTaskBackend). TASK_LANES are priority lanes, best first.
+TASK_BACKEND = os.getenv('TASK_BACKEND', 'api.tasks.backends.LocalTaskBackend')
+TASK_LANES = ('high', 'default', 'low')
+TASK_MAX_ATTEMPTS = 3
+TASK_RETRY_DELAY = 10  # Seconds before the first retry; doubled before each further one
+TASK_RETRY_MAX_DELAY = 3600
+TASK_LOCAL_WORKERS = int(os.getenv('TASK_LOCAL_WORKERS', '2'))
+TASK_WORKER_PROCESSES = int(os.getenv('TASK_WORKER_PROCESSES', str(os.cpu_count() or 1)))
+TASK_POLL_INTERVAL = 1.0  # Seconds an idle worker waits before looking for tasks again
+TASK_LEASE = 600  # Seconds a claimed task may run before it is presumed lost and queued again
+TASK_RETENTION_DAYS = 7  # Finished tasks (and their idempotency keys) are kept this long
+
+# Bulk user import
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '2000'))  # Rows validated, deduplicated and inserted together
+
+# Throttling
+# THROTTLE_ROUTES maps URL names ("name:METHOD" or "name") to a policy in
+# THROTTLE_POLICIES; other routes use "default". A policy is a list of (scope, rate)
+# rules over sliding windows, with scope ip, anon (ip of anonymous requests), user or
+# email (the request body's email). Counters live in the THROTTLE_CACHE cache; see
+# api.throttling.limiter.
+THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', 'True').lower() == 'true'
+THROTTLE_CACHE = 'default'
+THROTTLE_POLICIES = {
+    'default': [('anon', '300/min'), ('user', '1200/min')],
+    # Credential stuffing: few attempts per account, more per address for shared NATs
+    'login': [('email', '10/15min'), ('email', '50/day'), ('ip', '60/min')],
+    'register': [('ip', '10/hour')],
+    'profile-write': [('user', '60/min')],
+    'picture-upload': [('user', '20/hour')],
+    'swipe': [('user', '600/min')],
+}
+THROTTLE_ROUTES = {
+    'token_obtain_pair': 'login',
+    'register': 'register',
+    'userprofile-list:POST': 'register',  # Creating a profile also creates its user
+    'userprofile-detail:PUT': 'profile-write',
+    'userprofile-picture': 'picture-upload',
+    'match-swipes': 'swipe',
+}
+
+# JWT
+# Opt-in revocation list held in the cache (see api.authentication.jwt_claims)
+JWT_REVOCATION_ENABLED = os.getenv('JWT_REVOCATION_ENABLED', 'False').lower() == 'true'
+
+# Login
+# Password verification runs on a bounded pool; logins beyond LOGIN_HASH_MAX_PENDING
+# in-flight verifications are rejected with 429 instead of queueing.
+LOGIN_HASH_WORKERS = int(os.getenv('LOGIN_HASH_WORKERS', str(os.cpu_count() or 1)))
+LOGIN_HASH_MAX_PENDING = int(os.getenv('LOGIN_HASH_MAX_PENDING', str(4 * (os.cpu_count() or 1))))
+LOGIN_HASH_TIMEOUT = 10  # Seconds a request waits for its verification
+LOGIN_RETRY_AFTER = 1  # Seconds suggested to clients that were turned away
+
+# Messaging
+# Realtime chat runs on the ASGI app (TrueDate.asgi). Events fan out through
+# MESSAGING_PUBSUB_BACKEND: the in-process backend serves a single node, RedisPubSub
+# shares channels between processes through MESSAGING_REDIS_URL.
+MESSAGING_PUBSUB_BACKEND = os.getenv('MESSAGING_PUBSUB_BACKEND', 'api.realtime.pubsub.InMemoryPubSub')
+MESSAGING_REDIS_URL = os.getenv('MESSAGING_REDIS_URL', 'redis://localhost:6379/0')
+MESSAGING_SUBSCRIBER_QUEUE = 256  # Events buffered per connection before the oldest is dropped
+MESSAGING_BATCH_SIZE = int(os.getenv('MESSAGING_BATCH_SIZE', '500'))  # Messages inserted per bulk_create
+MESSAGING_FLUSH_INTERVAL = float(os.getenv('MESSAGING_FLUSH_INTERVAL', '0.02'))  # Seconds a partial batch waits
+MESSAGING_MAX_BODY_LENGTH = 4000
+MESSAGING_HISTORY_PAGE_SIZE = 50
+MESSAGING_INBOX_PAGE_SIZE = 30
+# Messages older than this move to the archive table (see the archive_messages command)
+MESSAGING_ARCHIVE_AFTER_DAYS = int(os.getenv('MESSAGING_ARCHIVE_AFTER_DAYS', '90'))
+MESSAGING_ARCHIVE_BATCH_SIZE = 5000
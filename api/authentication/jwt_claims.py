@@ -0,0 +1,76 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+
+class ClaimsUser(TokenUser):
+    """
+    Request user built from the signed access token claims (user id, username, email,
+    role, profile id, is_staff) instead of a database row.
+    """
+    @cached_property
+    def role(self):
+        return self.token.get('role', 'user')
+
+    @cached_property
+    def profile_id(self):
+        return self.token.get('profile_id')
+
+    @cached_property
+    def email(self):
+        return self.token.get('email', '')
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication that trusts the token's signed claims, so authenticated requests
+    run no auth queries. With JWT_REVOCATION_ENABLED, revoked tokens and users are
+    checked with one cache round trip.
+    """
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if settings.JWT_REVOCATION_ENABLED and is_token_revoked(validated_token):
+            raise InvalidToken("Token has been revoked")
+        return ClaimsUser(validated_token)
+
+
+def revoke_token(token):
+    """
+    Rejects one token (by its jti) until it would have expired anyway.
+    """
+    ttl = max(int(token['exp'] - time.time()), 1)
+    cache.set(_revoked_token_key(token[api_settings.JTI_CLAIM]), True, timeout=ttl)
+
+
+def revoke_user_tokens(user_id):
+    """
+    Rejects every token issued to the user before now, e.g. after a password change or
+    a role change. Kept for the access token lifetime, after which those tokens expire.
+    """
+    ttl = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()) + 1
+    cache.set(_revoked_user_key(user_id), int(time.time()), timeout=ttl)
+
+
+def is_token_revoked(token):
+    user_key = _revoked_user_key(token[api_settings.USER_ID_CLAIM])
+    token_key = _revoked_token_key(token.get(api_settings.JTI_CLAIM))
+    revoked = cache.get_many([user_key, token_key])
+    if revoked.get(token_key):
+        return True
+    revoked_at = revoked.get(user_key)
+    return revoked_at is not None and token.get('iat', 0) <= revoked_at
+
+
+def _revoked_token_key(jti):
+    return f"jwt:revoked:{jti}"
+
+
+def _revoked_user_key(user_id):
+    return f"jwt:revoked-user:{user_id}"
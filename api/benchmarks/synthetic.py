@@ -0,0 +1,123 @@
+"""
+Synthetic data for benchmarks. Rows are written with bulk_create (no signals, no password
+hashing) and every generated user has an email in BENCH_EMAIL_DOMAIN so they can be
+removed again with `delete_synthetic_users`.
+"""
+import datetime
+import random
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from api.models import UserProfile, ZipcodeLocation
+from api.utils.geo import bounding_box
+
+BENCH_EMAIL_DOMAIN = 'bench.truedate.invalid'
+
+# (latitude, longitude, weight) for a handful of US metros; profiles cluster around them
+METRO_CENTERS = [
+    (40.71, -74.01, 20),   # New York
+    (34.05, -118.24, 13),  # Los Angeles
+    (41.88, -87.63, 10),   # Chicago
+    (29.76, -95.37, 7),    # Houston
+    (33.45, -112.07, 5),   # Phoenix
+    (39.95, -75.17, 6),    # Philadelphia
+    (32.78, -96.80, 7),    # Dallas
+    (37.77, -122.42, 6),   # San Francisco
+    (47.61, -122.33, 4),   # Seattle
+    (25.76, -80.19, 6),    # Miami
+    (39.74, -104.99, 3),   # Denver
+    (42.36, -71.06, 5),    # Boston
+    (33.75, -84.39, 6),    # Atlanta
+    (44.98, -93.27, 2),    # Minneapolis
+]
+DISTANCE_CHOICES = [5, 10, 25, 50, 100]
+# Dating app populations skew young and male; ages are drawn uniformly inside a bracket
+AGE_BRACKETS = [(18, 24, 27), (25, 34, 38), (35, 44, 19), (45, 54, 10), (55, 75, 6)]  # (min, max, weight)
+GENDER_WEIGHTS = {'male': 58, 'female': 42}
+METRO_ZIPCODE_RADIUS = 30  # Miles around a metro center from which its zipcodes are drawn
+
+
+def synthetic_profile_fields(rng, today=None, zipcodes=None):
+    """
+    Returns the UserProfile field values for one synthetic user. With `zipcodes` (from
+    metro_zipcodes) the profile gets a real zipcode of its metro and that zipcode's
+    centroid, as geocoding would give it; otherwise a point scattered around the metro.
+    """
+    today = today or datetime.date.today()
+    metro = rng.choices(range(len(METRO_CENTERS)), weights=[c[2] for c in METRO_CENTERS])[0]
+    gender = rng.choices(list(GENDER_WEIGHTS), weights=list(GENDER_WEIGHTS.values()))[0]
+    opposite = 'female' if gender == 'male' else 'male'
+    low, high, _ = rng.choices(AGE_BRACKETS, weights=[bracket[2] for bracket in AGE_BRACKETS])[0]
+    age = rng.randint(low, high)
+    if zipcodes and zipcodes[metro]:
+        zipcode, latitude, longitude = rng.choice(zipcodes[metro])
+    else:
+        lat, lon, _ = METRO_CENTERS[metro]
+        zipcode, latitude, longitude = f"{rng.randrange(10000, 99999)}", lat + rng.gauss(0, 0.35), lon + rng.gauss(0, 0.35)
+    return {
+        'gender': gender,
+        'looking_for': opposite if rng.random() < 0.9 else gender,
+        'latitude': latitude,
+        'longitude': longitude,
+        'zipcode': zipcode,
+        'birthday': today - datetime.timedelta(days=age * 365 + rng.randrange(365)),
+        'age': age,
+        'distance': rng.choice(DISTANCE_CHOICES),
+        'bio': '',
+    }
+
+
+def metro_zipcodes():
+    """
+    Returns, per entry of METRO_CENTERS, the loaded zipcodes (zipcode, latitude,
+    longitude) within METRO_ZIPCODE_RADIUS of its center. Empty lists when the
+    zipcode table has not been loaded (see the load_zipcodes command).
+    """
+    pools = []
+    for lat, lon, _ in METRO_CENTERS:
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, METRO_ZIPCODE_RADIUS)
+        pools.append(list(
+            ZipcodeLocation.objects.filter(
+                latitude__range=(min_lat, max_lat), longitude__range=(min_lon, max_lon),
+            ).order_by('zipcode').values_list('zipcode', 'latitude', 'longitude')
+        ))
+    return pools
+
+
+def generate_synthetic_users(count, seed=0, batch_size=5000, start=0, progress=None):
+    """
+    Creates `count` users with profiles, numbering them from `start` so repeated calls
+    can grow an existing synthetic population. `progress`, if given, is called with
+    the number created so far after each batch. Returns the number of rows created.
+    """
+    rng = random.Random(seed + start)
+    today = datetime.date.today()
+    zipcodes = metro_zipcodes()
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        offset = start + created
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(
+                    username=f"user{offset + i}@{BENCH_EMAIL_DOMAIN}",
+                    email=f"user{offset + i}@{BENCH_EMAIL_DOMAIN}",
+                    password='!',  # unusable password, no hashing cost
+                )
+                for i in range(size)
+            ])
+            UserProfile.objects.bulk_create([
+                UserProfile(user=user, **synthetic_profile_fields(rng, today, zipcodes)) for user in users
+            ])
+        created += size
+        if progress:
+            progress(created)
+    return created
+
+
+def count_synthetic_users():
+    return User.objects.filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}").count()
+
+
+def delete_synthetic_users():
+    return User.objects.filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}").delete()
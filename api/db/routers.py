@@ -0,0 +1,79 @@
+"""
+Primary/replica database routing.
+
+Writes always go to the primary (`default`). Reads go to the primary too, unless the
+calling code opts in with `replica_reads()`: the profile lookups, profile lists,
+match feeds and the login email lookup do. Replicas are the aliases listed in
+DATABASE_REPLICAS; with none configured everything stays on the primary.
+
+Read-your-writes: code that writes something a replica read may soon look up calls
+`pin_to_primary(key)`, and `replica_reads(key)` stays on the primary while that pin
+(REPLICA_PIN_SECONDS, kept in the shared cache so every process sees it) is alive.
+Reads inside a transaction on the primary also stay there.
+"""
+import contextlib
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+
+@contextlib.contextmanager
+def replica_reads(*pin_keys):
+    """
+    Routes the reads made inside the block to a replica, unless one of `pin_keys` was
+    written within the last REPLICA_PIN_SECONDS.
+    """
+    use_replica = bool(settings.DATABASE_REPLICAS) and not (pin_keys and cache.get_many(_pin_cache_keys(pin_keys)))
+    token = _replica_reads.set(use_replica)
+    try:
+        yield use_replica
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextlib.contextmanager
+def primary_reads():
+    """
+    Forces the reads made inside the block onto the primary, e.g. re-reading rows that
+    were just written inside a replica_reads() block.
+    """
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def pin_to_primary(*keys):
+    """
+    Keeps replica_reads() for these keys on the primary for REPLICA_PIN_SECONDS, long
+    enough for replicas to catch up with a write.
+    """
+    if settings.DATABASE_REPLICAS:
+        cache.set_many(dict.fromkeys(_pin_cache_keys(keys), True), timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def _pin_cache_keys(keys):
+    return [f"db:pin:{key}" for key in keys]
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
@@ -0,0 +1,20 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.services.message_service import archive_messages
+
+
+class Command(BaseCommand):
+    help = "Moves messages older than MESSAGING_ARCHIVE_AFTER_DAYS (or --days) to the archive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.MESSAGING_ARCHIVE_AFTER_DAYS
+        before = timezone.now() - datetime.timedelta(days=days)
+        moved = archive_messages(before, batch_size=options['batch_size'])
+        self.stdout.write(f"Archived {moved} messages created before {before:%Y-%m-%d %H:%M}.")
@@ -0,0 +1,241 @@
+import datetime
+import json
+import platform
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client
+from django.test.utils import override_settings
+from api.benchmarks.synthetic import (
+    BENCH_EMAIL_DOMAIN, count_synthetic_users, delete_synthetic_users, generate_synthetic_users,
+    synthetic_profile_fields,
+)
+from api.serializers.custom_token_serializer import CustomTokenObtainPairSerializer
+
+BENCH_PASSWORD = 'bench-password-123'
+SCENARIOS = ('register', 'login', 'retrieve', 'update', 'list')
+# Registration and login each hash a password, so they get fewer requests by default
+SLOW_SCENARIOS = ('register', 'login')
+WRITE_SCENARIOS = ('register', 'update')
+EXPECTED_STATUS = {'register': 201}
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the API scenarios (register, login, profile retrieve, update and list) in-process "
+        "with Django's test client against a synthetic population, and reports per scenario "
+        "throughput, p50/p95/p99 latency and SQL queries per request (from the request metrics "
+        "middleware). The report is JSON (--output), tagged with the git commit, so two runs "
+        "can be compared with --compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+        parser.add_argument('--users', type=int, default=10_000, help="Synthetic population size")
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per scenario")
+        parser.add_argument('--slow-requests', type=int, default=200, help="Requests for register and login")
+        parser.add_argument('--concurrency', type=int, default=8, help="Client threads")
+        parser.add_argument('--warmup', type=int, default=100, help="Unrecorded requests per scenario first")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report to this file")
+        parser.add_argument('--compare', help="A previous JSON report to compare against")
+        parser.add_argument('--keep', action='store_true', help="Keep the synthetic users afterwards")
+
+    def handle(self, *args, **options):
+        baseline = self._load(options['compare']) if options['compare'] else None
+        existing = count_synthetic_users()
+        if existing < options['users']:
+            generate_synthetic_users(options['users'] - existing, seed=options['seed'], start=existing)
+        # One real hash shared by every benchmark user keeps setup fast but verification realistic
+        User.objects.filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}").update(password=make_password(BENCH_PASSWORD))
+        users = list(
+            User.objects.select_related('profile').filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}")
+            .order_by('pk')[:options['users']]
+        )
+        tokens = [str(CustomTokenObtainPairSerializer.get_token(user).access_token) for user in users]
+
+        report = {'meta': self._meta(options), 'scenarios': {}}
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], THROTTLE_ENABLED=False):
+                for scenario in options['scenarios']:
+                    build = ScenarioRequests(scenario, users, tokens, random.Random(options['seed']))
+                    total = options['slow_requests'] if scenario in SLOW_SCENARIOS else options['requests']
+                    concurrency = options['concurrency']
+                    if scenario in WRITE_SCENARIOS and connection.vendor == 'sqlite':
+                        concurrency = 1  # One writer at a time; concurrent ones fail with "database is locked"
+                    _run(build, range(options['warmup']), concurrency)
+                    results, wall = _run(build, range(options['warmup'], options['warmup'] + total), concurrency)
+                    report['scenarios'][scenario] = {'concurrency': concurrency, **_summarise(scenario, results, wall)}
+        finally:
+            if not options['keep']:
+                delete_synthetic_users()
+
+        self._print(report, baseline)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(f"Report written to {options['output']}.")
+
+    def _meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'started_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'async_views': settings.ASYNC_VIEWS,
+            **{name: options[name] for name in ('users', 'requests', 'slow_requests', 'concurrency', 'warmup', 'seed')},
+        }
+
+    def _load(self, path):
+        try:
+            with open(path) as handle:
+                return json.load(handle)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read the report to compare against: {e}")
+
+    def _print(self, report, baseline):
+        self.stdout.write(
+            f"{'scenario':>9} {'threads':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'errors':>6}"
+            + (f" {'req/s vs':>9} {'p95 vs':>8} {'queries vs':>10}" if baseline else '')
+        )
+        for scenario, row in report['scenarios'].items():
+            line = (
+                f"{scenario:>9} {row['concurrency']:>7} {row['throughput_rps']:9.1f} {row['latency_ms']['p50']:8.2f} "
+                f"{row['latency_ms']['p95']:8.2f} {row['latency_ms']['p99']:8.2f} {row['queries']['mean']:8.2f} "
+                f"{row['errors']:>6}"
+            )
+            before = (baseline or {}).get('scenarios', {}).get(scenario)
+            if before:
+                line += (
+                    f" {_change(row['throughput_rps'], before['throughput_rps']):>9}"
+                    f" {_change(row['latency_ms']['p95'], before['latency_ms']['p95']):>8}"
+                    f" {row['queries']['mean'] - before['queries']['mean']:>+10.2f}"
+                )
+            self.stdout.write(line)
+        if baseline:
+            self.stdout.write(f"Compared with commit {baseline['meta'].get('commit')} ({baseline['meta'].get('started_at')}).")
+
+
+class ScenarioRequests:
+    """
+    Builds request `i` of a scenario as (method, path, JSON body or None, headers).
+    Requests cycle through the population, so each user is hit about equally often.
+    """
+    def __init__(self, scenario, users, tokens, rng):
+        self.scenario = scenario
+        self.users = users
+        self.tokens = tokens
+        self.run_id = f"{int(time.time())}{rng.randrange(1000):03d}"
+        self.today = datetime.date.today()
+        self.rng = rng
+        self.lock = threading.Lock()
+
+    def __call__(self, i):
+        user, token = self.users[i % len(self.users)], self.tokens[i % len(self.tokens)]
+        auth = {'HTTP_AUTHORIZATION': f"Bearer {token}"}
+        if self.scenario == 'register':
+            with self.lock:
+                fields = synthetic_profile_fields(self.rng, self.today)
+            return 'post', '/api/auth/register/', {
+                'name': f"Bench {i}",
+                'email': f"register{self.run_id}-{i}@{BENCH_EMAIL_DOMAIN}",
+                'password': BENCH_PASSWORD,
+                'gender': fields['gender'],
+                'bio': "Registered by the API benchmark.",
+                'looking_for': fields['looking_for'],
+                'zipcode': fields['zipcode'],
+                'birthday': fields['birthday'].isoformat(),
+                'distance': fields['distance'],
+            }, {}
+        if self.scenario == 'login':
+            return 'post', '/api/auth/login/', {'email': user.email, 'password': BENCH_PASSWORD}, {}
+        if self.scenario == 'retrieve':
+            return 'get', f"/api/user/profiles/{user.profile.pk}/", None, auth
+        if self.scenario == 'update':
+            return 'put', f"/api/user/profiles/{user.profile.pk}/", {'bio': f"Updated by the API benchmark ({i})."}, auth
+        return 'get', '/api/user/profiles/', None, auth
+
+
+def _run(build, indices, concurrency):
+    """
+    Sends the requests with `concurrency` threads, each with its own test client.
+    Returns ([(seconds, status, queries)], wall seconds).
+    """
+    local = threading.local()
+    results = []
+    lock = threading.Lock()
+
+    def send(i):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = Client()
+        method, path, body, headers = build(i)
+        started = time.perf_counter()
+        if body is None:
+            response = getattr(client, method)(path, **headers)
+        else:
+            response = getattr(client, method)(path, body, content_type='application/json', **headers)
+        elapsed = time.perf_counter() - started
+        metrics = getattr(response, 'request_metrics', None) or {}
+        with lock:
+            results.append((elapsed, response.status_code, metrics.get('queries')))
+
+    def worker(chunk):
+        try:
+            for i in chunk:
+                send(i)
+        finally:
+            close_old_connections()
+
+    indices = list(indices)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, [indices[i::concurrency] for i in range(concurrency)]))
+    return results, time.perf_counter() - started
+
+
+def _summarise(scenario, results, wall):
+    latencies = sorted(seconds * 1000 for seconds, _, _ in results)
+    queries = [count for _, _, count in results if count is not None]
+    expected = EXPECTED_STATUS.get(scenario, 200)
+    return {
+        'requests': len(results),
+        'errors': sum(1 for _, status, _ in results if status != expected),
+        'throughput_rps': len(results) / wall,
+        'latency_ms': {
+            'mean': sum(latencies) / len(latencies),
+            'p50': _percentile(latencies, 0.50),
+            'p95': _percentile(latencies, 0.95),
+            'p99': _percentile(latencies, 0.99),
+            'max': latencies[-1],
+        },
+        'queries': {
+            'mean': sum(queries) / len(queries) if queries else 0.0,
+            'max': max(queries, default=0),
+            'total': sum(queries),
+        },
+    }
+
+
+def _percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _change(new, old):
+    return f"{(new - old) / old:+.1%}" if old else 'n/a'
@@ -0,0 +1,254 @@
+import asyncio
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from api.benchmarks.synthetic import (
+    BENCH_EMAIL_DOMAIN, count_synthetic_users, delete_synthetic_users, generate_synthetic_users,
+)
+from api.serializers.custom_token_serializer import CustomTokenObtainPairSerializer
+
+BENCH_PASSWORD = 'bench-password-123'
+BENCH_HOST = 'testserver'
+SCENARIOS = ('retrieve', 'update', 'login')
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the WSGI deployment (sync views, one thread per in-flight request) with the "
+        "ASGI deployment (ASYNC_VIEWS, async views on an event loop). Each runs in its own "
+        "process, driving TrueDate.wsgi or TrueDate.asgi directly, and reports requests/sec, "
+        "p50/p99 latency and resident memory per concurrent request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[16, 64, 256])
+        parser.add_argument('--requests', type=int, default=1000, help="Requests per scenario and level")
+        parser.add_argument('--login-requests', type=int, default=64, help="Logins per level (each hashes a password)")
+        parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+        parser.add_argument('--db-latency', type=float, default=0.0, help="Milliseconds added to every query, e.g. a network round trip")
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--keep', action='store_true', help="Keep the synthetic users afterwards")
+        parser.add_argument('--deployment', choices=['wsgi', 'asgi'], help="Internal: run one deployment and print JSON rows")
+
+    def handle(self, *args, **options):
+        if options['deployment']:
+            return self._run_deployment(options)
+
+        existing = count_synthetic_users()
+        if existing < options['users']:
+            generate_synthetic_users(options['users'] - existing, start=existing)
+        # One real hash shared by every benchmark user keeps setup fast but verification realistic
+        User.objects.filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}").update(password=make_password(BENCH_PASSWORD))
+
+        self.stdout.write(
+            f"{'deployment':>10} {'scenario':>9} {'concurrency':>11} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+            f"{'errors':>6} {'threads':>7} {'KiB/conc':>9}"
+        )
+        try:
+            for deployment in ('wsgi', 'asgi'):
+                # A fresh process per deployment so URL routing and memory are measured in isolation
+                env = dict(
+                    os.environ, ASYNC_VIEWS='true' if deployment == 'asgi' else 'false', THROTTLE_ENABLED='false',
+                )
+                command = [sys.executable, '-m', 'django', 'bench_deployments', '--deployment', deployment]
+                for name in ('requests', 'login_requests', 'db_latency', 'users'):
+                    command += [f"--{name.replace('_', '-')}", str(options[name])]
+                command += ['--concurrency', *map(str, options['concurrency'])]
+                command += ['--scenarios', *options['scenarios']]
+                result = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+                for line in result.stdout.splitlines():
+                    row = json.loads(line)
+                    self.stdout.write(
+                        f"{row['deployment']:>10} {row['scenario']:>9} {row['concurrency']:>11} {row['rps']:9.1f} "
+                        f"{row['p50_ms']:8.1f} {row['p99_ms']:8.1f} {row['errors']:>6} {row['peak_threads']:>7} "
+                        f"{row['rss_kib_per_concurrent']:9.1f}"
+                    )
+        finally:
+            if not options['keep']:
+                delete_synthetic_users()
+
+    def _run_deployment(self, options):
+        if options['db_latency']:
+            _add_query_latency(options['db_latency'] / 1000)
+
+        users = list(
+            User.objects.select_related('profile').filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}")
+            .order_by('pk')[:options['users']]
+        )
+        tokens = [str(CustomTokenObtainPairSerializer.get_token(user).access_token) for user in users]
+        connections.close_all()
+        run = self._run_asgi if options['deployment'] == 'asgi' else self._run_wsgi
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, BENCH_HOST]):
+            self._run_scenarios(run, users, tokens, options)
+
+    def _run_scenarios(self, run, users, tokens, options):
+        for scenario in options['scenarios']:
+            total = options['login_requests'] if scenario == 'login' else options['requests']
+            if scenario == 'retrieve':
+                # Measure the steady state: every profile already in the (per-process) cache
+                run([_request_for(scenario, user, token, 0) for user, token in zip(users, tokens)], 8)
+            for concurrency in options['concurrency']:
+                requests = [_request_for(scenario, users[i % len(users)], tokens[i % len(users)], i) for i in range(total)]
+                with MemorySampler() as memory:
+                    latencies, statuses, wall = run(requests, concurrency)
+                ordered = sorted(latencies)
+                self.stdout.write(json.dumps({
+                    'deployment': options['deployment'],
+                    'scenario': scenario,
+                    'concurrency': concurrency,
+                    'rps': len(statuses) / wall,
+                    'p50_ms': statistics.median(ordered) * 1000,
+                    'p99_ms': ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))] * 1000,
+                    'errors': sum(1 for status in statuses if status != 200),
+                    'peak_threads': memory.peak_threads,
+                    'rss_kib_per_concurrent': (memory.peak_rss - memory.baseline_rss) / 1024 / concurrency,
+                }))
+
+    def _run_wsgi(self, requests, concurrency):
+        from TrueDate.wsgi import application
+        latencies, statuses = [], []
+        lock = threading.Lock()
+
+        def send(request):
+            method, path, body, headers = request
+            environ = {
+                'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                'SERVER_NAME': BENCH_HOST, 'SERVER_PORT': '80', 'HTTP_HOST': BENCH_HOST, 'REMOTE_ADDR': '127.0.0.1',
+                'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body),
+                'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr, 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+                'wsgi.run_once': False, 'wsgi.version': (1, 0),
+                **{f"HTTP_{name.upper()}": value for name, value in headers.items()},
+            }
+            status = []
+            started = time.perf_counter()
+            response = application(environ, lambda line, response_headers: status.append(int(line.split()[0])))
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses.append(status[0])
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(send, requests))
+        return latencies, statuses, time.perf_counter() - started
+
+    def _run_asgi(self, requests, concurrency):
+        from TrueDate.asgi import application
+        latencies, statuses = [], []
+
+        async def send_one(request):
+            method, path, body, headers = request
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method, 'scheme': 'http',
+                'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+                'client': ('127.0.0.1', 50000), 'server': (BENCH_HOST, 80),
+                'headers': [
+                    (b'host', BENCH_HOST.encode()), (b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode()),
+                    *((name.lower().encode(), value.encode()) for name, value in headers.items()),
+                ],
+            }
+            messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+            done = asyncio.Event()
+            status = []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            started = time.perf_counter()
+            await application(scope, receive, send)
+            done.set()
+            latencies.append(time.perf_counter() - started)
+            statuses.append(status[0])
+
+        async def worker(queue):
+            while queue:
+                await send_one(queue.pop())
+
+        async def main():
+            queue = list(reversed(requests))
+            await asyncio.gather(*(worker(queue) for _ in range(concurrency)))
+
+        started = time.perf_counter()
+        asyncio.run(main())
+        return latencies, statuses, time.perf_counter() - started
+
+
+def _request_for(scenario, user, token, i):
+    auth = {'Authorization': f"Bearer {token}"}
+    if scenario == 'retrieve':
+        return 'GET', f"/api/user/profiles/{user.profile.pk}/", b'', auth
+    if scenario == 'update':
+        return 'PUT', f"/api/user/profiles/{user.profile.pk}/", json.dumps({'bio': f"Updated bio {i}"}).encode(), auth
+    return 'POST', '/api/auth/login/', json.dumps({'email': user.email, 'password': BENCH_PASSWORD}).encode(), {}
+
+
+def _add_query_latency(seconds):
+    def delayed(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        connection.execute_wrappers.append(delayed)
+
+    connection_created.connect(install, weak=False)
+
+
+class MemorySampler:
+    """
+    Samples the process's resident set size and thread count every few milliseconds.
+    """
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.baseline_rss = self.peak_rss = _rss_bytes()
+        self.peak_threads = _thread_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, _rss_bytes())
+            self.peak_threads = max(self.peak_threads, _thread_count())
+
+
+def _rss_bytes():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def _thread_count():
+    # OS threads, including executor threads asgiref starts outside the threading module's view
+    return len(os.listdir('/proc/self/task'))
@@ -0,0 +1,158 @@
+import copy
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from api.benchmarks.synthetic import BENCH_EMAIL_DOMAIN, count_synthetic_users, delete_synthetic_users, generate_synthetic_users
+from api.models import UserProfile
+from api.utils.logger import LOG_RECORDS_DROPPED, configure_logging, stop_listeners
+
+# name: (format, LOG_ASYNC, level, sample rate); 'off' only emits warnings and errors
+MODES = {
+    'off': ('text', False, 'WARNING', 1.0),
+    'sync': ('text', False, 'DEBUG', 1.0),
+    'sync-json': ('json', False, 'DEBUG', 1.0),
+    'async-json': ('json', True, 'DEBUG', 1.0),
+    'async-sampled': ('json', True, 'DEBUG', 0.1),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures request overhead of logging: serves cached GET /api/user/profiles/<pk>/ "
+        "in-process with logging off, through synchronous file handlers (the old setup), "
+        "and through the queued JSON pipeline, with and without sampling. Reports the "
+        "median req/s over --rounds and the wall time each request costs beyond 'off'. Use "
+        "--write-latency to model a slow disk or log shipper."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per mode and round")
+        parser.add_argument('--rounds', type=int, default=3)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+        parser.add_argument('--write-latency', type=float, default=0.0, help="Milliseconds added to every log write")
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--keep', action='store_true', help="Keep the synthetic users afterwards")
+
+    def handle(self, *args, **options):
+        existing = count_synthetic_users()
+        if existing < options['users']:
+            generate_synthetic_users(options['users'] - existing, start=existing)
+        profile_ids = list(
+            UserProfile.objects.filter(user__email__endswith=f"@{BENCH_EMAIL_DOMAIN}")
+            .order_by('pk').values_list('pk', flat=True)[:options['users']]
+        )
+        paths = [f"/api/user/profiles/{pk}/" for pk in profile_ids]
+
+        self.stdout.write(
+            f"{'mode':>14} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'overhead us':>11} {'records':>8} {'dropped':>8}"
+        )
+        results = {mode: [] for mode in options['modes']}
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], THROTTLE_ENABLED=False):
+                self._run_mode('off', paths, options)  # Warm the profile cache
+                # Modes are interleaved round by round so machine noise hits them alike
+                for _ in range(options['rounds']):
+                    for mode in options['modes']:
+                        results[mode].append(self._run_mode(mode, paths, options))
+
+            baseline = None
+            for mode, rows in results.items():
+                rps = statistics.median(row['rps'] for row in rows)
+                latencies = sorted(latency for row in rows for latency in row['latencies'])
+                # Wall time per request, amortized over all threads, beyond the 'off' mode.
+                # Per-request latencies miss the time threads spend waiting for the GIL.
+                if mode == 'off':
+                    baseline = 1 / rps
+                overhead = (1 / rps - baseline) * 1e6 if baseline is not None else float('nan')
+                self.stdout.write(
+                    f"{mode:>14} {rps:9.1f} {statistics.median(latencies):8.2f} "
+                    f"{latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]:8.2f} {overhead:11.1f} "
+                    f"{sum(row['records'] for row in rows):>8} {sum(row['dropped'] for row in rows):>8}"
+                )
+        finally:
+            stop_listeners()
+            configure_logging(settings.LOGGING)
+            if not options['keep']:
+                delete_synthetic_users()
+
+    def _run_mode(self, mode, paths, options):
+        log_format, use_async, level, sample_rate = MODES[mode]
+        log_file = tempfile.NamedTemporaryFile(suffix='.log', delete=False)
+        log_file.close()
+        dropped_before = LOG_RECORDS_DROPPED.value()
+        with override_settings(LOG_ASYNC=use_async, LOG_SAMPLE_RATE=sample_rate):
+            configure_logging(_bench_logging(log_format, level, log_file.name, options['write_latency'] / 1000))
+            try:
+                latencies, wall = self._send(paths, options['requests'], options['concurrency'])
+            finally:
+                stop_listeners()  # Drains the queue, so the record count below is complete
+                logging.shutdown()
+        with open(log_file.name) as written:
+            records = sum(1 for _ in written)
+        os.unlink(log_file.name)
+
+        return {
+            'rps': len(latencies) / wall,
+            'latencies': latencies,
+            'records': records,
+            'dropped': LOG_RECORDS_DROPPED.value() - dropped_before,
+        }
+
+    def _send(self, paths, total, concurrency):
+        local = threading.local()
+        latencies = []
+        lock = threading.Lock()
+
+        def get(i):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = Client()
+            started = time.perf_counter()
+            client.get(paths[i % len(paths)])
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(get, range(total)))
+        return latencies, time.perf_counter() - started
+
+
+def _bench_logging(log_format, level, filename, write_latency):
+    config = copy.deepcopy(settings.LOGGING)
+    config['handlers'] = {
+        'file': {
+            '()': SlowFileHandler,
+            'filename': filename,
+            'latency': write_latency,
+            'formatter': log_format,
+        },
+    }
+    for logger in config['loggers'].values():
+        logger.update(handlers=['file'], level=level)
+    return config
+
+
+class SlowFileHandler(logging.FileHandler):
+    """
+    FileHandler that sleeps before every write, standing in for a slow disk.
+    """
+    def __init__(self, filename, latency=0.0):
+        super().__init__(filename)
+        self.latency = latency
+
+    def emit(self, record):
+        if self.latency:
+            time.sleep(self.latency)
+        super().emit(record)
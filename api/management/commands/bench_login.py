@@ -0,0 +1,78 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from api.benchmarks.synthetic import BENCH_EMAIL_DOMAIN, delete_synthetic_users, generate_synthetic_users
+
+BENCH_PASSWORD = 'bench-password-123'
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests POST /api/auth/login/ in-process at several concurrency levels and reports "
+        "logins/sec, p50/p99 latency and how many requests were turned away with 429."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+        parser.add_argument('--requests', type=int, default=200, help="Logins per concurrency level")
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--keep', action='store_true', help="Keep the synthetic users afterwards")
+
+    def handle(self, *args, **options):
+        generate_synthetic_users(options['users'])
+        # One real hash shared by every benchmark user keeps setup fast but verification realistic
+        User.objects.filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}").update(password=make_password(BENCH_PASSWORD))
+        emails = list(User.objects.filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}").values_list('email', flat=True))
+
+        self.stdout.write(f"{'concurrency':>11} {'logins/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'ok':>6} {'429':>6} {'other':>6}")
+        try:
+            # 429s here should only come from the hashing pool, not the login rate limits
+            with override_settings(THROTTLE_ENABLED=False):
+                for concurrency in options['concurrency']:
+                    self._run_level(concurrency, options['requests'], emails)
+        finally:
+            if not options['keep']:
+                delete_synthetic_users()
+
+    def _run_level(self, concurrency, total, emails):
+        local = threading.local()
+        latencies, statuses = [], []
+        lock = threading.Lock()
+
+        def login(i):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = Client()
+            started = time.perf_counter()
+            response = client.post(
+                '/api/auth/login/',
+                {'email': emails[i % len(emails)], 'password': BENCH_PASSWORD},
+                content_type='application/json',
+            )
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                statuses.append(response.status_code)
+            connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(login, range(total)))
+        wall = time.perf_counter() - started
+
+        ok = statuses.count(200)
+        rejected = statuses.count(429)
+        ordered = sorted(latencies)
+        p99 = ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+        self.stdout.write(
+            f"{concurrency:>11} {ok / wall:10.1f} {statistics.median(ordered):9.1f} {p99:9.1f} "
+            f"{ok:>6} {rejected:>6} {len(statuses) - ok - rejected:>6}"
+        )
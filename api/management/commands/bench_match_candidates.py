@@ -0,0 +1,103 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from api.benchmarks.synthetic import (
+    BENCH_EMAIL_DOMAIN, count_synthetic_users, delete_synthetic_users, generate_synthetic_users,
+)
+from api.models import UserProfile
+from api.services.match_service import get_match_candidates
+from api.utils.geo import haversine_miles
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks match candidate discovery while growing a synthetic profile table "
+        "(default 10k -> 100k -> 1M rows). Writes to the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--queries', type=int, default=200, help="Candidate queries timed per size")
+        parser.add_argument('--baseline', action='store_true', help="Also time a full-table scan for comparison")
+        parser.add_argument('--keep', action='store_true', help="Keep the synthetic rows afterwards")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        results = []
+
+        try:
+            for size in sorted(options['sizes']):
+                existing = count_synthetic_users()
+                if existing < size:
+                    self.stdout.write(f"Generating {size - existing} profiles...")
+                    generate_synthetic_users(size - existing, seed=options['seed'], start=existing)
+                self._analyze()
+
+                searchers = self._sample_searchers(rng, options['queries'])
+                latencies = []
+                for profile in searchers:
+                    started = time.perf_counter()
+                    get_match_candidates(profile)
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+                baseline = None
+                if options['baseline']:
+                    started = time.perf_counter()
+                    for profile in searchers[:5]:
+                        self._full_scan(profile)
+                    baseline = (time.perf_counter() - started) * 1000 / min(5, len(searchers))
+
+                results.append((size, statistics.median(latencies), _percentile(latencies, 95), baseline))
+                self.stdout.write(f"  {size:>10,} rows  p50 {results[-1][1]:8.2f} ms  p95 {results[-1][2]:8.2f} ms")
+        finally:
+            if not options['keep']:
+                delete_synthetic_users()
+
+        self._report(results)
+
+    def _sample_searchers(self, rng, count):
+        ids = list(
+            UserProfile.objects.filter(user__email__endswith=f"@{BENCH_EMAIL_DOMAIN}").values_list('id', flat=True)[:50_000]
+        )
+        picked = rng.sample(ids, min(count, len(ids)))
+        return list(UserProfile.objects.filter(pk__in=picked))
+
+    def _full_scan(self, profile):
+        """
+        The unindexed approach: read every profile and do the distance math in Python.
+        """
+        found = []
+        rows = UserProfile.objects.exclude(pk=profile.pk).values_list(
+            'id', 'gender', 'looking_for', 'latitude', 'longitude', 'distance'
+        ).iterator(chunk_size=10_000)
+        for pk, gender, looking_for, lat, lon, radius in rows:
+            if gender != profile.looking_for or looking_for != profile.gender or lat is None:
+                continue
+            miles = haversine_miles(profile.latitude, profile.longitude, lat, lon)
+            if miles <= profile.distance and (radius is None or miles <= radius):
+                found.append((pk, miles))
+        return found
+
+    def _analyze(self):
+        if connection.vendor in ('postgresql', 'sqlite'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def _report(self, results):
+        self.stdout.write("")
+        self.stdout.write(f"{'rows':>12} {'p50 ms':>10} {'p95 ms':>10} {'scan ms':>10} {'rows x':>8} {'p50 x':>8}")
+        first_size, first_p50 = results[0][0], results[0][1]
+        for size, p50, p95, baseline in results:
+            scan = f"{baseline:10.1f}" if baseline is not None else f"{'-':>10}"
+            self.stdout.write(
+                f"{size:>12,} {p50:10.2f} {p95:10.2f} {scan} {size / first_size:8.1f} {p50 / first_p50:8.2f}"
+            )
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
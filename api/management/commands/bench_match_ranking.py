@@ -0,0 +1,87 @@
+import collections
+import datetime
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.benchmarks.synthetic import synthetic_profile_fields
+from api.models import UserProfile
+from api.services.match_service import _age_in_years, tokenize_bio, build_candidate_columns, score_candidates, top_k
+from api.utils.geo import haversine_miles
+
+BIO_WORDS = (
+    "hiking coffee travel music dogs cats cooking movies books running yoga wine beach "
+    "art photography gaming football tennis dancing mountains camping sushi startups"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Compares vectorised candidate scoring with a per-object Python loop. Uses no database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+        parser.add_argument('--page-size', type=int, default=settings.MATCH_PAGE_SIZE)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        today = datetime.date.today()
+        searcher = UserProfile(id=0, **synthetic_profile_fields(rng, today))
+        searcher.bio = self._bio(rng)
+
+        self.stdout.write(f"{'candidates':>12} {'loop ms':>10} {'numpy ms':>10} {'speedup':>8}")
+        for size in options['sizes']:
+            rows = []
+            for pk in range(1, size + 1):
+                fields = synthetic_profile_fields(rng, today)
+                fields['bio'] = self._bio(rng)
+                rows.append((pk, fields['gender'], fields['looking_for'], fields['latitude'], fields['longitude'],
+                             fields['birthday'], fields['age'], fields['bio']))
+            instances = [
+                UserProfile(id=pk, gender=g, looking_for=lf, latitude=lat, longitude=lon, birthday=b, age=a, bio=bio)
+                for pk, g, lf, lat, lon, b, a, bio in rows
+            ]
+
+            loop_ms = self._best(options['repeat'], lambda: self._naive(searcher, instances, options['page_size'], today))
+            numpy_ms = self._best(options['repeat'], lambda: top_k(
+                score_candidates(searcher, build_candidate_columns(rows, today)), options['page_size']
+            ))
+            self.stdout.write(f"{size:>12,} {loop_ms:10.1f} {numpy_ms:10.1f} {loop_ms / numpy_ms:7.1f}x")
+
+    def _naive(self, searcher, candidates, page_size, today):
+        """
+        The per-object baseline: score each UserProfile instance in a Python loop.
+        """
+        weights = settings.MATCH_SCORE_WEIGHTS
+        radius = min(searcher.distance or settings.MATCH_MAX_DISTANCE, settings.MATCH_MAX_DISTANCE)
+        searcher_age = _age_in_years(searcher.birthday, today)
+        query = collections.Counter(hash(t) % settings.MATCH_BIO_DIMENSIONS for t in tokenize_bio(searcher.bio))
+        query_norm = math.sqrt(sum(c * c for c in query.values()))
+
+        scored = []
+        for candidate in candidates:
+            miles = haversine_miles(searcher.latitude, searcher.longitude, candidate.latitude, candidate.longitude)
+            distance = max(0.0, min(1.0, 1.0 - miles / radius))
+            age = math.exp(-((_age_in_years(candidate.birthday, today) - searcher_age) / settings.MATCH_AGE_SPREAD) ** 2)
+            reciprocity = ((candidate.gender == searcher.looking_for) + (candidate.looking_for == searcher.gender)) / 2
+            words = collections.Counter(hash(t) % settings.MATCH_BIO_DIMENSIONS for t in tokenize_bio(candidate.bio))
+            norm = math.sqrt(sum(c * c for c in words.values()))
+            bio = sum(c * query[k] for k, c in words.items()) / (norm * query_norm) if norm and query_norm else 0.0
+            score = weights['distance'] * distance + weights['age'] * age + weights['reciprocity'] * reciprocity + weights['bio'] * bio
+            scored.append((score, candidate.pk))
+        scored.sort(reverse=True)
+        return scored[:page_size]
+
+    def _best(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings)
+
+    def _bio(self, rng):
+        return ' '.join(rng.choices(BIO_WORDS, k=rng.randrange(0, 15)))
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from api.benchmarks.synthetic import (
+    BENCH_EMAIL_DOMAIN, count_synthetic_users, delete_synthetic_users, generate_synthetic_users,
+)
+from api.models import Conversation, ConversationMember
+from api.realtime.consumer import WEBSOCKET_PATH, websocket_application
+from api.serializers.custom_token_serializer import CustomTokenObtainPairSerializer
+
+
+class FakeSocket:
+    """
+    Client side of one in-process WebSocket: feeds ASGI receive events to the app and
+    records what it sends back.
+    """
+    def __init__(self, token):
+        self.scope = {'type': 'websocket', 'path': WEBSOCKET_PATH, 'query_string': f"token={token}".encode()}
+        self.inbox = asyncio.Queue()
+        self.accepted = asyncio.Event()
+        self.closed = None
+        self.on_frame = None
+
+    async def receive(self):
+        return await self.inbox.get()
+
+    async def send(self, message):
+        if message['type'] == 'websocket.accept':
+            self.accepted.set()
+        elif message['type'] == 'websocket.close':
+            self.closed = message.get('code')
+            self.accepted.set()
+        elif self.on_frame is not None:
+            self.on_frame(json.loads(message['text']))
+
+    def send_frame(self, frame):
+        self.inbox.put_nowait({'type': 'websocket.receive', 'text': json.dumps(frame)})
+
+
+class Command(BaseCommand):
+    help = (
+        "Opens --connections in-process WebSocket connections to the realtime messaging app, "
+        "pairs them into conversations, and reports messages/sec plus ack and delivery latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=10000)
+        parser.add_argument('--messages', type=int, default=5, help="Messages sent per connection")
+        parser.add_argument(
+            '--rate', type=int, default=0,
+            help="Messages offered per second; 0 sends everything at once and measures drain time",
+        )
+        parser.add_argument('--keep', action='store_true', help="Keep the synthetic users afterwards")
+
+    def handle(self, *args, **options):
+        count = options['connections'] - options['connections'] % 2
+        existing = count_synthetic_users()
+        if existing < count:
+            generate_synthetic_users(count - existing, start=existing)
+        users = list(User.objects.select_related('profile').filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}").order_by('pk')[:count])
+        conversations = self._pair_users(users)
+        tokens = [str(CustomTokenObtainPairSerializer.get_token(user).access_token) for user in users]
+        try:
+            asyncio.run(self._run(users, tokens, conversations, options['messages'], options['rate']))
+        finally:
+            Conversation.objects.filter(pk__in=conversations).delete()
+            if not options['keep']:
+                delete_synthetic_users()
+
+    def _pair_users(self, users):
+        pair_keys = [f"{users[i].pk}:{users[i + 1].pk}" for i in range(0, len(users), 2)]
+        # Start from empty conversations even when --keep left synthetic users behind
+        Conversation.objects.filter(pair_key__in=pair_keys).delete()
+        created = Conversation.objects.bulk_create([Conversation(pair_key=key) for key in pair_keys])
+        ConversationMember.objects.bulk_create([
+            ConversationMember(conversation=conversation, user=user)
+            for conversation, i in zip(created, range(0, len(users), 2))
+            for user in (users[i], users[i + 1])
+        ])
+        return [conversation.pk for conversation in created]
+
+    async def _run(self, users, tokens, conversations, per_connection, rate):
+        sockets = [FakeSocket(token) for token in tokens]
+        started = time.perf_counter()
+        apps = [asyncio.create_task(websocket_application(s.scope, s.receive, s.send)) for s in sockets]
+        for socket in sockets:
+            socket.inbox.put_nowait({'type': 'websocket.connect'})
+        await asyncio.gather(*(socket.accepted.wait() for socket in sockets))
+        rejected = sum(1 for socket in sockets if socket.closed is not None)
+        self.stdout.write(f"{len(sockets) - rejected} connections open in {time.perf_counter() - started:.1f}s ({rejected} rejected)")
+
+        total = len(sockets) * per_connection
+        sent_at, ack_latencies, delivery_latencies = {}, [], []
+        done = asyncio.Event()
+
+        def on_frame(frame):
+            now = time.perf_counter()
+            if frame['type'] == 'message.ack':
+                ack_latencies.append(now - sent_at[frame['client_id']])
+            elif frame['type'] == 'message.new':
+                delivery_latencies.append(now - sent_at[frame['body']])
+                if len(delivery_latencies) == total:
+                    done.set()
+
+        for socket in sockets:
+            socket.on_frame = on_frame
+
+        started = time.perf_counter()
+        for sent in range(total):
+            i, n = sent % len(sockets), sent // len(sockets)
+            client_id = f"{i}-{n}"
+            sent_at[client_id] = time.perf_counter()
+            # The body doubles as the key the recipient uses to measure delivery latency
+            sockets[i].send_frame({'type': 'message.send', 'conversation': conversations[i // 2], 'body': client_id, 'client_id': client_id})
+            if rate and sent % max(rate // 100, 1) == 0:
+                # Pace in 10 ms ticks
+                await asyncio.sleep(max(started + sent / rate - time.perf_counter(), 0))
+        try:
+            await asyncio.wait_for(done.wait(), timeout=300)
+        except asyncio.TimeoutError:
+            self.stdout.write(self.style.WARNING("Timed out waiting for deliveries"))
+        wall = time.perf_counter() - started
+
+        for socket in sockets:
+            socket.inbox.put_nowait({'type': 'websocket.disconnect'})
+        await asyncio.gather(*apps)
+
+        self.stdout.write(f"{len(delivery_latencies)} of {total} messages delivered in {wall:.2f}s ({len(delivery_latencies) / wall:.0f} messages/s)")
+        for label, latencies in (('ack', ack_latencies), ('delivery', delivery_latencies)):
+            if latencies:
+                ordered = sorted(latencies)
+                p99 = ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+                self.stdout.write(f"{label:>9} latency: p50 {statistics.median(ordered) * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms")
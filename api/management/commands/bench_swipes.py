@@ -0,0 +1,176 @@
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.models import Q
+from api.benchmarks.synthetic import BENCH_EMAIL_DOMAIN, count_synthetic_users, delete_synthetic_users, generate_synthetic_users
+from api.models import Match, SeenSet, Swipe, UserProfile
+from api.services.swipe_service import SwipeBuffer, match_created
+
+
+class TimedSwipeBuffer(SwipeBuffer):
+    """
+    SwipeBuffer that records the size, write time and queueing delay of every batch.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches = []
+        self._batches_lock = threading.Lock()
+
+    def _write(self, batch):
+        if not batch:
+            return
+        started = time.monotonic()
+        delay = started - next(iter(batch.values()))[2]
+        super()._write(batch)
+        with self._batches_lock:
+            self.batches.append((len(batch), (time.monotonic() - started) * 1000, delay * 1000))
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures swipe ingestion: --concurrency threads submit --swipes likes and passes "
+        "between synthetic profiles to a SwipeBuffer, which writes them in batches and "
+        "detects mutual likes. Reports sustained swipes/sec (until the last one is "
+        "written), per-batch write time and queueing delay, and checks every mutual like "
+        "became exactly one match event. --baseline swipes are then written one at a "
+        "time (upsert plus a reverse-like query each) for comparison."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20_000)
+        parser.add_argument('--swipes', type=int, default=50_000)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--rate', type=int, default=0,
+            help="Swipes offered per second across all threads; 0 submits as fast as possible",
+        )
+        parser.add_argument('--mutual', type=float, default=0.2, help="Share of likes that get liked back")
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--flush-interval', type=float, default=None)
+        parser.add_argument('--baseline', type=int, default=2000, help="Swipes written one at a time; 0 skips")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keep', action='store_true', help="Keep the synthetic users afterwards")
+
+    def handle(self, *args, **options):
+        existing = count_synthetic_users()
+        if existing < options['users']:
+            generate_synthetic_users(options['users'] - existing, start=existing)
+        profile_ids = list(
+            UserProfile.objects.filter(user__email__endswith=f"@{BENCH_EMAIL_DOMAIN}")
+            .order_by('pk').values_list('pk', flat=True)[:options['users']]
+        )
+        swipes = _generate(profile_ids, options['swipes'], options['mutual'], random.Random(options['seed']))
+        liked = {(swiper, target) for swiper, target, like in swipes if like}
+        expected = sum(1 for swiper, target in liked if swiper < target and (target, swiper) in liked)
+
+        try:
+            self._clear(profile_ids)
+            self._buffered(swipes, expected, options)
+            if options['baseline']:
+                self._clear(profile_ids)
+                self._one_at_a_time(swipes[:options['baseline']], options['concurrency'])
+        finally:
+            self._clear(profile_ids)
+            if not options['keep']:
+                delete_synthetic_users()
+
+    def _buffered(self, swipes, expected, options):
+        events = []
+        receiver = lambda sender, matches, **kwargs: events.extend(matches)
+        match_created.connect(receiver, weak=False)
+        buffer = TimedSwipeBuffer(batch_size=options['batch_size'], flush_interval=options['flush_interval'])
+
+        started = time.perf_counter()
+        _run_threads(options['concurrency'], swipes, lambda swipe: buffer.submit(*swipe), options['rate'])
+        submitted = time.perf_counter() - started
+        buffer.stop()
+        elapsed = time.perf_counter() - started
+        match_created.disconnect(receiver)
+
+        stored = Swipe.objects.filter(swiper_id__in={swiper for swiper, _, _ in swipes}).count()
+        matches = Match.objects.filter(profile_a_id__in={swiper for swiper, _, _ in swipes} | {t for _, t, _ in swipes}).count()
+        sizes = [size for size, _, _ in buffer.batches]
+        writes = sorted(ms for _, ms, _ in buffer.batches)
+        delays = sorted(ms for _, _, ms in buffer.batches)
+        self.stdout.write(
+            f"buffered: {len(swipes):,} swipes by {options['concurrency']} threads, "
+            f"offered at {options['rate'] or 'max'} swipes/s\n"
+            f"  submitted in {submitted:.2f}s ({len(swipes) / submitted:,.0f} swipes/s accepted)\n"
+            f"  written in {elapsed:.2f}s ({len(swipes) / elapsed:,.0f} swipes/s sustained)\n"
+            f"  {len(sizes)} batches, median size {statistics.median(sizes):.0f}\n"
+            f"  batch write ms: p50 {_percentile(writes, 0.5):.1f}  p99 {_percentile(writes, 0.99):.1f}  max {writes[-1]:.1f}\n"
+            f"  oldest swipe's wait ms: p50 {_percentile(delays, 0.5):.1f}  p99 {_percentile(delays, 0.99):.1f}\n"
+            f"  rows {stored:,}, matches {matches:,} (expected {expected:,}), match events {len(events):,}"
+        )
+        if stored != len(swipes) or matches != expected or len(events) != expected:
+            raise CommandError("Stored swipes or detected matches don't match the generated swipes.")
+
+    def _one_at_a_time(self, swipes, concurrency):
+        def write(swipe):
+            swiper, target, liked = swipe
+            Swipe.objects.update_or_create(swiper_id=swiper, target_id=target, defaults={'liked': liked})
+            if liked and Swipe.objects.filter(swiper_id=target, target_id=swiper, liked=True).exists():
+                Match.objects.get_or_create(profile_a_id=min(swiper, target), profile_b_id=max(swiper, target))
+
+        if connection.vendor == 'sqlite':
+            concurrency = 1  # One writer at a time; concurrent ones fail with "database is locked"
+        started = time.perf_counter()
+        _run_threads(concurrency, swipes, write)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"one at a time: {len(swipes):,} swipes by {concurrency} threads in {elapsed:.2f}s "
+            f"({len(swipes) / elapsed:,.0f} swipes/s)"
+        )
+
+    def _clear(self, profile_ids):
+        Swipe.objects.filter(swiper_id__in=profile_ids).delete()
+        SeenSet.objects.filter(profile_id__in=profile_ids).delete()
+        Match.objects.filter(Q(profile_a_id__in=profile_ids) | Q(profile_b_id__in=profile_ids)).delete()
+
+
+def _generate(profile_ids, count, mutual, rng):
+    """
+    Returns `count` (swiper, target, liked) swipes, each pair at most once, in random
+    order. A `mutual` share of the likes is answered with a like back.
+    """
+    seen = set()
+    swipes = []
+    while len(swipes) < count:
+        swiper, target = rng.sample(profile_ids, 2)
+        if (swiper, target) in seen or (target, swiper) in seen:
+            continue
+        liked = rng.random() < 0.5
+        seen.add((swiper, target))
+        swipes.append((swiper, target, liked))
+        if liked and rng.random() < mutual and len(swipes) < count:
+            seen.add((target, swiper))
+            swipes.append((target, swiper, True))
+    rng.shuffle(swipes)
+    return swipes
+
+def _run_threads(concurrency, items, func, rate=0):
+    interval = concurrency / rate if rate else 0  # Seconds between two items of one thread
+
+    def run(chunk):
+        started = time.perf_counter()
+        try:
+            for i, item in enumerate(chunk):
+                if interval:
+                    # Paced against the start, so a slow call doesn't lower the offered rate
+                    delay = started + i * interval - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                func(item)
+        finally:
+            close_old_connections()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(run, [items[i::concurrency] for i in range(concurrency)]))
+
+def _percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))]
@@ -0,0 +1,111 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from api.models import HAS_EMAIL, MatchFeed, MatchFeedEntry, Message, Swipe, User, UserProfile
+from api.services.auth_service import _login_queryset
+from api.services.match_service import bounding_box_rows, candidate_queryset
+from api.services.user_profile_service import profile_list_queryset
+
+# Plan lines that read a whole table. PostgreSQL: "Seq Scan on api_userprofile";
+# SQLite: "SCAN api_userprofile" (a full index scan reads "SCAN t USING INDEX i").
+_POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on "?(\w+)"?')
+_SQLITE_FULL_SCAN = re.compile(r'\bSCAN (\w+)(?! USING)(?:\s|$)')
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAINs the hot queries (login and registration email lookups, profile retrieve "
+        "and list, candidate discovery, mutual-like check, feed pages, message archiving) "
+        "and fails unless each uses one of its expected indexes without a full table scan. "
+        "On PostgreSQL sequential scans are disabled while planning, so small development "
+        "tables, where a scan is legitimately cheaper, still show whether an index can "
+        "serve the query."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help="Print every plan in full")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f"Plans can only be checked on PostgreSQL or SQLite, not {connection.vendor}.")
+
+        failures = []
+        for name, queryset, indexes in _hot_queries():
+            plan = _explain(queryset)
+            scans = _full_scans(plan)
+            used = [index for index in indexes if index in plan]
+            ok = bool(used) and not scans
+            self.stdout.write(
+                f"{'ok  ' if ok else 'FAIL'} {name:<28} "
+                + (f"uses {used[0]}" if used else f"expected one of {', '.join(indexes)}")
+                + (f"; full scan of {', '.join(scans)}" if scans else '')
+            )
+            if options['verbose_plans'] or not ok:
+                self.stdout.write('     ' + plan.replace('\n', '\n     '))
+            if not ok:
+                failures.append(name)
+        if failures:
+            raise CommandError(f"{len(failures)} queries don't use their indexes: {', '.join(failures)}.")
+
+
+def _hot_queries():
+    """
+    (name, queryset, acceptable index names), built the way the services build them.
+    """
+    searcher = UserProfile(
+        pk=1, gender='male', looking_for='female', latitude=40.71, longitude=-74.01, distance=50,
+    )
+    postgres = connection.vendor == 'postgresql'
+    # SQLite builds unconstrained unique constraints inline, as sqlite_autoindex_<table>_N
+    profile_pk = 'api_userprofile_pkey' if postgres else 'PRIMARY KEY'
+    swipe_pair = 'swipe_pair_uniq' if postgres else 'sqlite_autoindex_api_swipe_'
+    feed_rank = 'match_feed_entry_rank_uniq' if postgres else 'sqlite_autoindex_api_matchfeedentry_'
+    queries = [
+        ('login', _login_queryset('someone@example.com'), ['auth_user_email_uniq']),
+        ('register email check', User.objects.filter(HAS_EMAIL, email='someone@example.com'), ['auth_user_email_uniq']),
+        ('profile retrieve', UserProfile.objects.select_related('user').filter(pk=1), [profile_pk]),
+        ('profile list', profile_list_queryset({'gender': 'female', 'looking_for': 'male'})[:21], ['profile_list_idx']),
+        (
+            'profile list by age',
+            profile_list_queryset({'gender': 'female', 'looking_for': 'male', 'min_age': 25, 'max_age': 34})[:21],
+            ['profile_list_idx', 'profile_age_idx'],
+        ),
+        ('candidate discovery', bounding_box_rows(candidate_queryset(searcher), 40.71, -74.01, 50), ['profile_geo_idx']),
+        (
+            'mutual like check',
+            Swipe.objects.filter(swiper_id__in=[2, 3], target_id__in=[1, 4], liked=True).values_list('swiper_id', 'target_id'),
+            [swipe_pair],
+        ),
+        (
+            'match feed page',
+            MatchFeedEntry.objects.filter(owner_id=1, rank__gt=20).select_related('candidate__user').order_by('rank')[:21],
+            [feed_rank],
+        ),
+        (
+            'message archive batch',
+            Message.objects.filter(created_at__lt=timezone.now()).order_by('created_at', 'id')[:1000],
+            ['message_archive_scan_idx'],
+        ),
+    ]
+    if postgres:
+        # SQLite can't use an index for a bare boolean WHERE "is_stale", which is how Django filters on True
+        queries.append(
+            ('stale feeds', MatchFeed.objects.filter(is_stale=True).order_by('stale_since')[:100], ['match_feed_stale_idx']),
+        )
+    return queries
+
+
+def _explain(queryset):
+    if connection.vendor != 'postgresql':
+        return queryset.explain()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+
+def _full_scans(plan):
+    pattern = _POSTGRES_FULL_SCAN if connection.vendor == 'postgresql' else _SQLITE_FULL_SCAN
+    return sorted(set(pattern.findall(plan)))
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from api.benchmarks.synthetic import count_synthetic_users, delete_synthetic_users, generate_synthetic_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Grows the synthetic benchmark population to --users users with profiles (millions "
+        "are fine: rows go in with bulk_create, --batch-size at a time). Run load_zipcodes "
+        "first to give profiles real zipcodes. --delete removes the population instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000, help="Total synthetic users wanted")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--delete', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['delete']:
+            deleted, _ = delete_synthetic_users()
+            self.stdout.write(f"Deleted {deleted:,} rows.")
+            return
+
+        existing = count_synthetic_users()
+        missing = options['users'] - existing
+        if missing <= 0:
+            self.stdout.write(f"{existing:,} synthetic users already exist.")
+            return
+
+        started = time.perf_counter()
+
+        def progress(created):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{existing + created:,} users ({created / elapsed:,.0f} rows/s)")
+
+        generate_synthetic_users(
+            missing, seed=options['seed'], batch_size=options['batch_size'], start=existing, progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {missing:,} synthetic users in {time.perf_counter() - started:.1f}s."
+        ))
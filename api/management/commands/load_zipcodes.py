@@ -0,0 +1,46 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from api.models import UserProfile, ZipcodeLocation
+
+
+class Command(BaseCommand):
+    help = "Loads zipcode centroids from a CSV file (zipcode,latitude,longitude) and geocodes existing profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help="Path to a CSV file with zipcode, latitude and longitude columns")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_file'], newline='') as handle:
+                rows = [
+                    ZipcodeLocation(
+                        zipcode=row['zipcode'].strip(),
+                        latitude=float(row['latitude']),
+                        longitude=float(row['longitude']),
+                    )
+                    for row in csv.DictReader(handle)
+                ]
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(f"Could not read zipcodes: {e}")
+
+        with transaction.atomic():
+            ZipcodeLocation.objects.bulk_create(
+                rows,
+                batch_size=options['batch_size'],
+                update_conflicts=True,
+                unique_fields=['zipcode'],
+                update_fields=['latitude', 'longitude'],
+            )
+
+            # Backfill coordinates for profiles saved before their zipcode was known
+            location = ZipcodeLocation.objects.filter(pk=OuterRef('zipcode'))
+            geocoded = UserProfile.objects.filter(latitude__isnull=True, zipcode__in=ZipcodeLocation.objects.values('pk')).update(
+                latitude=Subquery(location.values('latitude')[:1]),
+                longitude=Subquery(location.values('longitude')[:1]),
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Loaded {len(rows)} zipcodes, geocoded {geocoded} profiles."))
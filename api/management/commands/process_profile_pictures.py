@@ -0,0 +1,31 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.models import ProfilePicture
+from api.services.picture_service import process_profile_picture
+
+
+class Command(BaseCommand):
+    help = (
+        "Processes profile pictures whose background task never finished, e.g. because the "
+        "web process restarted while LocalTaskBackend held it. Pictures uploaded within "
+        "--min-age seconds are left to the task that is still handling them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=300, help="Seconds since upload before a pending picture is retried")
+        parser.add_argument('--failed', action='store_true', help="Retry failed pictures too")
+
+    def handle(self, *args, **options):
+        statuses = [ProfilePicture.PENDING] + ([ProfilePicture.FAILED] if options['failed'] else [])
+        cutoff = timezone.now() - datetime.timedelta(seconds=options['min_age'])
+        hashes = list(
+            ProfilePicture.objects.filter(status__in=statuses, created_at__lt=cutoff)
+            .order_by('created_at').values_list('content_hash', flat=True)
+        )
+        results = [process_profile_picture(content_hash) for content_hash in hashes]
+        self.stdout.write(
+            f"Processed {results.count(ProfilePicture.READY)} profile pictures, "
+            f"{results.count(ProfilePicture.FAILED)} failed."
+        )
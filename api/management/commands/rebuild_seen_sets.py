@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from api.models import Swipe
+from api.services.seen_service import rebuild_seen_sets
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds users' seen sets from their swipe history: every user with swipes, or "
+        "the --profiles given. Run once after deploying seen sets, and after changing "
+        "SEEN_SET_ERROR_RATE. Reports the stored size per user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', type=int, nargs='+', help="Profile IDs; default all swipers")
+        parser.add_argument('--batch-size', type=int, default=500, help="Users rebuilt per transaction")
+
+    def handle(self, *args, **options):
+        sizes = []
+        for profile_ids in self._batches(options['profiles'], options['batch_size']):
+            sizes.extend(rebuild_seen_sets(profile_ids))
+            self.stdout.write(f"Rebuilt {len(sizes):,} seen sets.")
+        if not sizes:
+            self.stdout.write("No swipes; nothing to rebuild.")
+            return
+        sizes.sort()
+        self.stdout.write(
+            f"{len(sizes):,} seen sets, {sum(sizes):,} bytes: "
+            f"mean {sum(sizes) / len(sizes):,.0f}  p50 {sizes[len(sizes) // 2]:,}  "
+            f"p99 {sizes[min(len(sizes) - 1, int(len(sizes) * 0.99))]:,}  max {sizes[-1]:,} bytes per user"
+        )
+
+    def _batches(self, profile_ids, batch_size):
+        if profile_ids:
+            for i in range(0, len(profile_ids), batch_size):
+                yield profile_ids[i:i + batch_size]
+            return
+        last = 0
+        while True:
+            batch = list(
+                Swipe.objects.filter(swiper_id__gt=last).order_by('swiper_id')
+                .values_list('swiper_id', flat=True).distinct()[:batch_size]
+            )
+            if not batch:
+                return
+            yield batch
+            last = batch[-1]
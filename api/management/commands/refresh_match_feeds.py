@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from api.services.match_service import refresh_stale_match_feeds
+
+
+class Command(BaseCommand):
+    help = "Rebuilds stale match feeds. Runs continuously unless --once is given."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the stale feeds once and exit")
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep when nothing is stale")
+
+    def handle(self, *args, **options):
+        while True:
+            rebuilt = refresh_stale_match_feeds(batch_size=options['batch_size'])
+            if rebuilt:
+                self.stdout.write(f"Rebuilt {rebuilt} match feeds.")
+                continue
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,85 @@
+import datetime
+import multiprocessing
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from api.tasks.backends import get_task_backend
+from api.tasks.worker import run_worker, worker_process
+
+# Seconds between the supervisor's checks for dead workers, lost tasks and old rows
+MAINTENANCE_INTERVAL = 30
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs queued background tasks with a pool of --processes worker processes (needs "
+        "TASK_BACKEND = api.tasks.backends.DatabaseTaskBackend). Each worker takes the ready "
+        "task of the best of --lanes, one at a time. The supervisor restarts workers that "
+        "die, queues again the tasks they held and deletes finished tasks after "
+        "TASK_RETENTION_DAYS. SIGTERM or Ctrl-C lets workers finish their current task. "
+        "--once runs the ready tasks in this process and exits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.TASK_WORKER_PROCESSES)
+        parser.add_argument('--lanes', nargs='+', choices=settings.TASK_LANES, default=list(settings.TASK_LANES))
+        parser.add_argument('--once', action='store_true', help="Run the ready tasks here, then exit")
+
+    def handle(self, *args, **options):
+        backend = get_task_backend()
+        if not backend.external_workers:
+            raise CommandError(
+                f"{settings.TASK_BACKEND} runs tasks in the process that queues them; "
+                "workers need api.tasks.backends.DatabaseTaskBackend."
+            )
+        if options['once']:
+            backend.requeue_expired()
+            count = run_worker(backend, options['lanes'], threading.Event(), settings.TASK_POLL_INTERVAL, once=True)
+            self.stdout.write(f"Ran {count} tasks.")
+            return
+
+        context = multiprocessing.get_context()
+        stop = context.Event()
+        # Setting a multiprocessing Event from a signal handler can deadlock with a wait
+        # on it in progress, so the handlers only note the request and the loop sets it
+        stopping = []
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda signum, frame: stopping.append(signum))
+
+        # Children must not share the parent's database connections
+        connections.close_all()
+        workers = [self._start(context, options['lanes'], stop) for _ in range(options['processes'])]
+        self.stdout.write(f"Started {len(workers)} task workers for lanes {', '.join(options['lanes'])}.")
+
+        while not stopping:
+            for i, worker in enumerate(workers):
+                if not worker.is_alive():
+                    self.stderr.write(f"Task worker {worker.pid} exited with {worker.exitcode}; restarting it.")
+                    connections.close_all()
+                    workers[i] = self._start(context, options['lanes'], stop)
+            requeued = backend.requeue_expired()
+            if requeued:
+                self.stdout.write(f"Queued {requeued} abandoned tasks again.")
+            backend.prune(timezone.now() - datetime.timedelta(days=settings.TASK_RETENTION_DAYS))
+            connections.close_all()
+            for _ in range(MAINTENANCE_INTERVAL):
+                if stopping:
+                    break
+                time.sleep(1)
+
+        stop.set()
+        self.stdout.write("Stopping: waiting for workers to finish their current task.")
+        for worker in workers:
+            worker.join()
+
+    def _start(self, context, lanes, stop):
+        worker = context.Process(
+            target=worker_process, args=(lanes, stop, settings.TASK_POLL_INTERVAL), name='task-worker', daemon=False,
+        )
+        worker.start()
+        return worker
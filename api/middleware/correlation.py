@@ -0,0 +1,49 @@
+import re
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from api.utils.logger import request_id
+
+# Accepted from clients and proxies as is; anything else gets a fresh ID
+_VALID_REQUEST_ID = re.compile(r'[A-Za-z0-9._:-]{1,128}')
+
+
+class RequestIDMiddleware:
+    """
+    Gives every request a correlation ID: the incoming X-Request-ID header when it is a
+    plausible ID, a new UUID otherwise. The ID is stamped on every log record written
+    while the request is handled, including in threads that inherit its context, and is
+    returned in the X-Request-ID response header.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id.reset(token)
+        response['X-Request-ID'] = request.request_id
+        return response
+
+    async def __acall__(self, request):
+        token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_id.reset(token)
+        response['X-Request-ID'] = request.request_id
+        return response
+
+    def _start(self, request):
+        incoming = request.headers.get('X-Request-ID', '')
+        request.request_id = incoming if _VALID_REQUEST_ID.fullmatch(incoming) else uuid.uuid4().hex
+        return request_id.set(request.request_id)
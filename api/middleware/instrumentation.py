@@ -0,0 +1,154 @@
+import contextvars
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from api.utils.logger import log_warning
+from api.utils.metrics import QUERY_COUNT_BUCKETS, registry
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', "Total time spent handling a request.", ['view'])
+REQUEST_DB_TIME = registry.histogram(
+    'http_request_db_seconds', "Time spent in SQL queries per request.", ['view'])
+REQUEST_RENDER_TIME = registry.histogram(
+    'http_request_render_seconds', "Time spent rendering (serializing) the response body.", ['view'])
+REQUEST_QUERIES = registry.histogram(
+    'http_request_queries', "SQL queries executed per request.", ['view'], buckets=QUERY_COUNT_BUCKETS)
+REQUESTS = registry.counter(
+    'http_requests_total', "Requests handled.", ['view', 'status'])
+QUERY_BUDGET_EXCEEDED = registry.counter(
+    'http_query_budget_exceeded_total', "Requests that ran more SQL queries than their view's budget.", ['view'])
+
+
+class QueryTimer:
+    """
+    Database execute wrapper that counts queries and accumulates their wall time.
+    """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+# The timer of the request being handled. A context variable rather than a per-connection
+# execute_wrapper, because async views run their queries on other threads (with their
+# own connections) that inherit the request's context.
+_current_timer = contextvars.ContextVar('request_query_timer', default=None)
+
+
+def _time_query(execute, sql, params, many, context):
+    timer = _current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _time_query)
+
+
+class RequestMetricsMiddleware:
+    """
+    Records per-view query count, DB time, render time and total latency for every
+    request and checks the query count against QUERY_BUDGETS.
+
+    Budgets are looked up as "<url name>:<METHOD>" first, then "<url name>".
+    The numbers are also attached to the response as `response.request_metrics` so the
+    test helpers in api.utils.query_budget can assert on them.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer, token, started = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_timer.reset(token)
+        return self._finish(request, response, timer, started)
+
+    async def __acall__(self, request):
+        timer, token, started = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_timer.reset(token)
+        return self._finish(request, response, timer, started)
+
+    def _start(self, request):
+        # Connections opened before this module was loaded missed connection_created
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(None, connection)
+        timer = QueryTimer()
+        request._render_started = request._render_finished = None
+        return timer, _current_timer.set(timer), time.perf_counter()
+
+    def _finish(self, request, response, timer, started):
+        total = time.perf_counter() - started
+        view = _view_name(request)
+        render = 0.0
+        if request._render_started is not None and request._render_finished is not None:
+            render = request._render_finished - request._render_started
+
+        REQUEST_LATENCY.observe(total, view=view)
+        REQUEST_DB_TIME.observe(timer.duration, view=view)
+        REQUEST_RENDER_TIME.observe(render, view=view)
+        REQUEST_QUERIES.observe(timer.count, view=view)
+        REQUESTS.inc(view=view, status=response.status_code)
+
+        budget = query_budget_for(view, request.method)
+        if budget is not None and timer.count > budget:
+            QUERY_BUDGET_EXCEEDED.inc(view=view)
+            log_warning("%s ran %s queries, budget is %s", view, timer.count, budget)
+
+        response.request_metrics = {
+            'view': view,
+            'method': request.method,
+            'queries': timer.count,
+            'db_time': timer.duration,
+            'render_time': render,
+            'total_time': total,
+        }
+        if settings.METRICS_RESPONSE_HEADERS:
+            response['X-Query-Count'] = str(timer.count)
+            response['Server-Timing'] = (
+                f"db;dur={timer.duration * 1000:.1f}, render;dur={render * 1000:.1f}, total;dur={total * 1000:.1f}"
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        request._render_started = time.perf_counter()
+        response.add_post_render_callback(lambda r: setattr(request, '_render_finished', time.perf_counter()))
+        return response
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match._func_path
+
+
+def query_budget_for(view, method):
+    budgets = settings.QUERY_BUDGETS
+    return budgets.get(f"{view}:{method}", budgets.get(view))
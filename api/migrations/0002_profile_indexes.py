@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='userprofile',
+            name='profile_geo_idx',
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(condition=models.Q(('latitude__isnull', False)), fields=['gender', 'looking_for', 'latitude', 'longitude'], name='profile_geo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(condition=models.Q(('birthday__isnull', False)), fields=['gender', 'looking_for', 'birthday'], name='profile_age_idx'),
+        ),
+    ]
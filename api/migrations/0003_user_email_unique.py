@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.db import migrations, models
+
+INDEX_NAME = 'auth_user_email_uniq'
+
+
+def create_email_index(apps, schema_editor):
+    """
+    Unique index on auth_user.email for the registration and login lookups. Blank
+    emails are left out (see HAS_EMAIL). On PostgreSQL it is built CONCURRENTLY, so
+    logins keep working while it builds on a large table. Django doesn't know about
+    the index, so on SQLite any later rebuild of auth_user (which is how SQLite alters
+    a table) drops it: hence the dependency on the last auth migration.
+    """
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    table = schema_editor.quote_name(User._meta.db_table)
+    duplicates = list(
+        User.objects.exclude(email='').values('email')
+        .annotate(count=models.Count('id')).filter(count__gt=1).values_list('email', flat=True)[:10]
+    )
+    if duplicates:
+        raise RuntimeError(
+            f"Cannot make emails unique, these are used by several users: {', '.join(duplicates)}. "
+            "Merge or change those accounts, then migrate again."
+        )
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(
+        f"CREATE UNIQUE INDEX {concurrently}IF NOT EXISTS {schema_editor.quote_name(INDEX_NAME)} "
+        f"ON {table} ({schema_editor.quote_name('email')}) WHERE NOT ({schema_editor.quote_name('email')} = '')"
+    )
+
+
+def drop_email_index(apps, schema_editor):
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(f"DROP INDEX {concurrently}IF EXISTS {schema_editor.quote_name(INDEX_NAME)}")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0002_profile_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_index, drop_email_index),
+    ]
@@ -1 +1,6 @@
-from .user_profile import UserProfile, User 
+from .user_profile import HAS_EMAIL, UserProfile, User
+from .zipcode import ZipcodeLocation
+from .picture import ProfilePicture
+from .match import Match, MatchFeed, MatchFeedEntry, SeenSet, Swipe
+from .message import Conversation, ConversationMember, Message, ArchivedMessage
+from .task import QueuedTask
@@ -0,0 +1,114 @@
+from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .user_profile import MATCH_FIELDS, UserProfile
+
+class MatchFeed(models.Model):
+    """
+    Per-user state of the precomputed match feed. `version` is bumped on every
+    invalidation so a rebuild that raced with a profile change stays stale.
+    """
+    profile = models.OneToOneField(UserProfile, on_delete=models.CASCADE, related_name="match_feed")
+    version = models.PositiveIntegerField(default=0)
+    is_stale = models.BooleanField(default=True)
+    stale_since = models.DateTimeField(null=True, blank=True)
+    built_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The refresh job pulls the oldest stale feeds first
+            models.Index(fields=['is_stale', 'stale_since'], name='match_feed_stale_idx'),
+        ]
+
+    def __str__(self):
+        return f"Match feed for {self.profile_id}"
+
+class MatchFeedEntry(models.Model):
+    """
+    One ranked candidate in a user's match feed. Reads are a range scan on (owner, rank).
+    """
+    owner = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="feed_entries")
+    candidate = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="+")  # Indexed for invalidation
+    rank = models.PositiveIntegerField()
+    score = models.FloatField()
+    distance = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'rank'], name='match_feed_entry_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id} -> {self.candidate_id} (#{self.rank})"
+
+class Swipe(models.Model):
+    """
+    A user's latest like or pass on another profile; swiping the same profile again
+    replaces the decision. Written in batches by api.services.swipe_service.
+    """
+    swiper = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="swipes")
+    target = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="+")
+    liked = models.BooleanField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            # Also the index of the mutual-like check: "did target like swiper?" is a
+            # lookup of (swiper=target, target=swiper)
+            models.UniqueConstraint(fields=['swiper', 'target'], name='swipe_pair_uniq'),
+        ]
+        indexes = [
+            # Removing a deleted profile's incoming swipes
+            models.Index(fields=['target'], name='swipe_target_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.swiper_id} {'likes' if self.liked else 'passes'} {self.target_id}"
+
+class Match(models.Model):
+    """
+    A mutual like, stored once per pair with profile_a_id < profile_b_id.
+    """
+    profile_a = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="+")
+    profile_b = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="+")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['profile_a', 'profile_b'], name='match_pair_uniq'),
+            models.CheckConstraint(condition=models.Q(profile_a__lt=models.F('profile_b')), name='match_pair_ordered'),
+        ]
+        indexes = [
+            # A profile's matches: profile_a is covered by the unique constraint
+            models.Index(fields=['profile_b'], name='match_profile_b_idx'),
+        ]
+
+    def __str__(self):
+        return f"Match {self.profile_a_id} <-> {self.profile_b_id}"
+
+class SeenSet(models.Model):
+    """
+    The profiles a user has swiped, as a serialized api.utils.bloom.ScalableBloomFilter.
+    Maintained by api.services.seen_service on every swipe batch; discovery filters
+    candidates through it instead of reading the user's Swipe rows.
+    """
+    profile = models.OneToOneField(UserProfile, on_delete=models.CASCADE, primary_key=True, related_name="seen_set")
+    bloom = models.BinaryField(default=b'')  # Empty until first built from the swipe history
+
+    def __str__(self):
+        return f"Seen set for {self.profile_id}"
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_match_feeds_on_change(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """
+    Marks the feeds affected by a profile change as stale, then resets the change tracking.
+    """
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & set(MATCH_FIELDS):
+        return
+    if created or instance.match_fields_changed():
+        from api.services.match_service import invalidate_match_feeds
+        invalidate_match_feeds(instance, created=created)
+    instance.snapshot_match_fields()
@@ -0,0 +1,89 @@
+from django.db import models
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+class Conversation(models.Model):
+    """
+    A direct conversation between two users. `pair_key` ("<lower id>:<higher id>") makes
+    the pair unique so opening a conversation is a single get_or_create.
+
+    The last message is denormalized here when each batch of messages is saved, so
+    inbox rows never have to look at the message tables.
+    """
+    pair_key = models.CharField(max_length=41, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_message_id = models.BigIntegerField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=200, blank=True)
+    message_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Conversation {self.pk} ({self.pair_key})"
+
+class ConversationMember(models.Model):
+    """
+    One user's side of a conversation: their unread counter and a copy of the
+    conversation's latest activity, so a user's inbox is a range scan of
+    conversation_member_inbox_idx.
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name="members")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="conversation_memberships")
+    joined_at = models.DateTimeField(auto_now_add=True)
+    last_activity_at = models.DateTimeField(default=timezone.now)  # Last message, or when the conversation opened
+    unread_count = models.PositiveIntegerField(default=0)
+    last_read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='conversation_member_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-last_activity_at', '-conversation'], name='conversation_member_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in {self.conversation_id}"
+
+class AbstractMessage(models.Model):
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name="+")
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    body = models.TextField()
+    client_id = models.CharField(max_length=64, blank=True)  # Sender's own ID, echoed in the ack
+    created_at = models.DateTimeField(default=timezone.now)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"Message {self.pk} in {self.conversation_id}"
+
+class Message(AbstractMessage):
+    """
+    Recent messages. The table only grows at the tail; history pages are keyset range
+    scans of message_history_idx. Messages older than MESSAGING_ARCHIVE_AFTER_DAYS are
+    moved to ArchivedMessage by the archive_messages command, which keeps this table
+    and its indexes sized to the active window.
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name="messages")
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name="sent_messages")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['conversation', '-created_at', '-id'], name='message_history_idx'),
+            # archive_messages: the oldest messages across all conversations, in batches
+            models.Index(fields=['created_at', 'id'], name='message_archive_scan_idx'),
+        ]
+
+class ArchivedMessage(AbstractMessage):
+    """
+    Messages moved out of Message, keeping their original IDs so history cursors carry
+    on across the two tables.
+    """
+    id = models.BigIntegerField(primary_key=True)
+
+    class Meta:
+        db_table = 'api_message_archive'
+        indexes = [
+            models.Index(fields=['conversation', '-created_at', '-id'], name='message_archive_history_idx'),
+        ]
@@ -0,0 +1,29 @@
+from django.db import models
+
+class ProfilePicture(models.Model):
+    """
+    One distinct uploaded picture, keyed by the SHA-256 of the uploaded bytes, so
+    identical uploads share the stored original and its resized variants. The variants
+    live at paths derived from the hash (see api.services.picture_service).
+    """
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+
+    content_hash = models.CharField(max_length=64, primary_key=True)
+    status = models.CharField(
+        max_length=10, choices=[(PENDING, 'Pending'), (READY, 'Ready'), (FAILED, 'Failed')], default=PENDING,
+    )
+    width = models.PositiveIntegerField(null=True, blank=True)  # Of the stored original, after EXIF rotation
+    height = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # process_profile_pictures picks up uploads whose background job never finished
+            models.Index(fields=['status', 'created_at'], name='profile_picture_status_idx'),
+        ]
+
+    def __str__(self):
+        return self.content_hash
@@ -0,0 +1,48 @@
+from django.db import models
+from django.utils import timezone
+
+class QueuedTask(models.Model):
+    """
+    One call of a background task (see api.tasks): the function's dotted name and its
+    JSON arguments. Workers claim ready rows highest priority lane first, and a claim
+    is a lease: a row still RUNNING after `locked_until` belonged to a worker that died
+    and is queued again. Finished rows are kept for TASK_RETENTION_DAYS so their
+    idempotency keys keep deduplicating.
+
+    The in-process backend uses unsaved instances as its jobs.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    lane = models.CharField(max_length=20)
+    priority = models.PositiveSmallIntegerField()  # Position of the lane in TASK_LANES; lower runs first
+    idempotency_key = models.CharField(max_length=200, null=True, blank=True, unique=True)
+    status = models.CharField(
+        max_length=10,
+        choices=[(QUEUED, 'Queued'), (RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed')],
+        default=QUEUED,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField()
+    run_at = models.DateTimeField(default=timezone.now)  # Not claimed before; pushed back between retries
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Claims: the ready tasks of the worker's lanes, best lane and oldest first
+            models.Index(fields=['priority', 'run_at'], condition=models.Q(status='queued'), name='task_ready_idx'),
+            # Leases of workers that died
+            models.Index(fields=['locked_until'], condition=models.Q(status='running'), name='task_lease_idx'),
+            models.Index(fields=['finished_at'], condition=models.Q(finished_at__isnull=False), name='task_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status}, attempt {self.attempts}/{self.max_attempts})"
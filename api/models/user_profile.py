@@ -1,5 +1,20 @@
+import datetime
+
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
+from .zipcode import ZipcodeLocation
+
+# Added to email lookups on User. The unique index on auth_user.email leaves blank
+# emails out (accounts such as admins may have none); PostgreSQL works out that an
+# email lookup can use it, SQLite only when the query repeats the index's condition.
+HAS_EMAIL = ~models.Q(email='')
+
+# Fields that feed candidate discovery and ranking; changing one invalidates match feeds
+MATCH_FIELDS = (
+    'gender', 'looking_for', 'zipcode', 'location', 'latitude', 'longitude',
+    'distance', 'birthday', 'age', 'bio',
+)
 
 class UserProfile(models.Model):
     """
@@ -7,27 +22,156 @@ class UserProfile(models.Model):
     """
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
     bio = models.TextField(blank=True, null=True)
-    age = models.PositiveIntegerField(null=True, blank=True)
+    age = models.PositiveIntegerField(null=True, blank=True)  # As given; read current_age, which follows the birthday
     gender = models.CharField(max_length=10, blank=True)  # User's gender
     location = models.CharField(max_length=255, blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    # Processed picture shown on the profile, and a newer upload still being processed
+    picture = models.ForeignKey('ProfilePicture', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    pending_picture = models.ForeignKey('ProfilePicture', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     role = models.CharField(max_length=20, choices=[('admin', 'Admin'), ('user', 'User')], default='user')
 
     # New fields based on the registration form
     zipcode = models.CharField(max_length=10, blank=True, null=True)  # User's zipcode
     birthday = models.DateField(null=True, blank=True)  # User's birthday
     looking_for = models.CharField(max_length=10, choices=[('male', 'Male'), ('female', 'Female')], blank=True)  # Who the user is looking for
-    distance = models.PositiveIntegerField(null=True, blank=True)  # How far the user is willing to drive (in miles or km)
-    
+    distance = models.PositiveIntegerField(null=True, blank=True)  # How far the user is willing to drive (in miles)
+
+    # Coordinates geocoded from the zipcode, used for candidate discovery
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+
+    # Changed by every write of the profile's public fields: the ETag and Last-Modified
+    # of the profile, and the version an If-Match update must name
+    version = models.PositiveIntegerField(default=1, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Equality filters first, then the latitude range of the bounding box prefilter.
+            # Partial: profiles without coordinates are never discovered.
+            models.Index(
+                fields=['gender', 'looking_for', 'latitude', 'longitude'], name='profile_geo_idx',
+                condition=models.Q(latitude__isnull=False),
+            ),
+            # Age-range filters (birthday bounds) under the same equality filters; profiles
+            # without a birthday never match one
+            models.Index(
+                fields=['gender', 'looking_for', 'birthday'], name='profile_age_idx',
+                condition=models.Q(birthday__isnull=False),
+            ),
+            # Profile listing: equality filters, then the keyset order; birthday is carried
+            # in the index (PostgreSQL INCLUDE) so age-range filters don't visit the heap
+            models.Index(fields=['gender', 'looking_for', '-id'], include=['birthday'], name='profile_list_idx'),
+            models.Index(fields=['looking_for', '-id'], include=['birthday'], name='profile_list_looking_for_idx'),
+        ]
+
     def __str__(self):
         return self.user.username
 
+    @property
+    def current_age(self):
+        """
+        Age in whole years as of today, worked out from the birthday when reading, so it
+        never goes stale; the stored `age` for profiles without a birthday.
+        """
+        if not self.birthday:
+            return self.age
+        birthday = self._meta.get_field('birthday').to_python(self.birthday)
+        today = datetime.date.today()
+        return today.year - birthday.year - ((today.month, today.day) < (birthday.month, birthday.day))
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version', 'updated_at'}
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def new_version():
+        """
+        Field values for queryset .update() calls that change what the API shows, so
+        they bump the version like save() does.
+        """
+        return {'version': models.F('version') + 1, 'updated_at': timezone.now()}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored zipcode so saves only geocode when it actually changes
+        instance._geocoded_zipcode = instance.zipcode if 'zipcode' in field_names else None
+        instance.snapshot_match_fields()
+        return instance
+
+    def snapshot_match_fields(self):
+        """
+        Records the loaded values of MATCH_FIELDS so a save can tell whether matching changed.
+        """
+        deferred = self.get_deferred_fields()
+        self._loaded_match_values = {f: getattr(self, f) for f in MATCH_FIELDS if f not in deferred}
+
+    def match_fields_changed(self):
+        """
+        True when any field that affects candidate discovery or ranking differs from the
+        values this instance was loaded with (always True for unsaved instances).
+        """
+        loaded = getattr(self, '_loaded_match_values', None)
+        if loaded is None:
+            return True
+        return any(getattr(self, f) != value for f, value in loaded.items())
+
 # Signal to automatically create or save UserProfile when a User is created or updated
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+@receiver(pre_save, sender=UserProfile)
+def geocode_user_profile(sender, instance, update_fields=None, **kwargs):
+    """
+    Resolves the profile's zipcode to coordinates when the zipcode is new or changed.
+    Profiles saved before their zipcode was known are backfilled by `load_zipcodes`.
+    """
+    if update_fields is not None and 'zipcode' not in update_fields:
+        return
+    if 'zipcode' in instance.get_deferred_fields():
+        return
+    if instance.zipcode == getattr(instance, '_geocoded_zipcode', None):
+        return
+
+    location = ZipcodeLocation.objects.filter(pk=instance.zipcode).first() if instance.zipcode else None
+    instance.latitude = location.latitude if location else None
+    instance.longitude = location.longitude if location else None
+    instance._geocoded_zipcode = instance.zipcode
+
 @receiver(post_save, sender=User)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
-    if created:
-        UserProfile.objects.create(user=instance)
-    instance.profile.save()
+def create_or_update_user_profile(sender, instance, created, raw=False, **kwargs):
+    """
+    Creates the profile of a new user in a single insert. Callers that know the profile
+    fields up front (register_user) stage them on `instance.profile_data` before saving.
+    """
+    if created and not raw:
+        UserProfile.objects.create(user=instance, **getattr(instance, 'profile_data', {}))
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_user_profile(sender, instance, **kwargs):
+    """
+    Drops the cached serialized profile once the write commits. Covers update_user_profile,
+    UserProfileSerializer.update and any other save.
+    """
+    from api.services.user_profile_service import invalidate_user_profile_cache
+    transaction.on_commit(lambda: invalidate_user_profile_cache(instance.pk))
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user_profile_for_user(sender, instance, created, update_fields=None, **kwargs):
+    """
+    The profile payload embeds username and email, so user saves invalidate it too and
+    give the profile a new version. Saves of other fields only (e.g. the password) don't.
+    """
+    if created or (update_fields is not None and not {'username', 'email'} & set(update_fields)):
+        return
+    from api.services.user_profile_service import invalidate_user_profile_cache
+    profile_ids = list(UserProfile.objects.filter(user_id=instance.pk).values_list('pk', flat=True))
+    UserProfile.objects.filter(pk__in=profile_ids).update(**UserProfile.new_version())
+    transaction.on_commit(lambda: [invalidate_user_profile_cache(pk) for pk in profile_ids])
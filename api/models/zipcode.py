@@ -0,0 +1,13 @@
+from django.db import models
+
+class ZipcodeLocation(models.Model):
+    """
+    Centroid coordinates for a zipcode. Profiles are geocoded against this table once,
+    when their zipcode is set or changed, instead of on every match query.
+    """
+    zipcode = models.CharField(max_length=10, primary_key=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    def __str__(self):
+        return self.zipcode
@@ -9,3 +9,34 @@ class IsAuthenticatedOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         return request.user and request.user.is_authenticated
+
+class HasRoleClaim(permissions.BasePermission):
+    """
+    Allows access to authenticated users whose token `role` claim is in `allowed_roles`.
+    Reads only the signed claims, so it needs no database access. Subclass and set
+    `allowed_roles`, or use IsAdminRole.
+    """
+    allowed_roles = ()
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and getattr(user, 'role', None) in self.allowed_roles)
+
+class IsAdminRole(HasRoleClaim):
+    allowed_roles = ('admin',)
+
+class IsProfileOwnerOrReadOnly(permissions.BasePermission):
+    """
+    Allows writes to /profiles/<pk>/ only to the user whose token `profile_id` claim
+    matches `pk`, or to admins. Reads and profile creation stay open.
+    """
+    def has_permission(self, request, view):
+        pk = view.kwargs.get('pk')
+        if request.method in permissions.SAFE_METHODS or pk is None:
+            return True
+        user = request.user
+        if not (user and user.is_authenticated):
+            return False
+        if getattr(user, 'role', None) == 'admin':
+            return True
+        return str(getattr(user, 'profile_id', None)) == str(pk)
@@ -0,0 +1,185 @@
+"""
+WebSocket endpoint for realtime messaging, served by TrueDate.asgi next to the Django
+HTTP app. Clients connect to /ws/messages/?token=<access token> and exchange JSON frames:
+
+    -> {"type": "message.send", "conversation": 7, "body": "hi", "client_id": "c1"}
+    <- {"type": "message.ack", "client_id": "c1", "id": 42, "created_at": "..."}
+    <- {"type": "message.new", "id": 42, "conversation": 7, "sender": 3, "body": "hi", ...}
+    -> {"type": "message.delivered", "conversation": 7, "id": 42}
+    <- {"type": "message.delivered", "conversation": 7, "id": 42, "user": 5}
+    <- {"type": "error", "error": "...", "client_id": "c1"}
+
+The ack is sent once the message has been persisted by the batched MessageWriter, and
+new messages and receipts are fanned out to the other members' channels.
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from api.authentication.jwt_claims import ClaimsJWTAuthentication
+from api.realtime.persistence import get_membership_loader, get_message_writer
+from api.realtime.pubsub import get_pubsub, user_channel
+from api.utils.logger import log_error
+
+WEBSOCKET_PATH = '/ws/messages/'
+CLOSE_UNAUTHORIZED = 4401
+MAX_IN_FLIGHT = 32  # Unacknowledged sends per connection before reads pause
+
+
+async def websocket_application(scope, receive, send):
+    if scope['path'].rstrip('/') != WEBSOCKET_PATH.rstrip('/'):
+        await receive()  # websocket.connect
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+    await ChatConnection(scope, receive, send).run()
+
+
+def authenticate_scope(scope):
+    """
+    Returns the claims user for the ?token= query parameter, or None.
+    """
+    token = parse_qs(scope.get('query_string', b'').decode()).get('token')
+    if not token:
+        return None
+    authentication = ClaimsJWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(token[0]))
+    except (InvalidToken, TokenError):
+        return None
+
+
+class ChatConnection:
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self.receive = receive
+        self._send = send
+        self.user = None
+        self.user_id = None
+        self.pubsub = get_pubsub()
+        self.writer = get_message_writer()
+        self.memberships = get_membership_loader()
+        self._send_lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+        self._members = {}  # conversation ID -> task resolving to its member IDs
+        self._tasks = set()
+
+    async def run(self):
+        message = await self.receive()
+        if message['type'] != 'websocket.connect':
+            return
+
+        # Token checks are signature and claims only (plus the revocation cache when enabled)
+        self.user = await sync_to_async(authenticate_scope)(self.scope)
+        if self.user is None:
+            await self._send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+            return
+        self.user_id = int(self.user.id)  # The claim may be serialized as a string
+        await self._send({'type': 'websocket.accept'})
+
+        subscription = await self.pubsub.subscribe(user_channel(self.user_id))
+        pump = asyncio.create_task(self._pump(subscription))
+        try:
+            while True:
+                message = await self.receive()
+                if message['type'] == 'websocket.disconnect':
+                    break
+                if message['type'] == 'websocket.receive':
+                    await self._in_flight.acquire()
+                    task = asyncio.create_task(self._handle(message.get('text') or message.get('bytes')))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._task_done)
+        finally:
+            pump.cancel()
+            await subscription.close()
+            for task in list(self._tasks):
+                task.cancel()
+
+    async def send_json(self, data):
+        async with self._send_lock:
+            await self._send({'type': 'websocket.send', 'text': json.dumps(data)})
+
+    def _task_done(self, task):
+        self._tasks.discard(task)
+        self._in_flight.release()
+
+    async def _pump(self, subscription):
+        async for event in subscription:
+            await self.send_json(event)
+
+    async def _handle(self, raw):
+        try:
+            frame = json.loads(raw)
+            kind = frame.get('type')
+            if kind == 'message.send':
+                await self._handle_send(frame)
+            elif kind == 'message.delivered':
+                await self._handle_delivered(frame)
+            else:
+                await self.send_json({'type': 'error', 'error': "Unknown frame type."})
+        except (ValueError, TypeError, AttributeError):
+            await self.send_json({'type': 'error', 'error': "Malformed frame."})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log_error("Error handling realtime frame from user %s: %s", self.user_id, e)
+            await self.send_json({'type': 'error', 'error': "An error occurred while handling the frame."})
+
+    async def _handle_send(self, frame):
+        client_id = str(frame.get('client_id', ''))[:64]
+        body = frame.get('body')
+        if not isinstance(body, str) or not body.strip() or len(body) > settings.MESSAGING_MAX_BODY_LENGTH:
+            await self.send_json({'type': 'error', 'error': "Invalid message body.", 'client_id': client_id})
+            return
+
+        conversation_id = int(frame.get('conversation'))
+        members = await self._conversation_members(conversation_id)
+        if self.user_id not in members:
+            await self.send_json({'type': 'error', 'error': "Conversation not found.", 'client_id': client_id})
+            return
+
+        message = await self.writer.write(conversation_id, self.user_id, body, client_id)
+        created_at = message.created_at.isoformat()
+        await self.send_json({'type': 'message.ack', 'client_id': client_id, 'id': message.pk, 'created_at': created_at})
+
+        await self.pubsub.publish_many([user_channel(member) for member in members if member != self.user_id], {
+            'type': 'message.new',
+            'id': message.pk,
+            'conversation': conversation_id,
+            'sender': self.user_id,
+            'body': body,
+            'created_at': created_at,
+        })
+
+    async def _handle_delivered(self, frame):
+        conversation_id = int(frame.get('conversation'))
+        message_id = int(frame.get('id'))
+        members = await self._conversation_members(conversation_id)
+        if self.user_id not in members:
+            await self.send_json({'type': 'error', 'error': "Conversation not found."})
+            return
+
+        self.writer.mark_delivered(conversation_id, message_id)
+        await self.pubsub.publish_many([user_channel(member) for member in members if member != self.user_id], {
+            'type': 'message.delivered',
+            'conversation': conversation_id,
+            'id': message_id,
+            'user': self.user_id,
+        })
+
+    async def _conversation_members(self, conversation_id):
+        # Membership never changes for a direct conversation, so one lookup per connection;
+        # frames that arrive while it runs wait on the same task
+        lookup = self._members.get(conversation_id)
+        if lookup is None:
+            lookup = self._members[conversation_id] = asyncio.ensure_future(self.memberships.load(conversation_id))
+        try:
+            members = await lookup
+        except Exception:
+            self._members.pop(conversation_id, None)
+            raise
+        if not members:
+            self._members.pop(conversation_id, None)
+        return members
@@ -0,0 +1,138 @@
+"""
+Batched database access for the realtime layer.
+
+Connections hand messages to the process-wide MessageWriter and await the saved row.
+The writer collects them and inserts each batch with one bulk_create, flushing when
+MESSAGING_BATCH_SIZE messages are waiting or MESSAGING_FLUSH_INTERVAL seconds after the
+first one arrived. Delivery receipts are batched into one UPDATE the same way, and
+MembershipLoader answers the membership lookups of all connections that ask within the
+same event loop tick with one query.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from api.models import Message
+from api.services.message_service import get_members_by_conversation, mark_messages_delivered, save_messages
+
+
+class MessageWriter:
+    def __init__(self, batch_size=None, flush_interval=None):
+        self.batch_size = batch_size or settings.MESSAGING_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.MESSAGING_FLUSH_INTERVAL
+        self._pending = []  # (Message, future)
+        self._delivered = set()
+        self._has_work = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task = None
+
+    async def write(self, conversation_id, sender_id, body, client_id=''):
+        """
+        Queues a message and returns it once its batch has been inserted.
+        """
+        future = asyncio.get_running_loop().create_future()
+        message = Message(conversation_id=conversation_id, sender_id=sender_id, body=body, client_id=client_id)
+        self._pending.append((message, future))
+        self._wake(len(self._pending) >= self.batch_size)
+        return await future
+
+    def mark_delivered(self, conversation_id, message_id):
+        """
+        Queues a delivery receipt; it is written with the next flush.
+        """
+        self._delivered.add((conversation_id, message_id))
+        self._wake(len(self._delivered) >= self.batch_size)
+
+    async def flush(self):
+        delivered, self._delivered = self._delivered, set()
+
+        while self._pending:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            try:
+                saved = await sync_to_async(save_messages)([message for message, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for message, (_, future) in zip(saved, batch):
+                    if not future.done():
+                        future.set_result(message)
+
+        if delivered:
+            await sync_to_async(mark_messages_delivered)(delivered)
+
+    def _wake(self, full):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        self._has_work.set()
+        if full:
+            self._full.set()
+
+    async def _run(self):
+        while True:
+            await self._has_work.wait()
+            if not self._full.is_set():
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._has_work.clear()
+            self._full.clear()
+            await self.flush()
+
+
+class MembershipLoader:
+    def __init__(self):
+        self._waiting = {}  # conversation ID -> future
+        self._scheduled = False
+
+    async def load(self, conversation_id):
+        """
+        Returns the member IDs of a conversation (empty for unknown conversations).
+        """
+        future = self._waiting.get(conversation_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._waiting[conversation_id] = loop.create_future()
+            if not self._scheduled:
+                self._scheduled = True
+                loop.call_soon(lambda: loop.create_task(self._fetch()))
+        return await future
+
+    async def _fetch(self):
+        batch, self._waiting = self._waiting, {}
+        self._scheduled = False
+        try:
+            members = await sync_to_async(get_members_by_conversation)(batch.keys())
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for conversation_id, future in batch.items():
+            if not future.done():
+                future.set_result(members.get(conversation_id, set()))
+
+
+_writers = {}
+_loaders = {}
+
+
+def get_message_writer():
+    """
+    Returns the writer for the running event loop (asyncio primitives are loop bound).
+    """
+    loop = asyncio.get_running_loop()
+    writer = _writers.get(loop)
+    if writer is None:
+        writer = _writers[loop] = MessageWriter()
+    return writer
+
+
+def get_membership_loader():
+    loop = asyncio.get_running_loop()
+    loader = _loaders.get(loop)
+    if loader is None:
+        loader = _loaders[loop] = MembershipLoader()
+    return loader
@@ -0,0 +1,146 @@
+"""
+Fan-out layer for realtime events. Connections subscribe to per-user channels and the
+sender's connection publishes to the recipients' channels.
+
+InMemoryPubSub delivers within one process. RedisPubSub relays the same channels
+through Redis (or any server speaking its pub/sub protocol) so several ASGI processes
+can share them. MESSAGING_PUBSUB_BACKEND selects the backend.
+"""
+import asyncio
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+class Subscription:
+    """
+    Async iterator over the events published to one channel.
+    """
+    def __init__(self, pubsub, channel, queue):
+        self.pubsub = pubsub
+        self.channel = channel
+        self.queue = queue
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.queue.get()
+
+    async def close(self):
+        await self.pubsub.unsubscribe(self)
+
+
+class BasePubSub:
+    async def subscribe(self, channel):
+        raise NotImplementedError
+
+    async def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    async def publish(self, channel, event):
+        raise NotImplementedError
+
+    async def publish_many(self, channels, event):
+        for channel in channels:
+            await self.publish(channel, event)
+
+
+class InMemoryPubSub(BasePubSub):
+    """
+    Process-local pub/sub. Each subscription has a bounded queue; when a slow consumer
+    falls MESSAGING_SUBSCRIBER_QUEUE events behind, its oldest event is dropped (messages
+    are persisted, so clients recover them from history).
+    """
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+
+    async def subscribe(self, channel):
+        queue = asyncio.Queue(maxsize=settings.MESSAGING_SUBSCRIBER_QUEUE)
+        self._subscribers[channel].add(queue)
+        return Subscription(self, channel, queue)
+
+    async def unsubscribe(self, subscription):
+        queues = self._subscribers.get(subscription.channel)
+        if queues is not None:
+            queues.discard(subscription.queue)
+            if not queues:
+                del self._subscribers[subscription.channel]
+
+    async def publish(self, channel, event):
+        self.deliver(channel, event)
+
+    def has_subscribers(self, channel):
+        return channel in self._subscribers
+
+    def deliver(self, channel, event):
+        for queue in self._subscribers.get(channel, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+
+class RedisPubSub(BasePubSub):
+    """
+    Pub/sub through a Redis server at MESSAGING_REDIS_URL. One shared Redis subscription
+    per process listens to the channels that have local subscribers and hands events to
+    an InMemoryPubSub for dispatch. Requires the `redis` package.
+    """
+    def __init__(self):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise ImproperlyConfigured("RedisPubSub requires the 'redis' package.")
+        self._redis = redis.Redis.from_url(settings.MESSAGING_REDIS_URL)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._local = InMemoryPubSub()
+        self._listener = None
+
+    async def subscribe(self, channel):
+        if not self._local.has_subscribers(channel):
+            await self._pubsub.subscribe(channel)
+        subscription = await self._local.subscribe(channel)
+        subscription.pubsub = self
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+        return subscription
+
+    async def unsubscribe(self, subscription):
+        await self._local.unsubscribe(subscription)
+        if not self._local.has_subscribers(subscription.channel):
+            await self._pubsub.unsubscribe(subscription.channel)
+
+    async def publish(self, channel, event):
+        await self._redis.publish(channel, json.dumps(event))
+
+    async def _listen(self):
+        while True:
+            if not self._pubsub.subscribed:
+                await asyncio.sleep(0.05)
+                continue
+            message = await self._pubsub.get_message(timeout=1.0)
+            if message is not None:
+                channel = message['channel']
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                self._local.deliver(channel, json.loads(message['data']))
+
+
+_pubsub = None
+
+
+def get_pubsub():
+    """
+    Returns the process-wide backend named by MESSAGING_PUBSUB_BACKEND.
+    """
+    global _pubsub
+    if _pubsub is None:
+        _pubsub = import_string(settings.MESSAGING_PUBSUB_BACKEND)()
+    return _pubsub
@@ -1,9 +1,17 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
-from api.views.auth_view import EmailLoginView, RegisterView  # Import the views
+from api.views.auth_view import (  # Import the views
+    AsyncEmailLoginView, AsyncRegisterView, BulkRegisterView, EmailLoginView, RegisterView,
+)
+
+# ASGI deployments serve the async variants (see ASYNC_VIEWS)
+LoginView = AsyncEmailLoginView if settings.ASYNC_VIEWS else EmailLoginView
+RegistrationView = AsyncRegisterView if settings.ASYNC_VIEWS else RegisterView
 
 urlpatterns = [
-    path('login/', EmailLoginView.as_view(), name='token_obtain_pair'),  # Custom JWT login
-    path('register/', RegisterView.as_view(), name='register'),  # Registration endpoint
+    path('login/', LoginView.as_view(), name='token_obtain_pair'),  # Custom JWT login
+    path('register/', RegistrationView.as_view(), name='register'),  # Registration endpoint
+    path('register/bulk/', BulkRegisterView.as_view(), name='register-bulk'),  # Admin batch registration
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),  # Refresh JWT token (optional)
 ]
@@ -0,0 +1,8 @@
+from django.urls import path
+from api.views.match_view import MatchCandidateViewSet, MatchFeedViewSet, SwipeViewSet
+
+urlpatterns = [
+    path('candidates/', MatchCandidateViewSet.as_view({'get': 'list'}), name='match-candidates'),
+    path('feed/', MatchFeedViewSet.as_view({'get': 'list'}), name='match-feed'),
+    path('swipes/', SwipeViewSet.as_view({'post': 'create'}), name='match-swipes'),
+]
@@ -0,0 +1,8 @@
+from django.urls import path
+from api.views.message_view import ConversationViewSet
+
+urlpatterns = [
+    path('conversations/', ConversationViewSet.as_view({'get': 'list', 'post': 'create'}), name='conversation-list'),
+    path('conversations/<int:pk>/messages/', ConversationViewSet.as_view({'get': 'messages'}), name='conversation-messages'),
+    path('conversations/<int:pk>/read/', ConversationViewSet.as_view({'post': 'read'}), name='conversation-read'),
+]
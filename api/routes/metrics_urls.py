@@ -0,0 +1,6 @@
+from django.urls import path
+from api.views.metrics_view import metrics_view
+
+urlpatterns = [
+    path('', metrics_view, name='metrics'),
+]
@@ -1,7 +1,13 @@
+from django.conf import settings
 from django.urls import path
-from api.views.user_profile_view import UserProfileViewSet
+from api.views.user_profile_view import AsyncUserProfileViewSet, UserProfileViewSet
+
+# ASGI deployments serve the async variant (see ASYNC_VIEWS)
+ProfileViewSet = AsyncUserProfileViewSet if settings.ASYNC_VIEWS else UserProfileViewSet
 
 urlpatterns = [
-    path('profiles/', UserProfileViewSet.as_view({'get': 'list', 'post': 'create'}), name='userprofile-list'),
-    path('profiles/<int:pk>/', UserProfileViewSet.as_view({'get': 'retrieve', 'put': 'update'}), name='userprofile-detail'),
+    path('profiles/', ProfileViewSet.as_view({'get': 'list', 'post': 'create'}), name='userprofile-list'),
+    path('profiles/batch/', ProfileViewSet.as_view({'get': 'batch'}), name='userprofile-batch'),  # ?ids=1,2,3&fields=...
+    path('profiles/<int:pk>/', ProfileViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update'}), name='userprofile-detail'),
+    path('profiles/<int:pk>/picture/', ProfileViewSet.as_view({'post': 'picture'}), name='userprofile-picture'),
 ]
@@ -1,8 +1,6 @@
-from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth.models import User
 from rest_framework import serializers
-from django.contrib.auth import authenticate
-from rest_framework.exceptions import AuthenticationFailed
+from api.services.auth_service import authenticate_by_email
+from api.serializers.custom_token_serializer import CustomTokenObtainPairSerializer
 
 class UserRegistrationSerializer(serializers.Serializer):
     name = serializers.CharField(required=True)
@@ -15,35 +13,29 @@ class UserRegistrationSerializer(serializers.Serializer):
     birthday = serializers.DateField(required=True)
     distance = serializers.IntegerField(required=True)
 
-class EmailTokenObtainPairSerializer(serializers.Serializer):
+class EmailLoginSerializer(serializers.Serializer):
+    """
+    Validates the login fields only; the async login view checks the credentials itself.
+    """
     email = serializers.EmailField(required=True)
     password = serializers.CharField(required=True, write_only=True)
 
+class EmailTokenObtainPairSerializer(EmailLoginSerializer):
     def validate(self, attrs):
         email = attrs.get('email')
         password = attrs.get('password')
 
-        # Try to find the user by email
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            raise AuthenticationFailed({
-                "email": ["No user found with this email address."]
-            })
+        # One email lookup, then hash verification on the bounded hashing pool
+        user = authenticate_by_email(email, password)
+        return self.tokens_for_user(user)
 
-        # Authenticate the user using the username and password
-        user = authenticate(username=user.username, password=password)
-
-        if user is None:
-            raise AuthenticationFailed({
-                "password": ["Incorrect password."]
-            })
-
-        # Create token manually
-        refresh = RefreshToken.for_user(user)
+    @staticmethod
+    def tokens_for_user(user):
+        # Create the token with the role/profile claims ClaimsJWTAuthentication relies on
+        refresh = CustomTokenObtainPairSerializer.get_token(user)
 
         # Return the refresh and access tokens
         return {
             'refresh': str(refresh),
             'access': str(refresh.access_token),
-        }
\ No newline at end of file
+        }
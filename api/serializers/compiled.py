@@ -0,0 +1,129 @@
+"""
+Precompiled read-only serialization.
+
+`Serializer.data` rebuilds the representation field by field: every instance goes
+through get_attribute, the source-attribute walk, a SkipField check and to_representation
+on each field, plus a ReturnDict per object. For read-only responses that work only
+depends on the serializer class, so CompiledReadMixin resolves it once per class into a
+flat plan of (name, getter, converter) steps and replays the plan for each instance.
+
+Simple model fields get direct converters. Nested serializers are compiled
+recursively. SerializerMethodFields call the method on one serializer instance per
+call, so they still see `context`. Any other field keeps its own to_representation.
+When a request is in the context, file URLs must be absolute, so serialization goes
+through DRF unchanged.
+"""
+from operator import attrgetter
+
+from rest_framework import fields as drf_fields
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+_VALUE, _METHOD, _NESTED = range(3)
+
+
+class CompiledReadMixin:
+    @classmethod
+    def serialize(cls, instance, context=None):
+        """
+        Returns the representation of `instance` as a plain dict, equal to
+        `cls(instance, context=context).data`.
+        """
+        return cls.serialize_many([instance], context)[0]
+
+    @classmethod
+    def serialize_many(cls, instances, context=None):
+        """
+        Returns a list of plain dicts, equal to `cls(instances, many=True, context=context).data`.
+        """
+        context = context or {}
+        if 'request' in context:
+            return [dict(item) for item in cls(instances, many=True, context=context).data]
+        plan = cls.__dict__.get('_compiled_plan')
+        if plan is None:
+            plan = _compile(cls())
+            cls._compiled_plan = plan
+        bound = cls(context=context)
+        return [_represent(plan, instance, bound) for instance in instances]
+
+
+def _compile(serializer):
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    model_attributes = set()
+    if model is not None:
+        model_attributes = {f.name for f in model._meta.get_fields()} | {f.attname for f in model._meta.concrete_fields}
+    plan = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            plan.append((_METHOD, name, field.method_name, None))
+        elif isinstance(field, serializers.Serializer):
+            plan.append((_NESTED, name, _getter(field, model_attributes), _compile(field)))
+        else:
+            plan.append((_VALUE, name, _getter(field, model_attributes), _converter(field)))
+    return plan
+
+
+def _represent(plan, instance, bound):
+    data = {}
+    for kind, name, getter, converter in plan:
+        if kind == _METHOD:
+            data[name] = getattr(bound, getter)(instance)
+            continue
+        value = getter(instance)
+        if value is None:
+            data[name] = None
+        elif kind == _NESTED:
+            data[name] = _represent(converter, value, bound)
+        else:
+            data[name] = converter(value)
+    return data
+
+
+def _getter(field, model_attributes):
+    if not field.source_attrs:  # source='*'
+        return _identity
+    if len(field.source_attrs) == 1 and field.source_attrs[0] in model_attributes:
+        return attrgetter(field.source_attrs[0])
+    # Dotted sources, properties and methods: DRF's lookup (it calls methods)
+    return field.get_attribute
+
+
+def _identity(value):
+    return value
+
+
+def _converter(field):
+    field_type = type(field)
+    if field_type in (drf_fields.CharField, drf_fields.EmailField):
+        return str
+    if field_type is drf_fields.IntegerField or (
+            field_type is drf_fields.BigIntegerField
+            and not getattr(field, 'coerce_to_string', api_settings.COERCE_BIGINT_TO_STRING)):
+        return int
+    if field_type in (drf_fields.ChoiceField, drf_fields.BooleanField):
+        # Values loaded from the matching model fields already have the output type
+        return _identity
+    if field_type is drf_fields.FloatField:
+        return float
+    if field_type is drf_fields.DateField and str(getattr(field, 'format', api_settings.DATE_FORMAT)).lower() == drf_fields.ISO_8601:
+        return _iso_date
+    if field_type in (drf_fields.ImageField, drf_fields.FileField) \
+            and getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+        return _file_url
+    return field.to_representation
+
+
+def _iso_date(value):
+    return value if isinstance(value, str) else value.isoformat()
+
+
+def _file_url(value):
+    # Same as FileField.to_representation without a request: the storage URL or None
+    if not value:
+        return None
+    try:
+        return value.url
+    except AttributeError:
+        return None
@@ -8,9 +8,12 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         # Add custom claims
         token['username'] = user.username
         token['email'] = user.email
+        token['is_staff'] = user.is_staff
 
-        # Example: Add a custom role from the user profile (if it exists)
+        # Role and profile id from the user profile (if it exists), so ClaimsJWTAuthentication
+        # can authorize requests without loading either
         if hasattr(user, 'profile'):
-            token['role'] = user.profile.role  # Assuming UserProfile has a 'role' field
+            token['role'] = user.profile.role
+            token['profile_id'] = user.profile.pk
 
         return token
@@ -0,0 +1,15 @@
+from rest_framework import serializers
+from api.serializers.user_profile_serializer import UserProfileSerializer
+
+class MatchCandidateSerializer(UserProfileSerializer):
+    """
+    Serializer for a match candidate: the public profile plus its distance from the searcher.
+    Distances are passed in the context as a {profile_id: miles} mapping.
+    """
+    distance_miles = serializers.SerializerMethodField()
+
+    class Meta(UserProfileSerializer.Meta):
+        fields = UserProfileSerializer.Meta.fields + ['distance_miles']
+
+    def get_distance_miles(self, obj):
+        return round(self.context['distances'][obj.pk], 1)
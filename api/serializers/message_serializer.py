@@ -0,0 +1,41 @@
+from rest_framework import serializers
+from api.models import Conversation, ConversationMember, Message
+
+class MessageSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a stored chat message.
+    """
+    class Meta:
+        model = Message
+        fields = ['id', 'conversation', 'sender', 'body', 'client_id', 'created_at', 'delivered_at']
+
+class ConversationSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a direct conversation and the IDs of its two members.
+    """
+    members = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Conversation
+        fields = ['id', 'members', 'created_at']
+
+    def get_members(self, obj):
+        return sorted(int(user_id) for user_id in obj.pair_key.split(':'))
+
+class InboxEntrySerializer(serializers.ModelSerializer):
+    """
+    Serializer for one inbox row: the user's membership plus the conversation's
+    denormalized last message.
+    """
+    id = serializers.IntegerField(source='conversation_id')
+    members = serializers.SerializerMethodField()
+    last_message_id = serializers.IntegerField(source='conversation.last_message_id')
+    last_message_preview = serializers.CharField(source='conversation.last_message_preview')
+    last_message_at = serializers.DateTimeField(source='conversation.last_message_at')
+
+    class Meta:
+        model = ConversationMember
+        fields = ['id', 'members', 'last_message_id', 'last_message_preview', 'last_message_at', 'unread_count', 'last_read_at']
+
+    def get_members(self, obj):
+        return sorted(int(user_id) for user_id in obj.conversation.pair_key.split(':'))
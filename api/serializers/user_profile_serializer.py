@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from api.models import UserProfile
 from django.contrib.auth.models import User
+from api.services.picture_service import picture_urls
+from api.serializers.compiled import CompiledReadMixin
 
 class UserSerializer(serializers.ModelSerializer):
     """
@@ -10,19 +12,27 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'email']
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(CompiledReadMixin, serializers.ModelSerializer):
     """
     Serializer for the UserProfile model, which includes additional user information.
+    Read-only responses use UserProfileSerializer.serialize()/serialize_many(), which
+    skip DRF's per-field machinery (see api.serializers.compiled).
     """
     user = UserSerializer(read_only=True)  # Nested serializer for User data
+    profile_picture_urls = serializers.SerializerMethodField()  # Original and resized variants
+    age = serializers.IntegerField(source='current_age', read_only=True)  # From the birthday as of today
 
     class Meta:
         model = UserProfile
         fields = [
-            'id', 'user', 'bio', 'age', 'gender', 'location', 'profile_picture', 'role', 
-            'zipcode', 'birthday', 'looking_for', 'distance'
+            'id', 'user', 'bio', 'age', 'gender', 'location', 'profile_picture', 'profile_picture_urls', 'role',
+            'zipcode', 'birthday', 'looking_for', 'distance', 'version', 'updated_at'
         ]
 
+    def get_profile_picture_urls(self, instance):
+        # Built from the picture's content hash, which the profile row already holds
+        return picture_urls(instance.picture_id)
+
     def update(self, instance, validated_data):
         """
         Custom update method to handle nested user data.
@@ -1,44 +1,144 @@
+import asyncio
+from concurrent import futures
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import User
-from api.models.user_profile import UserProfile
-from django.contrib.auth.hashers import make_password
-from rest_framework.exceptions import ValidationError
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.db import transaction
+from rest_framework.exceptions import AuthenticationFailed, Throttled, ValidationError
+from api.db.routers import replica_reads
+from api.models import HAS_EMAIL
+from api.services.match_service import refresh_match_feed
+from api.utils.hashing_pool import PoolSaturated, get_hash_pool
+from api.utils.logger import log_warning
+
+# Columns needed to verify a login and issue its tokens (including the profile claims)
+LOGIN_FIELDS = ('id', 'username', 'email', 'password', 'is_active', 'is_staff', 'profile__id', 'profile__role')
 
 def register_user(data):
     """
     Handles the registration of a new user along with the creation of their profile.
+
+    Runs in one transaction: an email check, the user insert and a single profile insert
+    (made by the User post_save signal from the staged `profile_data`). Building the new
+    user's match feed is queued as a background task.
     """
     # Extract data
     name = data.get('name')
     email = data.get('email')
     password = data.get('password')
-    gender = data.get('gender')
-    bio = data.get('bio')
-    looking_for = data.get('looking_for')
-    zipcode = data.get('zipcode')
-    birthday = data.get('birthday')
-    distance = data.get('distance')
-
-    # Check if the email is already registered
-    if User.objects.filter(email=email).exists():
-        raise ValidationError("Email is already registered.")
-
-    # Create the user
-    user = User.objects.create(
-        username=email,  # assuming email as username
-        email=email,
-        password=make_password(password),  # hash the password
-        first_name=name
-    )
-
-    # Create the user profile
-    UserProfile.objects.create(
-        user=user,
-        gender=gender,
-        bio=bio,
-        looking_for=looking_for,
-        zipcode=zipcode,
-        birthday=birthday,
-        distance=distance
-    )
+
+    # Hash before opening the transaction so the slow part doesn't hold it open
+    hashed_password = make_password(password)
+
+    with transaction.atomic():
+        # Check if the email is already registered
+        if User.objects.filter(HAS_EMAIL, email=email).exists():
+            raise ValidationError("Email is already registered.")
+
+        # Create the user; the post_save signal inserts the profile with these fields
+        user = User(
+            username=email,  # assuming email as username
+            email=email,
+            password=hashed_password,
+            first_name=name
+        )
+        user.profile_data = {
+            'gender': data.get('gender'),
+            'bio': data.get('bio'),
+            'looking_for': data.get('looking_for'),
+            'zipcode': data.get('zipcode'),
+            'birthday': data.get('birthday'),
+            'distance': data.get('distance'),
+        }
+        user.save()
+        refresh_match_feed.enqueue(user.profile.pk)
 
     return user
+
+async def aregister_user(data):
+    """
+    Async entry point for register_user. The registration transaction and the profile
+    signal have no async form, so the whole unit runs in one sync_to_async call.
+    """
+    return await sync_to_async(register_user)(data)
+
+def authenticate_by_email(email, password):
+    """
+    Verifies an email/password login and returns the user.
+
+    The user is resolved with one email lookup, and the password hash is checked on the
+    bounded hashing pool instead of the request thread. When the pool is full the login
+    is refused at once with Throttled (HTTP 429), and so is a login whose verification
+    waited LOGIN_HASH_TIMEOUT seconds behind a backlog.
+    """
+    with replica_reads():
+        user = _login_queryset(email).first()
+    if user is None:
+        # Registered moments ago and not replicated yet
+        user = _login_queryset(email).first()
+    _check_user_found(user)
+
+    try:
+        valid = get_hash_pool().check_password(password, user.password, timeout=settings.LOGIN_HASH_TIMEOUT)
+    except PoolSaturated:
+        raise _login_throttled()
+    except futures.TimeoutError:
+        raise _login_timed_out(user)
+    _check_login(user, valid)
+
+    # Same as Django's authenticate(): re-hash when the hasher settings have moved on
+    if identify_hasher(user.password).must_update(user.password):
+        user.set_password(password)
+        user.save(update_fields=['password'])
+
+    return user
+
+async def aauthenticate_by_email(email, password):
+    """
+    Async variant of authenticate_by_email for the async login view: the email lookup
+    uses the async ORM and the event loop awaits the hashing pool.
+    """
+    with replica_reads():
+        user = await _login_queryset(email).afirst()
+    if user is None:
+        user = await _login_queryset(email).afirst()
+    _check_user_found(user)
+
+    try:
+        valid = await get_hash_pool().acheck_password(password, user.password, timeout=settings.LOGIN_HASH_TIMEOUT)
+    except PoolSaturated:
+        raise _login_throttled()
+    except asyncio.TimeoutError:
+        raise _login_timed_out(user)
+    _check_login(user, valid)
+
+    if identify_hasher(user.password).must_update(user.password):
+        await sync_to_async(user.set_password)(password)
+        await user.asave(update_fields=['password'])
+
+    return user
+
+def _login_queryset(email):
+    return User.objects.select_related('profile').only(*LOGIN_FIELDS).filter(HAS_EMAIL, email=email)
+
+def _check_user_found(user):
+    if user is None:
+        raise AuthenticationFailed({
+            "email": ["No user found with this email address."]
+        })
+
+def _check_login(user, valid):
+    if not valid or not user.is_active:
+        raise AuthenticationFailed({
+            "password": ["Incorrect password."]
+        })
+
+def _login_throttled():
+    return Throttled(wait=settings.LOGIN_RETRY_AFTER, detail="Too many login attempts in progress. Please retry shortly.")
+
+def _login_timed_out(user):
+    # The verification still runs to completion on the pool; only this request gives up on it
+    log_warning("Password check for user %s took over %ss; login refused", user.pk, settings.LOGIN_HASH_TIMEOUT)
+    return _login_throttled()
@@ -0,0 +1,210 @@
+import csv
+import datetime
+import io
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from api.models import HAS_EMAIL, UserProfile, ZipcodeLocation
+
+# Same fields RegisterView requires; `password_hash` (an already hashed Django password) may replace `password`
+IMPORT_FIELDS = ['name', 'email', 'password', 'gender', 'bio', 'looking_for', 'zipcode', 'birthday', 'distance']
+GENDER_CHOICES = ('male', 'female')
+
+
+class ImportReport:
+    """
+    Outcome of an import run: counts, per-row errors and throughput.
+    """
+    def __init__(self):
+        self.created = 0
+        self.skipped = 0
+        self.errors = []  # (row number, message)
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rows(self):
+        return self.created + self.skipped + len(self.errors)
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self, max_errors=None):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'skipped': self.skipped,
+            'failed': len(self.errors),
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'errors': [{'row': row, 'error': message} for row, message in self.errors[:max_errors]],
+        }
+
+
+def iter_import_rows(stream, fmt):
+    """
+    Lazily yields (row number, dict) from a text stream of CSV (with a header) or JSONL.
+    Malformed JSON lines are yielded as (row number, None).
+    """
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            yield number, row
+    elif fmt == 'jsonl':
+        number = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield number, row if isinstance(row, dict) else None
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def import_users(rows, chunk_size=None, workers=None):
+    """
+    Creates users and profiles from an iterable of (row number, dict) in chunks.
+
+    Each chunk is validated in memory, deduplicated against the database with one
+    `email IN (...)` query, has its passwords hashed in a process pool, and is written with
+    two bulk_create calls inside a transaction. Emails that already exist are skipped;
+    invalid rows are reported with their row number and don't affect the rest of the chunk.
+
+    bulk_create doesn't send signals: profiles are created here directly and geocoded with
+    one zipcode lookup per chunk, and neighbours' match feeds pick imported users up on
+    their next rebuild.
+    """
+    chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+    workers = workers or os.cpu_count()
+    report = ImportReport()
+    rows = iter(rows)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            _import_chunk(chunk, pool, workers, report)
+
+    report.elapsed = time.perf_counter() - report.started
+    return report
+
+
+def _import_chunk(chunk, pool, workers, report):
+    cleaned = {}
+    for number, row in chunk:
+        try:
+            data = _clean_row(row)
+        except DjangoValidationError as e:
+            report.errors.append((number, '; '.join(e.messages)))
+            continue
+        if data['email'] in cleaned:
+            report.errors.append((number, f"Duplicate email {data['email']} in input."))
+            continue
+        cleaned[data['email']] = (number, data)
+
+    existing = set(User.objects.filter(HAS_EMAIL, email__in=list(cleaned)).values_list('email', flat=True))
+    for email in existing:
+        del cleaned[email]
+    report.skipped += len(existing)
+    if not cleaned:
+        return
+
+    pending = [data for _, data in cleaned.values()]
+    plain = [data for data in pending if 'password' in data]
+    batch = max(1, len(plain) // (workers * 4))
+    hashed = pool.map(_hash_passwords, _batches([data['password'] for data in plain], batch))
+    for data, password in zip(plain, itertools.chain.from_iterable(hashed)):
+        data['password_hash'] = password
+
+    locations = ZipcodeLocation.objects.in_bulk({data['zipcode'] for data in pending})
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(username=data['email'], email=data['email'], first_name=data['name'], password=data['password_hash'])
+            for data in pending
+        ])
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user,
+                gender=data['gender'],
+                bio=data['bio'],
+                looking_for=data['looking_for'],
+                zipcode=data['zipcode'],
+                birthday=data['birthday'],
+                distance=data['distance'],
+                latitude=locations[data['zipcode']].latitude if data['zipcode'] in locations else None,
+                longitude=locations[data['zipcode']].longitude if data['zipcode'] in locations else None,
+            )
+            for user, data in zip(users, pending)
+        ])
+    report.created += len(users)
+
+
+def _clean_row(row):
+    """
+    Validates one input row and returns normalised field values.
+    Raises django.core.exceptions.ValidationError.
+    """
+    if row is None:
+        raise DjangoValidationError("Row is not a valid JSON object.")
+
+    data = {field: str(row.get(field) or '').strip() for field in IMPORT_FIELDS}
+    password_hash = str(row.get('password_hash') or '').strip()
+    required = [field for field in IMPORT_FIELDS if field != 'password' or not password_hash]
+    missing = [field for field in required if not data[field]]
+    if missing:
+        raise DjangoValidationError(f"Missing required parameters: {', '.join(missing)}")
+
+    validate_email(data['email'])
+    if len(data['name']) > 150 or len(data['zipcode']) > 10:
+        raise DjangoValidationError("name is limited to 150 characters and zipcode to 10.")
+    for field in ('gender', 'looking_for'):
+        if data[field] not in GENDER_CHOICES:
+            raise DjangoValidationError(f"{field} must be one of: {', '.join(GENDER_CHOICES)}.")
+    try:
+        data['birthday'] = datetime.date.fromisoformat(data['birthday'])
+    except ValueError:
+        raise DjangoValidationError("birthday must be a YYYY-MM-DD date.")
+    try:
+        data['distance'] = int(data['distance'])
+    except ValueError:
+        raise DjangoValidationError("distance must be a whole number.")
+
+    if password_hash:
+        try:
+            identify_hasher(password_hash)
+        except ValueError:
+            raise DjangoValidationError("password_hash is not a recognised Django password hash.")
+        data.pop('password')
+        data['password_hash'] = password_hash
+    return data
+
+
+def _hash_passwords(passwords):
+    return [make_password(password) for password in passwords]
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def open_text_upload(uploaded_file):
+    """
+    Wraps an uploaded file so it can be read line by line as text without loading it whole.
+    """
+    return io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
@@ -0,0 +1,398 @@
+import datetime
+import re
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from api.db.routers import primary_reads, replica_reads
+from api.models import MatchFeed, MatchFeedEntry, UserProfile
+from api.services.seen_service import get_seen_set
+from api.tasks.registry import task
+from api.utils.geo import bounding_box, haversine_miles_array
+from api.utils.pagination import decode_cursor, keyset_page
+from rest_framework.exceptions import ValidationError
+
+# Columns loaded for the ranking stage, in the order build_candidate_columns expects
+CANDIDATE_COLUMNS = ('id', 'gender', 'looking_for', 'latitude', 'longitude', 'birthday', 'age', 'bio')
+# Bio words are split on whitespace after everything but letters, digits and apostrophes
+# is blanked out. NUL separates bios while a whole batch is cleaned in one regex pass.
+_NON_WORD_RE = re.compile(r"[^\w\s'\x00]")
+
+def get_match_candidates(profile, limit=None, exclude_seen=True):
+    """
+    Returns up to `limit` (profile_id, distance) pairs, nearest first, for profiles that
+    match the searcher's `looking_for`, are looking for the searcher's gender and are
+    within both users' `distance` radius. Profiles the searcher has swiped are left
+    out through their seen set unless `exclude_seen` is False.
+
+    The search starts with a small ring around the searcher and doubles it until enough
+    candidates are found, so each query only reads the bounding box it needs from the
+    (gender, looking_for, latitude, longitude) index instead of scanning every profile.
+    A wider ring only fetches the rows outside the previous box; those already read are
+    re-filtered against the new radius in memory.
+    """
+    limit = limit or settings.MATCH_CANDIDATE_LIMIT
+
+    if profile.latitude is None or profile.longitude is None:
+        raise ValidationError("Profile location is unknown. Please set a valid zipcode.")
+    if not profile.gender or not profile.looking_for:
+        raise ValidationError("Profile gender and looking_for are required for matching.")
+
+    radius = min(profile.distance or settings.MATCH_MAX_DISTANCE, settings.MATCH_MAX_DISTANCE)
+    queryset = candidate_queryset(profile)
+    seen = get_seen_set(profile.pk) if exclude_seen else None
+
+    search_radius = min(settings.MATCH_INITIAL_RADIUS, radius)
+    inner_box = None
+    ids, miles = np.zeros(0, dtype=np.int64), np.zeros(0)
+    while True:
+        ring_ids, ring_miles = _candidates_within(
+            queryset, profile.latitude, profile.longitude, search_radius, seen, inner_box,
+        )
+        ids, miles = np.concatenate((ids, ring_ids)), np.concatenate((miles, ring_miles))
+        within = miles <= search_radius
+        if within.sum() >= limit or search_radius >= radius:
+            break
+        inner_box = bounding_box(profile.latitude, profile.longitude, search_radius)
+        search_radius = min(search_radius * 2, radius)
+
+    ids, miles = ids[within], miles[within]
+    nearest = np.argsort(miles, kind='stable')[:limit]
+    return list(zip(ids[nearest].tolist(), miles[nearest].tolist()))
+
+def candidate_queryset(profile):
+    """
+    Profiles that are what the searcher is looking for and are looking for the searcher.
+    """
+    return UserProfile.objects.filter(
+        gender=profile.looking_for,
+        looking_for=profile.gender,
+    ).exclude(pk=profile.pk)
+
+def bounding_box_rows(queryset, lat, lon, radius):
+    """
+    (id, latitude, longitude, distance) of the queryset's profiles in the bounding box
+    around (lat, lon): a range scan of profile_geo_idx.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius)
+    return queryset.filter(
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lon, max_lon),
+    ).values_list('id', 'latitude', 'longitude', 'distance')
+
+def _candidates_within(queryset, lat, lon, radius, seen=None, inner_box=None):
+    """
+    Reads the bounding box around (lat, lon), leaving out `inner_box` when an earlier
+    ring already read it, and returns (ids, miles) arrays for the rows whose own
+    `distance` preference reaches back to the searcher and that are not in the `seen`
+    filter. Rows beyond `radius` are kept: the caller re-filters everything it has read
+    each time the ring grows, so no row is fetched twice.
+    """
+    rows = bounding_box_rows(queryset, lat, lon, radius)
+    if inner_box is not None:
+        min_lat, max_lat, min_lon, max_lon = inner_box
+        rows = rows.exclude(latitude__range=(min_lat, max_lat), longitude__range=(min_lon, max_lon))
+    rows = list(rows)
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+    ids, lats, lons, radii = zip(*rows)
+    ids = np.array(ids, dtype=np.int64)
+    miles = haversine_miles_array(lat, lon, np.array(lats, dtype=float), np.array(lons, dtype=float))
+    # A candidate without a distance preference accepts any distance
+    radii = np.array([np.inf if r is None else r for r in radii], dtype=float)
+    keep = miles <= radii
+    if seen is not None and keep.any():
+        # One filter probe per remaining candidate, all in a single vectorised call
+        keep[keep] = ~seen.contains_many(ids[keep])
+    return ids[keep], miles[keep]
+
+def rank_match_candidates(profile, page=1, page_size=None):
+    """
+    Returns one page of (profile_id, score, distance) for the searcher's best candidates.
+
+    Discovery yields the nearest MATCH_RANKING_POOL candidates, their attributes are
+    loaded as column arrays in a single query, and the whole pool is scored in one NumPy
+    pass. Only the top page * page_size scores are ordered (argpartition), so later pages
+    never sort the whole pool.
+    """
+    page_size = page_size or settings.MATCH_PAGE_SIZE
+    # Discovery tolerates replication lag: a profile that joined a moment ago shows up next time
+    with replica_reads():
+        candidates = get_match_candidates(profile, limit=settings.MATCH_RANKING_POOL)
+        if not candidates:
+            return []
+
+        distances = dict(candidates)
+        columns = load_candidate_columns(distances.keys())
+    scores = score_candidates(profile, columns)
+
+    top = top_k(scores, page * page_size)[(page - 1) * page_size:]
+    return [
+        (int(columns['id'][i]), float(scores[i]), distances[int(columns['id'][i])])
+        for i in top
+    ]
+
+def get_match_feed_page(profile, cursor=None, page_size=None):
+    """
+    Returns (entries, next_cursor) for the profile's precomputed feed. Each page is one
+    range scan on the (owner, rank) index with the candidate and user joined in.
+    Feeds are only built off the request path: a feed that has never been built comes
+    back as an empty page while the refresh_match_feed task builds it (queued here when
+    no build is under way), and stale feeds are served as-is until they are rebuilt.
+    """
+    page_size = page_size or settings.MATCH_PAGE_SIZE
+    position = decode_cursor(cursor, ['rank'])
+
+    entries = MatchFeedEntry.objects.filter(owner=profile).select_related('candidate__user').order_by('rank')
+    if position:
+        entries = entries.filter(rank__gt=position['rank'])
+    with replica_reads():
+        rows = list(entries[:page_size + 1])
+
+    # An empty first page may only mean the replica has not seen the feed yet: decide on the primary
+    if not rows and position is None:
+        with primary_reads():
+            feed = MatchFeed.objects.filter(profile=profile).values_list('built_at').first()
+            if feed is None:
+                refresh_match_feed.enqueue(profile.pk)
+            elif feed[0] is not None:
+                rows = list(entries[:page_size + 1])
+    return keyset_page(rows, page_size, lambda entry: {'rank': entry.rank})
+
+def build_match_feed(profile):
+    """
+    Ranks the profile's candidates and replaces its stored feed. The feed is only marked
+    fresh if no invalidation arrived while it was being built. Builds of the same feed
+    (the task and the refresh job, say) take turns on the MatchFeed row lock, so one
+    never inserts ranks the other has not deleted yet.
+    """
+    feed, _ = MatchFeed.objects.get_or_create(profile=profile)
+    version = feed.version
+
+    try:
+        ranked = rank_match_candidates(profile, page=1, page_size=settings.MATCH_FEED_SIZE)
+    except ValidationError:
+        ranked = []  # No location or preferences yet: an empty feed until the profile is completed
+
+    with transaction.atomic():
+        MatchFeed.objects.select_for_update().get(pk=feed.pk)
+        MatchFeedEntry.objects.filter(owner=profile).delete()
+        MatchFeedEntry.objects.bulk_create([
+            MatchFeedEntry(owner=profile, candidate_id=candidate_id, rank=rank, score=score, distance=distance)
+            for rank, (candidate_id, score, distance) in enumerate(ranked, start=1)
+        ])
+        MatchFeed.objects.filter(pk=feed.pk, version=version).update(
+            is_stale=False, stale_since=None, built_at=timezone.now(),
+        )
+    return len(ranked)
+
+@task(lane='high')
+def refresh_match_feed(profile_id):
+    """
+    Builds a profile's own feed unless it is already built and fresh, so the owner's
+    next feed request is served from it. Queued when a profile is created and when an
+    update changes a field that matching depends on.
+    """
+    profile = UserProfile.objects.filter(pk=profile_id).first()
+    if profile is None:
+        return  # Deleted since
+    if MatchFeed.objects.filter(profile=profile, is_stale=False, built_at__isnull=False).exists():
+        return
+    build_match_feed(profile)
+
+def invalidate_match_feeds(profile, created=False):
+    """
+    Marks stale every feed a profile change can affect: the profile's own feed, feeds
+    that currently list it (reverse index on candidate) and feeds of the users it can now
+    be matched with. Candidacy is symmetric (mutual gender and distance), so the last
+    group is found with the bounding-box query around the profile's new location.
+
+    Everything is folded into a single UPDATE with subqueries, so the cost on the write
+    path is one statement. The bounding box is a superset of the exact radius, which at
+    worst refreshes a few extra feeds.
+    """
+    affected = Q(profile_id=profile.pk)
+    if not created:
+        affected |= Q(profile_id__in=MatchFeedEntry.objects.filter(candidate_id=profile.pk).values('owner_id'))
+
+    if profile.latitude is not None and profile.longitude is not None and profile.gender and profile.looking_for:
+        radius = min(profile.distance or settings.MATCH_MAX_DISTANCE, settings.MATCH_MAX_DISTANCE)
+        min_lat, max_lat, min_lon, max_lon = bounding_box(profile.latitude, profile.longitude, radius)
+        neighbours = UserProfile.objects.filter(
+            gender=profile.looking_for,
+            looking_for=profile.gender,
+            latitude__range=(min_lat, max_lat),
+            longitude__range=(min_lon, max_lon),
+        ).values('id')
+        affected |= Q(profile_id__in=neighbours)
+
+    return MatchFeed.objects.filter(affected).update(
+        is_stale=True,
+        version=F('version') + 1,
+        stale_since=Coalesce(F('stale_since'), timezone.now()),
+    )
+
+def refresh_stale_match_feeds(batch_size=None):
+    """
+    Rebuilds up to `batch_size` stale feeds, oldest invalidation first. Returns the
+    number of feeds rebuilt. Called repeatedly by the `refresh_match_feeds` command.
+    """
+    batch_size = batch_size or settings.MATCH_FEED_REFRESH_BATCH
+    feeds = MatchFeed.objects.filter(is_stale=True).select_related('profile').order_by('stale_since')[:batch_size]
+
+    rebuilt = 0
+    for feed in feeds:
+        build_match_feed(feed.profile)
+        rebuilt += 1
+    return rebuilt
+
+def load_candidate_columns(candidate_ids):
+    """
+    Loads the ranking attributes for the given profile IDs as column arrays.
+    """
+    rows = UserProfile.objects.filter(pk__in=list(candidate_ids)).values_list(*CANDIDATE_COLUMNS)
+    return build_candidate_columns(list(rows))
+
+def build_candidate_columns(rows, today=None):
+    """
+    Turns (id, gender, looking_for, latitude, longitude, birthday, age, bio) tuples into
+    a dict of NumPy arrays, one per attribute. Missing numbers become NaN.
+    """
+    today = today or datetime.date.today()
+    if rows:
+        ids, genders, looking_fors, lats, lons, birthdays, ages, bios = zip(*rows)
+    else:
+        ids = genders = looking_fors = lats = lons = birthdays = ages = bios = ()
+
+    return {
+        'id': np.array(ids, dtype=np.int64),
+        'gender': np.array(genders, dtype='U10'),
+        'looking_for': np.array(looking_fors, dtype='U10'),
+        'latitude': np.array(lats, dtype=np.float64),
+        'longitude': np.array(lons, dtype=np.float64),
+        'age': _ages_from_birthdays(birthdays, np.array(ages, dtype=np.float64), today),
+        'bio': list(bios),
+    }
+
+def score_candidates(profile, columns, weights=None):
+    """
+    Scores every candidate in `columns` against the searcher in one vectorised pass.
+    Each component is in [0, 1]; the result is their weighted sum (MATCH_SCORE_WEIGHTS).
+    """
+    weights = weights or settings.MATCH_SCORE_WEIGHTS
+    count = len(columns['id'])
+    radius = min(profile.distance or settings.MATCH_MAX_DISTANCE, settings.MATCH_MAX_DISTANCE)
+
+    # Distance: 1 next door, 0 at the edge of the searcher's radius
+    miles = haversine_miles_array(profile.latitude, profile.longitude, columns['latitude'], columns['longitude'])
+    distance_score = np.nan_to_num(np.clip(1.0 - miles / radius, 0.0, 1.0))
+
+    # Age: Gaussian falloff on the age gap, neutral when either age is unknown
+    searcher_age = profile.current_age
+    if searcher_age is None:
+        age_score = np.full(count, 0.5)
+    else:
+        age_score = np.exp(-((columns['age'] - searcher_age) / settings.MATCH_AGE_SPREAD) ** 2)
+        age_score = np.where(np.isnan(age_score), 0.5, age_score)
+
+    # Reciprocity: half for matching what the searcher wants, half for wanting the searcher
+    reciprocity_score = (
+        (columns['gender'] == (profile.looking_for or '')).astype(np.float64)
+        + (columns['looking_for'] == (profile.gender or '')).astype(np.float64)
+    ) / 2
+
+    bio_score = bio_similarity(profile.bio, columns['bio'])
+
+    return (
+        weights['distance'] * distance_score
+        + weights['age'] * age_score
+        + weights['reciprocity'] * reciprocity_score
+        + weights['bio'] * bio_score
+    )
+
+def bio_similarity(bio, candidate_bios, dimensions=None):
+    """
+    Cosine similarity between the searcher's bio and each candidate bio, using hashed
+    bag-of-words counts. The candidate side is kept sparse (row, bucket, count) so memory
+    grows with the number of words, not candidates * dimensions.
+    """
+    dimensions = dimensions or settings.MATCH_BIO_DIMENSIONS
+    count = len(candidate_bios)
+    query = np.bincount(_bio_buckets([bio], dimensions)[0], minlength=dimensions).astype(np.float64)
+    query_norm = np.linalg.norm(query)
+    if count == 0 or query_norm == 0:
+        return np.zeros(count)
+
+    buckets, lengths = _bio_buckets(candidate_bios, dimensions)
+    if not len(buckets):
+        return np.zeros(count)
+
+    rows = np.repeat(np.arange(count), lengths)
+    keys, counts = np.unique(rows * dimensions + buckets, return_counts=True)
+    rows, cols = np.divmod(keys, dimensions)
+
+    dots = np.bincount(rows, weights=counts * query[cols], minlength=count)
+    norms = np.sqrt(np.bincount(rows, weights=counts.astype(np.float64) ** 2, minlength=count))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.nan_to_num(dots / (norms * query_norm))
+
+def top_k(scores, k):
+    """
+    Indices of the k highest scores, best first. argpartition finds them in O(n) and
+    only those k are sorted.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind='stable')]
+
+def _bio_buckets(texts, dimensions):
+    """
+    Tokenises every text and returns (flat bucket array, words per text). The batch is
+    cleaned and split in single C-level passes with a NUL token between texts, and each
+    distinct word is hashed only once.
+    """
+    if not texts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    joined = ' \x00 '.join((text or '').replace('\x00', ' ') for text in texts)
+    words = _NON_WORD_RE.sub(' ', joined.lower()).split()
+    buckets = _WordBuckets(dimensions)
+    buckets['\x00'] = -1
+    flat = np.fromiter(map(buckets.__getitem__, words), dtype=np.int64, count=len(words))
+
+    separators = np.flatnonzero(flat < 0)
+    lengths = np.diff(np.concatenate(([-1], separators, [len(flat)]))) - 1
+    return flat[flat >= 0], lengths
+
+class _WordBuckets(dict):
+    """
+    Memoises word -> hashed bucket for one tokenisation pass.
+    """
+    def __init__(self, dimensions):
+        super().__init__()
+        self.dimensions = dimensions
+
+    def __missing__(self, word):
+        bucket = self[word] = hash(word) % self.dimensions
+        return bucket
+
+def tokenize_bio(text):
+    return _NON_WORD_RE.sub(' ', text.replace('\x00', ' ').lower()).split() if text else []
+
+def _ages_from_birthdays(birthdays, ages, today):
+    """
+    Fractional ages from birthday dates, falling back to the stored `age` column where
+    the birthday is missing. Dates go through toordinal(), which is much cheaper than
+    NumPy's datetime64 conversion of date objects.
+    """
+    ordinals = np.fromiter((b.toordinal() if b else 0 for b in birthdays), dtype=np.int64, count=len(birthdays))
+    return np.where(ordinals == 0, ages, (today.toordinal() - ordinals) / 365.2425)
+
+def _age_in_years(birthday, today):
+    return today.year - birthday.year - ((today.month, today.day) < (birthday.month, birthday.day))
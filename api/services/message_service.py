@@ -0,0 +1,184 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Substr
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+from api.models import ArchivedMessage, Conversation, ConversationMember, Message
+from api.utils.pagination import decode_cursor, keyset_page
+
+def get_or_create_direct_conversation(user_id, other_user_id):
+    """
+    Returns (conversation, created) for the direct conversation between two users.
+    """
+    user_id, other_user_id = int(user_id), int(other_user_id)
+    if user_id == other_user_id:
+        raise ValidationError("You cannot start a conversation with yourself.")
+    if not User.objects.filter(pk=other_user_id).exists():
+        raise NotFound("User not found.")
+
+    pair_key = f"{min(user_id, other_user_id)}:{max(user_id, other_user_id)}"
+    with transaction.atomic():
+        conversation, created = Conversation.objects.get_or_create(pair_key=pair_key)
+        if created:
+            ConversationMember.objects.bulk_create([
+                ConversationMember(conversation=conversation, user_id=user_id),
+                ConversationMember(conversation=conversation, user_id=other_user_id),
+            ])
+    return conversation, created
+
+def get_members_by_conversation(conversation_ids):
+    """
+    Returns {conversation_id: set of user IDs} for a batch of conversations in one query.
+    """
+    members = defaultdict(set)
+    rows = ConversationMember.objects.filter(conversation_id__in=list(conversation_ids)).values_list('conversation_id', 'user_id')
+    for conversation_id, user_id in rows:
+        members[conversation_id].add(user_id)
+    return dict(members)
+
+def list_conversations(user_id, cursor=None, page_size=None):
+    """
+    Returns (memberships, next_cursor) for one page of the user's inbox, most recent
+    activity first. Each membership carries its unread count and the conversation's
+    denormalized last message, so a page costs one index range scan regardless of how
+    many messages the conversations hold.
+    """
+    page_size = min(page_size or settings.MESSAGING_INBOX_PAGE_SIZE, settings.MESSAGING_INBOX_PAGE_SIZE)
+    position = decode_cursor(cursor, ['last_activity_at', 'conversation'])
+
+    queryset = (
+        ConversationMember.objects.filter(user_id=user_id)
+        .select_related('conversation')
+        .order_by('-last_activity_at', '-conversation_id')
+    )
+    if position:
+        last_activity_at = _parse_cursor_time(position['last_activity_at'])
+        queryset = queryset.filter(
+            Q(last_activity_at__lt=last_activity_at)
+            | Q(last_activity_at=last_activity_at, conversation_id__lt=position['conversation'])
+        )
+    return keyset_page(queryset[:page_size + 1], page_size, lambda member: {
+        'last_activity_at': member.last_activity_at.isoformat(), 'conversation': member.conversation_id,
+    })
+
+def list_conversation_messages(conversation_id, user_id, cursor=None, page_size=None):
+    """
+    Returns (messages, next_cursor) for one page of a conversation's history, newest
+    first, for a user who belongs to it.
+
+    Pages seek past the last (created_at, id) seen along message_history_idx. Archived
+    messages keep their IDs, so once the recent table runs out the same position
+    continues into ArchivedMessage; only reads that reach that far touch the archive.
+    """
+    page_size = min(page_size or settings.MESSAGING_HISTORY_PAGE_SIZE, settings.MESSAGING_HISTORY_PAGE_SIZE)
+    position = decode_cursor(cursor, ['created_at', 'id'])
+    if not ConversationMember.objects.filter(conversation_id=conversation_id, user_id=user_id).exists():
+        raise NotFound("Conversation not found.")
+
+    condition = Q(conversation_id=conversation_id)
+    if position:
+        created_at = _parse_cursor_time(position['created_at'])
+        condition &= Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=position['id'])
+
+    rows = list(Message.objects.filter(condition).order_by('-created_at', '-id')[:page_size + 1])
+    if len(rows) <= page_size:
+        rows += ArchivedMessage.objects.filter(condition).order_by('-created_at', '-id')[:page_size + 1 - len(rows)]
+    return keyset_page(rows, page_size, lambda message: {
+        'created_at': message.created_at.isoformat(), 'id': message.pk,
+    })
+
+def mark_conversation_read(conversation_id, user_id):
+    """
+    Clears the user's unread counter for a conversation.
+    """
+    updated = ConversationMember.objects.filter(conversation_id=conversation_id, user_id=user_id).update(
+        unread_count=0, last_read_at=timezone.now()
+    )
+    if not updated:
+        raise NotFound("Conversation not found.")
+
+def save_messages(messages):
+    """
+    Inserts a batch of unsaved Message instances in one statement and returns them with
+    their primary keys. Used by the realtime MessageWriter.
+
+    In the same transaction, the conversations' last message and message count and the
+    members' activity time and unread counters are brought up to date with one UPDATE
+    per table, however many conversations the batch spans.
+    """
+    if not messages:
+        return []
+    with transaction.atomic():
+        messages = Message.objects.bulk_create(messages)
+        _update_conversation_summaries(messages)
+    return messages
+
+def _update_conversation_summaries(messages):
+    # Correlated subqueries keep each statement the same size however many conversations
+    # the batch spans; the latest message is one probe of message_history_idx
+    conversation_ids = {message.conversation_id for message in messages}
+    batch = Message.objects.filter(pk__in=[message.pk for message in messages])
+    latest = Message.objects.filter(conversation_id=OuterRef('pk')).order_by('-created_at', '-id')
+
+    Conversation.objects.filter(pk__in=conversation_ids).update(
+        message_count=F('message_count') + _count(batch.filter(conversation_id=OuterRef('pk'))),
+        last_message_at=Subquery(latest.values('created_at')[:1]),
+        last_message_id=Subquery(latest.values('id')[:1]),
+        last_message_preview=Subquery(latest.annotate(preview=Substr('body', 1, 200)).values('preview')[:1]),
+    )
+
+    # Members receive everything in the batch except what they sent themselves
+    received = batch.filter(conversation_id=OuterRef('conversation_id')).exclude(sender_id=OuterRef('user_id'))
+    ConversationMember.objects.filter(conversation_id__in=conversation_ids).update(
+        unread_count=F('unread_count') + _count(received),
+        last_activity_at=Subquery(Conversation.objects.filter(pk=OuterRef('conversation_id')).values('last_message_at')[:1]),
+    )
+
+def _count(queryset):
+    counted = queryset.order_by().values('conversation_id').annotate(total=Count('*')).values('total')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+def mark_messages_delivered(receipts):
+    """
+    Stamps delivered_at on a batch of messages that haven't been marked yet. `receipts`
+    holds (conversation_id, message_id) pairs so a receipt only applies inside the
+    conversation it was sent for.
+    """
+    by_conversation = defaultdict(list)
+    for conversation_id, message_id in receipts:
+        by_conversation[conversation_id].append(message_id)
+    if not by_conversation:
+        return 0
+
+    condition = Q()
+    for conversation_id, message_ids in by_conversation.items():
+        condition |= Q(conversation_id=conversation_id, pk__in=message_ids)
+    return Message.objects.filter(condition, delivered_at__isnull=True).update(delivered_at=timezone.now())
+
+def archive_messages(before, batch_size=None):
+    """
+    Moves messages created before `before` from Message to ArchivedMessage, oldest first,
+    one batch per transaction so locks stay short. Returns the number moved.
+    """
+    batch_size = batch_size or settings.MESSAGING_ARCHIVE_BATCH_SIZE
+    fields = ['id', 'conversation_id', 'sender_id', 'body', 'client_id', 'created_at', 'delivered_at']
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(Message.objects.filter(created_at__lt=before).order_by('created_at', 'id').values(*fields)[:batch_size])
+            if not rows:
+                return moved
+            ArchivedMessage.objects.bulk_create([ArchivedMessage(**row) for row in rows], ignore_conflicts=True)
+            Message.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+        moved += len(rows)
+
+def _parse_cursor_time(value):
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValidationError("Invalid cursor.")
+    return parsed
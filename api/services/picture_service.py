@@ -0,0 +1,210 @@
+"""
+Profile picture pipeline.
+
+An upload is streamed to disk while it is hashed (HashingFileUploadHandler), then moved
+into storage as `profile_pics/incoming/<hash>`. The request only reads the image header
+to reject non-images. A background task then decodes the picture and writes, under
+`profile_pics/<hash[:2]>/<hash>/`:
+
+- `original.jpg`: re-encoded with EXIF (GPS position, camera, ...) stripped and the
+  EXIF orientation applied.
+- `<size>.jpg` and `<size>.webp` for each entry in PROFILE_PICTURE_SIZES.
+
+Pictures are keyed by content hash, so a picture that was already processed is
+assigned at once and costs no work. The previous picture stays visible until the new
+one is ready. URLs are derived from the hash alone, so serializing a profile never
+touches storage or the ProfilePicture table.
+"""
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+from rest_framework.exceptions import ValidationError
+from api.db.routers import pin_to_primary
+from api.models import ProfilePicture, UserProfile
+from api.tasks.registry import task
+from api.utils.logger import log_error, log_info
+
+ACCEPTED_FORMATS = ('JPEG', 'PNG', 'WEBP')
+PICTURE_ROOT = 'profile_pics'
+
+def upload_profile_picture(pk, uploaded):
+    """
+    Stores an uploaded picture for profile `pk` and returns its ProfilePicture.
+
+    A picture whose content was uploaded before is reused as is: if it is ready, it is
+    shown on the profile immediately. A new one is queued for processing once the
+    transaction commits, and the profile switches to it when processing finishes.
+    """
+    content_hash = getattr(uploaded, 'content_hash', None) or _hash_file(uploaded)
+    _check_image(uploaded)
+
+    # Replica reads of this profile stay on the primary until the change has replicated
+    pin_to_primary(f"profile:{pk}")
+    with transaction.atomic():
+        # The row lock orders this against a worker finishing the same picture
+        picture, created = ProfilePicture.objects.select_for_update().get_or_create(content_hash=content_hash)
+        if created or picture.status == ProfilePicture.FAILED:
+            _store(_incoming_path(content_hash), uploaded)
+            if picture.status == ProfilePicture.FAILED:
+                picture.status = ProfilePicture.PENDING
+                picture.save(update_fields=['status'])
+            process_profile_picture.enqueue(content_hash)
+
+        if picture.status == ProfilePicture.READY:
+            changes = {
+                'picture': picture, 'pending_picture': None, 'profile_picture': _original_path(content_hash),
+                **UserProfile.new_version(),
+            }
+        else:
+            changes = {'pending_picture': picture}
+        if not UserProfile.objects.filter(pk=pk).update(**changes):
+            raise UserProfile.DoesNotExist()
+        transaction.on_commit(lambda: _invalidate_profiles([pk]))
+    return picture
+
+@task(lane='default')
+def process_profile_picture(content_hash):
+    """
+    Decodes an incoming picture, writes the stripped original and every size variant,
+    and moves the profiles waiting for it onto it. Returns the final status. A picture
+    that can't be decoded is marked failed rather than retried.
+    """
+    picture = ProfilePicture.objects.get(pk=content_hash)
+    if picture.status == ProfilePicture.READY:
+        return picture.status
+
+    try:
+        width, height = _write_variants(content_hash)
+    except Exception as e:
+        log_error("Profile picture %s could not be processed: %s", content_hash, e)
+        with transaction.atomic():
+            ProfilePicture.objects.filter(pk=content_hash).update(status=ProfilePicture.FAILED)
+            UserProfile.objects.filter(pending_picture_id=content_hash).update(pending_picture=None)
+        return ProfilePicture.FAILED
+
+    with transaction.atomic():
+        ProfilePicture.objects.filter(pk=content_hash).update(
+            status=ProfilePicture.READY, width=width, height=height, processed_at=timezone.now(),
+        )
+        waiting = list(UserProfile.objects.filter(pending_picture_id=content_hash).values_list('pk', flat=True))
+        UserProfile.objects.filter(pk__in=waiting).update(
+            picture_id=content_hash, pending_picture=None, profile_picture=_original_path(content_hash),
+            **UserProfile.new_version(),
+        )
+        transaction.on_commit(lambda: _invalidate_profiles(waiting))
+    default_storage.delete(_incoming_path(content_hash))
+    log_info("Profile picture %s processed for %s profiles", content_hash, len(waiting))
+    return ProfilePicture.READY
+
+def picture_urls(content_hash):
+    """
+    Returns {'original': url, <size>: {'jpeg': url, 'webp': url}, ...} for a processed
+    picture, or None when there is no picture.
+    """
+    if not content_hash:
+        return None
+    if isinstance(default_storage, FileSystemStorage):
+        # File URLs are the directory URL plus the file name: one urljoin, not seven
+        base = default_storage.url(f"{PICTURE_ROOT}/{content_hash[:2]}/{content_hash}/")
+        url = lambda path: base + path.rpartition('/')[2]
+    else:
+        url = default_storage.url
+    urls = {'original': url(_original_path(content_hash))}
+    for name in settings.PROFILE_PICTURE_SIZES:
+        urls[name] = {
+            'jpeg': url(_variant_path(content_hash, name, 'jpg')),
+            'webp': url(_variant_path(content_hash, name, 'webp')),
+        }
+    return urls
+
+def _write_variants(content_hash):
+    max_dimension = settings.PROFILE_PICTURE_MAX_DIMENSION
+    with default_storage.open(_incoming_path(content_hash)) as source:
+        image = Image.open(source)
+        # JPEGs decode straight at a reduced scale when far larger than needed
+        image.draft('RGB', (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+    # Nothing from the upload's metadata (EXIF, XMP, comments) is written back out
+    image.info = {}
+    image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    width, height = image.size
+    _save_encoded(_original_path(content_hash), _flatten(image), 'JPEG')
+
+    # Largest first, each variant downscaled from the previous one
+    variant = image
+    for name, size in sorted(settings.PROFILE_PICTURE_SIZES.items(), key=lambda item: -item[1]):
+        variant = variant.copy()
+        variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+        _save_encoded(_variant_path(content_hash, name, 'jpg'), _flatten(variant), 'JPEG')
+        _save_encoded(_variant_path(content_hash, name, 'webp'), variant, 'WEBP')
+    return width, height
+
+def _save_encoded(path, image, image_format):
+    buffer = io.BytesIO()
+    if image_format == 'JPEG':
+        image.save(buffer, 'JPEG', quality=settings.PROFILE_PICTURE_JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, 'WEBP', quality=settings.PROFILE_PICTURE_WEBP_QUALITY, method=4)
+    _store(path, ContentFile(buffer.getvalue()))
+
+def _flatten(image):
+    # JPEG has no alpha channel: composite transparent pictures onto white
+    if image.mode != 'RGBA':
+        return image
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+def _check_image(uploaded):
+    """
+    Rejects files that are not a supported image or are too large to decode, reading
+    only the header.
+    """
+    try:
+        with Image.open(uploaded) as image:
+            image_format, (width, height) = image.format, image.size
+    except (Image.DecompressionBombError, OSError, ValueError):
+        raise ValidationError("The picture must be a JPEG, PNG or WebP image.")
+    finally:
+        uploaded.seek(0)
+    if image_format not in ACCEPTED_FORMATS:
+        raise ValidationError("The picture must be a JPEG, PNG or WebP image.")
+    if width * height > settings.PROFILE_PICTURE_MAX_PIXELS:
+        raise ValidationError("The picture's dimensions are too large.")
+
+def _store(path, content):
+    # Paths are content addressed, so an existing file never differs: replace leftovers
+    # of an interrupted job rather than letting storage pick a new name
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    default_storage.save(path, content)
+
+def _hash_file(uploaded):
+    digest = hashlib.sha256()
+    for chunk in uploaded.chunks():
+        digest.update(chunk)
+    uploaded.seek(0)
+    return digest.hexdigest()
+
+def _invalidate_profiles(pks):
+    from api.services.user_profile_service import invalidate_user_profile_cache
+    for pk in pks:
+        invalidate_user_profile_cache(pk)
+
+def _incoming_path(content_hash):
+    return f"{PICTURE_ROOT}/incoming/{content_hash}"
+
+def _original_path(content_hash):
+    return f"{PICTURE_ROOT}/{content_hash[:2]}/{content_hash}/original.jpg"
+
+def _variant_path(content_hash, name, extension):
+    return f"{PICTURE_ROOT}/{content_hash[:2]}/{content_hash}/{name}.{extension}"
+
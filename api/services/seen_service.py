@@ -0,0 +1,108 @@
+"""
+Per-user seen sets: the profiles a user has swiped, as a Bloom filter.
+
+Discovery has to drop every profile the searcher already swiped. Excluding them in
+SQL (NOT IN over the user's Swipe rows) costs more with every swipe they make; the
+seen set is one primary-key read of a blob of about 3 bytes per swipe, and each
+candidate is then checked in constant time. The price is false positives: a profile
+the user never swiped is hidden from them with a probability of up to about
+2 * SEEN_SET_ERROR_RATE. Filters are salted with their owner's ID, so which profiles
+are hidden differs from user to user.
+
+Sets are updated in the transaction that writes the swipes (record_seen, called by
+save_swipes): the batch's rows are locked, the new targets added and the rows
+rewritten with one upsert. A user without a built set gets one from their whole
+swipe history, which by then includes the batch. The same swipes are removed from
+the swipers' precomputed feeds, so a feed never lists a profile its owner swiped.
+"""
+from collections import defaultdict
+from itertools import chain
+
+from django.conf import settings
+from django.db import transaction
+from api.models import MatchFeedEntry, SeenSet, Swipe
+from api.utils.bloom import ScalableBloomFilter
+
+
+def new_seen_set(profile_id):
+    return ScalableBloomFilter(settings.SEEN_SET_CAPACITY, settings.SEEN_SET_ERROR_RATE, salt=profile_id)
+
+def load_seen_set(data):
+    return ScalableBloomFilter.from_bytes(data, settings.SEEN_SET_ERROR_RATE)
+
+def get_seen_set(profile_id):
+    """
+    Returns the profile's seen set; an empty one if it has never swiped.
+    """
+    data = SeenSet.objects.filter(pk=profile_id).values_list('bloom', flat=True).first()
+    return load_seen_set(data) if data else new_seen_set(profile_id)
+
+def record_seen(pairs):
+    """
+    Adds each (swiper, target) pair to the swiper's seen set and removes the target
+    from the swiper's stored feed. Runs inside the transaction that writes the swipes.
+    """
+    targets = defaultdict(list)
+    for swiper, target in pairs:
+        targets[swiper].append(target)
+    if not targets:
+        return
+
+    rows = _locked_rows(targets)
+    _store(rows, targets, rebuild={pk for pk, row in rows.items() if not row.bloom})
+
+    # The in x in query can also return other swipers' targets; the exact pairs are
+    # picked here, as one OR branch per swiper is slow to build for a large batch
+    pairs = {(swiper, target) for swiper, swiped in targets.items() for target in swiped}
+    entries = MatchFeedEntry.objects.filter(
+        owner_id__in=list(targets), candidate_id__in={target for _, target in pairs},
+    ).values_list('pk', 'owner_id', 'candidate_id')
+    stale = [pk for pk, owner, candidate in entries if (owner, candidate) in pairs]
+    if stale:
+        MatchFeedEntry.objects.filter(pk__in=stale).delete()
+
+def rebuild_seen_sets(profile_ids):
+    """
+    Rebuilds the profiles' seen sets from their swipe history. Returns the rebuilt
+    sets' sizes in bytes.
+    """
+    with transaction.atomic():
+        rows = _locked_rows(profile_ids)
+        _store(rows, {}, rebuild=set(rows))
+    return [len(row.bloom) for row in rows.values()]
+
+def _locked_rows(profile_ids):
+    """
+    Locks the profiles' SeenSet rows, inserting empty ones first where there are none,
+    so writers of the same user take turns even on a user's first swipes.
+    """
+    def lock(pks):
+        rows = SeenSet.objects.select_for_update().filter(profile_id__in=pks).order_by('profile_id')
+        return {row.profile_id: row for row in rows}
+
+    rows = lock(profile_ids)
+    missing = set(profile_ids) - rows.keys()
+    if missing:
+        SeenSet.objects.bulk_create([SeenSet(profile_id=pk) for pk in sorted(missing)], ignore_conflicts=True)
+        rows.update(lock(missing))
+    return rows
+
+def _store(rows, targets, rebuild):
+    """
+    Adds `targets` to the locked rows' filters and saves them. Rows in `rebuild` start
+    over from the swipe history instead. Read after the lock is held, the history has
+    every swipe committed before ours and the ones after will wait for us.
+    """
+    history = defaultdict(list)
+    if rebuild:
+        for swiper, target in Swipe.objects.filter(swiper_id__in=rebuild).values_list('swiper_id', 'target_id'):
+            history[swiper].append(target)
+
+    for pk, row in rows.items():
+        seen = new_seen_set(pk) if pk in rebuild else load_seen_set(row.bloom)
+        seen.add_many(list(chain(history[pk], targets.get(pk, ()))))
+        row.bloom = seen.to_bytes()
+    # An upsert rather than bulk_update, whose CASE per row is slow to build
+    SeenSet.objects.bulk_create(
+        rows.values(), update_conflicts=True, unique_fields=['profile'], update_fields=['bloom'],
+    )
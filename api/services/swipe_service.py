@@ -0,0 +1,264 @@
+"""
+Swipe ingestion and mutual-match detection.
+
+Swipe requests only hand their decisions to the process-wide SwipeBuffer and return.
+A flusher thread writes the buffer with one upserting bulk_create per SWIPE_BATCH_SIZE
+swipes, or SWIPE_FLUSH_INTERVAL seconds after the oldest pending swipe arrived. If
+SWIPE_MAX_PENDING swipes pile up (the database is slower than the incoming rate), the
+submitting request writes a batch itself, which slows clients down instead of letting
+the buffer grow without bound. Swipes still in the buffer when the process dies are
+lost; at most one flush interval's worth under normal load.
+
+Mutual likes are found per batch, not per swipe: after the batch commits, one query
+on the (swiper, target) unique index fetches the likes pointing back at the batch's
+likes. Running it after the commit means that of two processes writing A->B and B->A
+at the same time, the later committer always sees the other like. New matches are
+stored and announced with the `match_created` signal once they commit. Both
+processes can announce the same match in that race, so receivers should treat the
+signal as at-least-once.
+"""
+import atexit
+import threading
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from api.models import Match, Swipe, UserProfile
+from api.services.seen_service import record_seen
+from api.utils.logger import log_error, log_info
+from api.utils.metrics import registry
+
+# Sent with `matches`, the list of Match rows created by one batch
+match_created = Signal()
+
+SWIPES_WRITTEN = registry.counter('swipes_written_total', "Swipes written to the database.")
+SWIPES_DROPPED = registry.counter(
+    'swipes_dropped_total', "Swipes lost because their batch failed twice or named unknown profiles.")
+MATCHES_CREATED = registry.counter('matches_created_total', "Mutual matches detected.")
+SWIPE_FLUSH_SECONDS = registry.histogram('swipe_flush_seconds', "Time to write one batch of swipes.")
+SWIPE_FLUSH_DELAY_SECONDS = registry.histogram(
+    'swipe_flush_delay_seconds', "Age of the oldest swipe of a batch when the batch was written.")
+
+
+def submit_swipes(swiper_id, swipes):
+    """
+    Validates a list of {"target": profile ID, "liked": bool} decisions by `swiper_id`
+    and queues them for the next flush. Returns the number queued.
+    """
+    if not isinstance(swipes, list) or not swipes:
+        raise ValidationError("Send at least one swipe.")
+    if len(swipes) > settings.SWIPE_MAX_PER_REQUEST:
+        raise ValidationError(f"Send at most {settings.SWIPE_MAX_PER_REQUEST} swipes per request.")
+
+    decisions = []
+    for swipe in swipes:
+        target, liked = (swipe.get('target'), swipe.get('liked')) if isinstance(swipe, dict) else (None, None)
+        if not isinstance(target, int) or isinstance(target, bool) or not isinstance(liked, bool):
+            raise ValidationError("Each swipe needs an integer 'target' and a boolean 'liked'.")
+        if target == swiper_id:
+            raise ValidationError("You cannot swipe on your own profile.")
+        decisions.append((target, liked))
+
+    buffer = get_swipe_buffer()
+    for target, liked in decisions:
+        buffer.submit(swiper_id, target, liked)
+    return len(decisions)
+
+def save_swipes(swipes):
+    """
+    Writes a batch of Swipe instances and returns the matches it completed.
+
+    Swipes naming deleted or unknown profiles are dropped, and only the last decision
+    per pair is kept, so a bad or repeated swipe can't fail the batch. Each pair's
+    row is inserted, or updated when the pair was swiped before, and the swipers'
+    seen sets are updated in the same transaction.
+    """
+    latest = {(swipe.swiper_id, swipe.target_id): swipe for swipe in swipes}
+    profile_ids = {pk for pair in latest for pk in pair}
+    existing = set(UserProfile.objects.filter(pk__in=profile_ids).values_list('pk', flat=True))
+    valid = [swipe for (swiper, target), swipe in latest.items() if swiper in existing and target in existing]
+    if len(valid) < len(latest):
+        SWIPES_DROPPED.inc(len(latest) - len(valid))
+
+    with transaction.atomic():
+        Swipe.objects.bulk_create(
+            valid, update_conflicts=True, unique_fields=['swiper', 'target'], update_fields=['liked', 'created_at'],
+        )
+        record_seen((swipe.swiper_id, swipe.target_id) for swipe in valid)
+    SWIPES_WRITTEN.inc(len(valid))
+    return _create_matches([(swipe.swiper_id, swipe.target_id) for swipe in valid if swipe.liked])
+
+def _create_matches(likes):
+    """
+    Stores the matches completed by `likes` ((swiper, target) pairs just committed)
+    and returns the new ones. Two queries in all: the reverse likes, then the matches
+    that already exist; plus the insert when something is new.
+    """
+    if not likes:
+        return []
+    # Can also return likes between profiles of two different swipes of the batch
+    # (filtered out below). Among a large population those are rare, and this stays one
+    # index range scan per target instead of one OR branch per pair.
+    reverse = set(
+        Swipe.objects.filter(
+            swiper_id__in={target for _, target in likes}, target_id__in={swiper for swiper, _ in likes}, liked=True,
+        ).values_list('swiper_id', 'target_id')
+    )
+    pairs = {(min(swiper, target), max(swiper, target)) for swiper, target in likes if (target, swiper) in reverse}
+    if not pairs:
+        return []
+
+    pairs -= set(
+        Match.objects.filter(
+            profile_a_id__in={profile_a for profile_a, _ in pairs}, profile_b_id__in={profile_b for _, profile_b in pairs},
+        ).values_list('profile_a_id', 'profile_b_id')
+    )
+    if not pairs:
+        return []
+
+    matches = [Match(profile_a_id=profile_a, profile_b_id=profile_b) for profile_a, profile_b in sorted(pairs)]
+    with transaction.atomic():
+        # A concurrent flush may have stored one of them in the meantime
+        Match.objects.bulk_create(matches, ignore_conflicts=True)
+        transaction.on_commit(lambda: match_created.send(sender=Match, matches=matches))
+    MATCHES_CREATED.inc(len(matches))
+    log_info("%s mutual matches created", len(matches))
+    return matches
+
+
+class SwipeBuffer:
+    """
+    Thread-safe buffer of pending swipes with a flusher thread (see the module docstring).
+    """
+    def __init__(self, batch_size=None, flush_interval=None, max_pending=None):
+        self.batch_size = batch_size or settings.SWIPE_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.SWIPE_FLUSH_INTERVAL
+        self.max_pending = max_pending or settings.SWIPE_MAX_PENDING
+        # (swiper, target) -> (liked, swiped at, monotonic enqueue time). A new swipe of a
+        # pending pair replaces the decision but keeps the enqueue time and position, so
+        # the first entry is always the oldest.
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def submit(self, swiper_id, target_id, liked):
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("The swipe buffer is stopped.")
+            previous = self._pending.get((swiper_id, target_id))
+            enqueued = previous[2] if previous else time.monotonic()
+            self._pending[(swiper_id, target_id)] = (liked, timezone.now(), enqueued)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='swipe-flusher', daemon=True)
+                self._thread.start()
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+            overloaded = len(self._pending) >= self.max_pending
+        if overloaded:
+            self._write(self._take())
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    def flush(self):
+        """
+        Writes everything pending now; returns the number of swipes taken.
+        """
+        taken = 0
+        while True:
+            batch = self._take()
+            if not batch:
+                return taken
+            self._write(batch)
+            taken += len(batch)
+
+    def stop(self):
+        """
+        Stops the flusher thread after it has written what is pending.
+        """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def _take(self):
+        with self._cond:
+            if len(self._pending) <= self.batch_size:
+                batch, self._pending = self._pending, {}
+            else:
+                batch = dict(islice(self._pending.items(), self.batch_size))
+                for pair in batch:
+                    del self._pending[pair]
+        return batch
+
+    def _write(self, batch):
+        if not batch:
+            return
+        started = time.monotonic()
+        SWIPE_FLUSH_DELAY_SECONDS.observe(started - next(iter(batch.values()))[2])
+        swipes = [
+            Swipe(swiper_id=swiper, target_id=target, liked=liked, created_at=swiped_at)
+            for (swiper, target), (liked, swiped_at, _) in batch.items()
+        ]
+        for attempt in (1, 2):
+            try:
+                save_swipes(swipes)
+                break
+            except Exception as e:
+                if attempt == 2:
+                    SWIPES_DROPPED.inc(len(batch))
+                    log_error("Dropped a batch of %s swipes after a retry: %s", len(batch), e)
+                else:
+                    log_error("Writing %s swipes failed, retrying: %s", len(batch), e)
+        SWIPE_FLUSH_SECONDS.observe(time.monotonic() - started)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return  # stop() writes the rest
+                # A full batch, or the oldest swipe reaching the flush interval
+                while self._pending and len(self._pending) < self.batch_size and not self._stopped:
+                    remaining = next(iter(self._pending.values()))[2] + self.flush_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            # This thread holds its own connection; drop it when it goes stale
+            close_old_connections()
+            self._write(self._take())
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_swipe_buffer():
+    """
+    Returns the process-wide swipe buffer, created on first use.
+    """
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = SwipeBuffer()
+    return _buffer
+
+def stop_swipe_buffer():
+    """
+    Writes the pending swipes; registered to run at interpreter exit.
+    """
+    if _buffer is not None:
+        _buffer.stop()
+
+atexit.register(stop_swipe_buffer)
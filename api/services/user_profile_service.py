@@ -1,12 +1,291 @@
+import asyncio
+import datetime
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from api.models import UserProfile
+from api.serializers import UserProfileSerializer
+from api.services.match_service import refresh_match_feed
+from api.utils.metrics import registry
 from django.contrib.auth.models import User
 from rest_framework.exceptions import ValidationError
+from api.utils.pagination import decode_cursor, keyset_page
+from api.db.routers import pin_to_primary, replica_reads
+
+# Columns UserProfileSerializer reads; everything else (coordinates, password hash, ...) is left in the database
+PROFILE_LIST_FIELDS = (
+    'id', 'bio', 'age', 'gender', 'location', 'profile_picture', 'picture', 'role', 'zipcode', 'birthday',
+    'looking_for', 'distance', 'version', 'updated_at', 'user__id', 'user__username', 'user__email',
+)
+GENDER_CHOICES = ('male', 'female')
+# Part of the profile cache keys; bump it when the serialized shape changes so entries
+# written by the previous release are never served
+PROFILE_PAYLOAD_FORMAT = 2
+
+PROFILE_CACHE_REQUESTS = registry.counter(
+    'profile_cache_requests_total', "Serialized profile cache lookups by result (hit, miss, wait).", ['result'])
+
+
+class VersionConflict(Exception):
+    """
+    Raised by update_user_profile when the profile is no longer at the version the
+    client last read (a failed If-Match).
+    """
+    def __init__(self, current_version, updated_at):
+        super().__init__(f"Profile is at version {current_version}.")
+        self.current_version = current_version
+        self.updated_at = updated_at
+
 
 def get_user_profile_by_id(pk):
     """
-    Fetches the user profile by ID.
+    Fetches the user profile by ID, from a replica unless it was just written.
+    """
+    with replica_reads(_profile_pin_key(pk)):
+        return UserProfile.objects.get(pk=pk)
+
+def get_user_profile_for_user(user):
+    """
+    Fetches the profile of the authenticated user, using the token's `profile_id` claim
+    when present so the lookup is by primary key.
+    """
+    profile_id = getattr(user, 'profile_id', None)
+    if profile_id is not None:
+        return get_user_profile_by_id(profile_id)
+    return UserProfile.objects.get(user_id=user.pk)
+
+def get_serialized_user_profile(pk):
+    """
+    Returns the UserProfileSerializer payload for a profile, read through the cache.
+
+    Entries are keyed by profile ID and a per-profile version token, so invalidating only
+    swaps the token. On a miss a single reader recomputes (guarded by a cache lock) while
+    concurrent readers wait for its result instead of all hitting the database.
+    Raises UserProfile.DoesNotExist for unknown IDs.
+    """
+    key = _profile_cache_key(pk)
+    payload = cache.get(key)
+    if payload is not None:
+        PROFILE_CACHE_REQUESTS.inc(result='hit')
+        return payload
+
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, 1, timeout=settings.PROFILE_CACHE_LOCK_TIMEOUT):
+        # Someone else is recomputing: wait for their result, then fall back to our own
+        PROFILE_CACHE_REQUESTS.inc(result='wait')
+        deadline = time.monotonic() + settings.PROFILE_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(0.02)
+            payload = cache.get(key)
+            if payload is not None:
+                return payload
+        return _serialize_profile(pk)
+
+    PROFILE_CACHE_REQUESTS.inc(result='miss')
+    try:
+        payload = _serialize_profile(pk)
+        cache.set(key, payload, timeout=settings.PROFILE_CACHE_TIMEOUT)
+        return payload
+    finally:
+        cache.delete(lock_key)
+
+def get_serialized_user_profiles(pks):
+    """
+    Returns {pk: payload} for a batch of profile IDs, through the same cache entries as
+    get_serialized_user_profile. The cached payloads of the whole batch cost two
+    get_many round trips; the rest are loaded in one select_related query, serialized
+    together and cached with one set_many. IDs of unknown profiles are left out.
+
+    There is no single-flight lock here: a batch that misses just loads its rows.
+    """
+    keys = _profile_cache_keys(pks)
+    cached = cache.get_many(keys.values())
+    payloads = {pk: cached[key] for pk, key in keys.items() if key in cached}
+    missing = [pk for pk in keys if pk not in payloads]
+    PROFILE_CACHE_REQUESTS.inc(len(payloads), result='hit')
+    if not missing:
+        return payloads
+
+    PROFILE_CACHE_REQUESTS.inc(len(missing), result='miss')
+    with replica_reads(*map(_profile_pin_key, missing)):
+        profiles = list(UserProfile.objects.select_related('user').in_bulk(missing).values())
+    loaded = dict(zip((profile.pk for profile in profiles), UserProfileSerializer.serialize_many(profiles)))
+    cache.set_many({keys[pk]: payload for pk, payload in loaded.items()}, timeout=settings.PROFILE_CACHE_TIMEOUT)
+    payloads.update(loaded)
+    return payloads
+
+def get_user_profile_validators(pk):
+    """
+    Returns (version, updated_at) of a profile, which conditional requests are checked
+    against. Read from the cache, keyed like the payload so the same invalidation drops
+    it, or else from two columns of the profile row: the profile is neither joined with
+    its user nor serialized. Raises UserProfile.DoesNotExist for unknown IDs.
     """
-    return UserProfile.objects.get(pk=pk)
+    key = f"{_profile_cache_key(pk)}:validators"
+    validators = cache.get(key)
+    if validators is None:
+        with replica_reads(_profile_pin_key(pk)):
+            validators = UserProfile.objects.filter(pk=pk).values_list('version', 'updated_at').get()
+        cache.set(key, validators, timeout=settings.PROFILE_CACHE_TIMEOUT)
+    return validators
+
+async def aget_user_profile_validators(pk):
+    """
+    Async entry point for get_user_profile_validators (cache and row read in one thread hop).
+    """
+    return await sync_to_async(get_user_profile_validators)(pk)
+
+async def aget_serialized_user_profile(pk):
+    """
+    Async variant of get_serialized_user_profile: the same cache entries and single-flight
+    lock, with the database read on the async ORM and waits on asyncio.sleep.
+    """
+    # The version and payload reads share one thread hop (cache backends are sync)
+    key, payload = await sync_to_async(_read_profile_cache)(pk)
+    if payload is not None:
+        PROFILE_CACHE_REQUESTS.inc(result='hit')
+        return payload
+
+    lock_key = f"{key}:lock"
+    if not await cache.aadd(lock_key, 1, timeout=settings.PROFILE_CACHE_LOCK_TIMEOUT):
+        PROFILE_CACHE_REQUESTS.inc(result='wait')
+        deadline = time.monotonic() + settings.PROFILE_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+            payload = await cache.aget(key)
+            if payload is not None:
+                return payload
+        return await _aserialize_profile(pk)
+
+    PROFILE_CACHE_REQUESTS.inc(result='miss')
+    try:
+        payload = await _aserialize_profile(pk)
+        await cache.aset(key, payload, timeout=settings.PROFILE_CACHE_TIMEOUT)
+        return payload
+    finally:
+        await cache.adelete(lock_key)
+
+async def acreate_user_profile(data):
+    """
+    Async entry point for create_user_profile (one transaction, run via sync_to_async).
+    """
+    return await sync_to_async(create_user_profile)(data)
+
+async def aupdate_user_profile(pk, data, if_match=None):
+    """
+    Async entry point for update_user_profile. The profile is returned with its user
+    loaded, so serializing it doesn't query from the event loop.
+    """
+    return await sync_to_async(update_user_profile)(pk, data, if_match)
+
+def invalidate_user_profile_cache(pk):
+    """
+    Drops the cached payload for a profile by giving it a new version token.
+    """
+    cache.set(_profile_version_key(pk), time.time_ns(), timeout=None)
+
+def _serialize_profile(pk):
+    profile = UserProfile.objects.select_related('user').get(pk=pk)
+    return UserProfileSerializer.serialize(profile)
+
+async def _aserialize_profile(pk):
+    profile = await UserProfile.objects.select_related('user').aget(pk=pk)
+    return UserProfileSerializer.serialize(profile)
+
+def _profile_cache_key(pk):
+    version_key = _profile_version_key(pk)
+    version = cache.get(version_key)
+    if version is None:
+        # A fresh token, never 1, so an evicted version can't revive an old payload
+        cache.add(version_key, time.time_ns(), timeout=None)
+        version = cache.get(version_key)
+    return _payload_key(pk, version)
+
+def _profile_cache_keys(pks):
+    """
+    Batch form of _profile_cache_key: {pk: key} with the version tokens read in one get_many.
+    """
+    version_keys = {pk: _profile_version_key(pk) for pk in pks}
+    versions = cache.get_many(version_keys.values())
+    for version_key in version_keys.values():
+        if version_key not in versions:
+            cache.add(version_key, time.time_ns(), timeout=None)
+            versions[version_key] = cache.get(version_key)
+    return {pk: _payload_key(pk, versions[key]) for pk, key in version_keys.items()}
+
+def _payload_key(pk, version):
+    return f"profile:{pk}:v{version}:f{PROFILE_PAYLOAD_FORMAT}"
+
+def _read_profile_cache(pk):
+    key = _profile_cache_key(pk)
+    return key, cache.get(key)
+
+def _profile_pin_key(pk):
+    return f"profile:{pk}"
+
+def _profile_version_key(pk):
+    return f"profile:{pk}:version"
+
+def list_user_profiles(filters, cursor=None, page_size=None):
+    """
+    Returns (profiles, next_cursor) for one page of profiles, newest first.
+
+    Pagination is keyset based: each page seeks past the last seen ID instead of using
+    OFFSET, so every page costs the same index range scan regardless of its depth.
+    `filters` may contain gender, looking_for, min_age and max_age.
+    """
+    page_size = min(page_size or settings.PROFILE_LIST_PAGE_SIZE, settings.PROFILE_LIST_MAX_PAGE_SIZE)
+    position = decode_cursor(cursor, ['id'])
+
+    queryset = profile_list_queryset(filters)
+    if position:
+        queryset = queryset.filter(id__lt=position['id'])
+    with replica_reads():
+        rows = list(queryset[:page_size + 1])
+    return keyset_page(rows, page_size, lambda profile: {'id': profile.id})
+
+def profile_list_queryset(filters):
+    """
+    The filtered, ordered queryset behind list_user_profiles, before the keyset seek.
+    """
+    queryset = UserProfile.objects.select_related('user').only(*PROFILE_LIST_FIELDS).order_by('-id')
+    for field in ('gender', 'looking_for'):
+        value = filters.get(field)
+        if value:
+            if value not in GENDER_CHOICES:
+                raise ValidationError(f"{field} must be one of: {', '.join(GENDER_CHOICES)}.")
+            queryset = queryset.filter(**{field: value})
+
+    min_age = _parse_age(filters.get('min_age'), 'min_age')
+    max_age = _parse_age(filters.get('max_age'), 'max_age')
+    today = datetime.date.today()
+    if min_age is not None:
+        queryset = queryset.filter(birthday__lte=_years_before(today, min_age))
+    if max_age is not None:
+        # Still max_age until the day before turning max_age + 1
+        queryset = queryset.filter(birthday__gt=_years_before(today, max_age + 1))
+    return queryset
+
+def _parse_age(value, name):
+    if value in (None, ''):
+        return None
+    try:
+        age = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"{name} must be a whole number.")
+    if age < 0 or age > 150:
+        raise ValidationError(f"{name} must be between 0 and 150.")
+    return age
+
+def _years_before(day, years):
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        # 29 February in a non-leap target year
+        return day.replace(year=day.year - years, day=28)
 
 def create_user_profile(data):
     """
@@ -18,50 +297,66 @@ def create_user_profile(data):
     email = user_data.get('email')
     password = user_data.get('password')
     
-    # Check if user already exists
-    if User.objects.filter(email=email).exists():
-        raise ValidationError("A user with this email already exists.")
-    
-    # Create User
-    user = User.objects.create(username=username, email=email)
-    user.set_password(password)
-    user.save()
-
-    # Create Profile
-    profile = UserProfile.objects.create(
-        user=user,
-        bio=data.get('bio', ''),
-        age=data.get('age'),
-        gender=data.get('gender'),
-        location=data.get('location'),
-        zipcode=data.get('zipcode'),
-        birthday=data.get('birthday'),
-        looking_for=data.get('looking_for'),
-        distance=data.get('distance')
-    )
-    return profile
+    with transaction.atomic():
+        # Check if user already exists
+        if User.objects.filter(email=email).exists():
+            raise ValidationError("A user with this email already exists.")
+
+        # Create User; the post_save signal inserts the profile with the staged fields
+        user = User(username=username, email=email)
+        user.set_password(password)
+        user.profile_data = {
+            'bio': data.get('bio', ''),
+            'age': data.get('age'),
+            'gender': data.get('gender'),
+            'location': data.get('location'),
+            'zipcode': data.get('zipcode'),
+            'birthday': data.get('birthday'),
+            'looking_for': data.get('looking_for'),
+            'distance': data.get('distance')
+        }
+        user.save()
+        refresh_match_feed.enqueue(user.profile.pk)
 
-def update_user_profile(pk, data):
+    pin_to_primary(_profile_pin_key(user.profile.pk))
+    return user.profile
+
+def update_user_profile(pk, data, if_match=None):
     """
     Updates an existing UserProfile.
+
+    `if_match` is the collection of versions the client accepts (from If-Match). The
+    row is locked while the version is compared, so of two concurrent updates naming
+    the same version, the second raises VersionConflict instead of overwriting the first.
+    When a field matching depends on changed, rebuilding the owner's match feed is queued.
     """
-    profile = UserProfile.objects.get(pk=pk)
-    
-    # Update profile fields
-    profile.bio = data.get('bio', profile.bio)
-    profile.age = data.get('age', profile.age)
-    profile.gender = data.get('gender', profile.gender)
-    profile.location = data.get('location', profile.location)
-    profile.zipcode = data.get('zipcode', profile.zipcode)
-    profile.birthday = data.get('birthday', profile.birthday)
-    profile.looking_for = data.get('looking_for', profile.looking_for)
-    profile.distance = data.get('distance', profile.distance)
-    
-    # Update User fields (optional)
-    user_data = data.get('user', {})
-    profile.user.username = user_data.get('username', profile.user.username)
-    profile.user.email = user_data.get('email', profile.user.email)
-    profile.user.save()
-    
-    profile.save()
+    # Replica reads of this profile stay on the primary until the update has replicated
+    pin_to_primary(_profile_pin_key(pk))
+    with transaction.atomic():
+        profile = UserProfile.objects.select_for_update(of=('self',)).select_related('user').get(pk=pk)
+        if if_match is not None and profile.version not in if_match:
+            raise VersionConflict(profile.version, profile.updated_at)
+
+        # Update profile fields
+        profile.bio = data.get('bio', profile.bio)
+        profile.age = data.get('age', profile.age)
+        profile.gender = data.get('gender', profile.gender)
+        profile.location = data.get('location', profile.location)
+        profile.zipcode = data.get('zipcode', profile.zipcode)
+        profile.birthday = data.get('birthday', profile.birthday)
+        profile.looking_for = data.get('looking_for', profile.looking_for)
+        profile.distance = data.get('distance', profile.distance)
+
+        # Update User fields (optional)
+        user_data = data.get('user', {})
+        user = profile.user
+        username, email = user_data.get('username', user.username), user_data.get('email', user.email)
+        if (username, email) != (user.username, user.email):
+            user.username, user.email = username, email
+            user.save(update_fields=['username', 'email'])
+
+        match_changed = profile.match_fields_changed()
+        profile.save()
+        if match_changed:
+            refresh_match_feed.enqueue(profile.pk)
     return profile
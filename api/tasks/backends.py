@@ -0,0 +1,251 @@
+"""
+Task queues. TASK_BACKEND selects one:
+
+- LocalTaskBackend runs tasks on a few threads of the process that enqueued them. It
+  needs nothing deployed, but tasks still queued when the process exits are lost and
+  idempotency keys are only remembered by that process.
+- DatabaseTaskBackend stores tasks as QueuedTask rows, run by the run_task_workers
+  process pool. Enqueueing inside a transaction commits or rolls back with it, and
+  tasks survive restarts. Workers claim with SELECT ... FOR UPDATE SKIP LOCKED, so any
+  number of them share the table without handing out a task twice.
+
+Another backend implements enqueue() and, if run_task_workers should drive it, sets
+`external_workers` and implements claim(), complete(), retry(), fail(),
+requeue_expired() and prune().
+"""
+import datetime
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from api.models import QueuedTask
+from api.tasks.registry import lane_priority
+from api.tasks.worker import execute
+from api.utils.logger import log_error
+from api.utils.metrics import registry
+
+TASKS_ENQUEUED = registry.counter(
+    'tasks_enqueued_total', "Task enqueues by task and result (queued, duplicate).", ['task', 'result'])
+
+# Idempotency keys LocalTaskBackend remembers; the oldest are forgotten first
+LOCAL_MAX_KEYS = 10_000
+
+
+class BaseTaskBackend:
+    external_workers = False  # Tasks are run by run_task_workers rather than by the backend itself
+
+    def enqueue(self, job):
+        """
+        Queues `job`, an unsaved QueuedTask, and returns it; or, when its idempotency key
+        is already known, returns the task queued with that key.
+        """
+        raise NotImplementedError
+
+    def claim(self, lanes):
+        """
+        Marks the best ready task of `lanes` as running and returns it, or returns None.
+        """
+        raise NotImplementedError
+
+    def complete(self, job):
+        raise NotImplementedError
+
+    def retry(self, job, error, delay):
+        raise NotImplementedError
+
+    def fail(self, job, error):
+        raise NotImplementedError
+
+    def requeue_expired(self):
+        """
+        Queues again the tasks of workers that died holding them. Returns the number.
+        """
+        raise NotImplementedError
+
+    def prune(self, before):
+        """
+        Deletes tasks that finished before `before`. Returns the number.
+        """
+        raise NotImplementedError
+
+
+class DatabaseTaskBackend(BaseTaskBackend):
+    """
+    Tasks in the QueuedTask table (see the module docstring).
+    """
+    external_workers = True
+
+    def enqueue(self, job):
+        if job.idempotency_key is None:
+            job.save(force_insert=True)
+            TASKS_ENQUEUED.inc(task=job.name, result='queued')
+            return job
+        fields = {
+            field.attname: getattr(job, field.attname) for field in QueuedTask._meta.concrete_fields
+            if not field.primary_key and field.name != 'idempotency_key'
+        }
+        job, created = QueuedTask.objects.get_or_create(idempotency_key=job.idempotency_key, defaults=fields)
+        TASKS_ENQUEUED.inc(task=job.name, result='queued' if created else 'duplicate')
+        return job
+
+    def claim(self, lanes):
+        now = timezone.now()
+        ready = QueuedTask.objects.filter(
+            status=QueuedTask.QUEUED, priority__in=[lane_priority(lane) for lane in lanes], run_at__lte=now,
+        ).order_by('priority', 'run_at')
+        claimed = {
+            'status': QueuedTask.RUNNING,
+            'attempts': F('attempts') + 1,
+            'locked_until': now + datetime.timedelta(seconds=settings.TASK_LEASE),
+        }
+
+        if connection.features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                job = ready.select_for_update(skip_locked=True).first()
+                if job is None:
+                    return None
+                QueuedTask.objects.filter(pk=job.pk).update(**claimed)
+        else:
+            # No row locks (SQLite): take the first ready task no other worker updated first
+            for job in ready[:10]:
+                if QueuedTask.objects.filter(pk=job.pk, status=QueuedTask.QUEUED).update(**claimed):
+                    break
+            else:
+                return None
+        job.status, job.attempts, job.locked_until = QueuedTask.RUNNING, job.attempts + 1, claimed['locked_until']
+        return job
+
+    def complete(self, job):
+        self._finish(job, status=QueuedTask.SUCCEEDED, finished_at=timezone.now(), last_error='')
+
+    def retry(self, job, error, delay):
+        self._finish(
+            job, status=QueuedTask.QUEUED, run_at=timezone.now() + datetime.timedelta(seconds=delay), last_error=error,
+        )
+
+    def fail(self, job, error):
+        self._finish(job, status=QueuedTask.FAILED, finished_at=timezone.now(), last_error=error)
+
+    def requeue_expired(self):
+        expired = QueuedTask.objects.filter(status=QueuedTask.RUNNING, locked_until__lt=timezone.now())
+        lost = "The worker running this attempt stopped before it finished."
+        failed = expired.filter(attempts__gte=F('max_attempts')).update(
+            status=QueuedTask.FAILED, locked_until=None, finished_at=timezone.now(), last_error=lost,
+        )
+        if failed:
+            log_error("%s tasks failed: their last attempt's worker stopped before finishing", failed)
+        return expired.update(status=QueuedTask.QUEUED, locked_until=None, last_error=lost)
+
+    def prune(self, before):
+        deleted, _ = QueuedTask.objects.filter(finished_at__lt=before).delete()
+        return deleted
+
+    def _finish(self, job, **changes):
+        # A worker whose lease ran out may finish after the task was claimed again: the
+        # attempt count tells its outcome apart from the current attempt's
+        QueuedTask.objects.filter(pk=job.pk, status=QueuedTask.RUNNING, attempts=job.attempts).update(
+            locked_until=None, **changes,
+        )
+
+
+class LocalTaskBackend(BaseTaskBackend):
+    """
+    Tasks run in this process on TASK_LOCAL_WORKERS threads (see the module docstring).
+    Ready tasks wait in a heap ordered by lane, then enqueue order; tasks that are not
+    due yet (delayed, or waiting to be retried) wait in a second heap ordered by due time.
+    """
+    def __init__(self, workers=None):
+        self.workers = workers or settings.TASK_LOCAL_WORKERS
+        self._ready = []  # (priority, sequence, job)
+        self._delayed = []  # (due monotonic time, sequence, job)
+        self._keys = OrderedDict()  # idempotency key -> job
+        self._sequence = itertools.count(1)
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def enqueue(self, job):
+        with self._cond:
+            if job.idempotency_key is not None:
+                existing = self._keys.get(job.idempotency_key)
+                if existing is not None:
+                    TASKS_ENQUEUED.inc(task=job.name, result='duplicate')
+                    return existing
+                self._keys[job.idempotency_key] = job
+                while len(self._keys) > LOCAL_MAX_KEYS:
+                    self._keys.popitem(last=False)
+            job.pk = next(self._sequence)
+        TASKS_ENQUEUED.inc(task=job.name, result='queued')
+        # Work queued by a transaction that rolls back never runs (its key stays taken)
+        transaction.on_commit(lambda: self._push(job, (job.run_at - timezone.now()).total_seconds()))
+        return job
+
+    def complete(self, job):
+        job.status, job.finished_at = QueuedTask.SUCCEEDED, timezone.now()
+
+    def retry(self, job, error, delay):
+        job.status, job.last_error = QueuedTask.QUEUED, error
+        job.run_at = timezone.now() + datetime.timedelta(seconds=delay)
+        self._push(job, delay)
+
+    def fail(self, job, error):
+        job.status, job.last_error, job.finished_at = QueuedTask.FAILED, error, timezone.now()
+
+    def pending(self):
+        with self._cond:
+            return len(self._ready) + len(self._delayed)
+
+    def _push(self, job, delay):
+        with self._cond:
+            if delay > 0:
+                heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._sequence), job))
+            else:
+                heapq.heappush(self._ready, (job.priority, next(self._sequence), job))
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name=f"task-worker-{len(self._threads) + 1}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify()
+
+    def _take(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, sequence, job = heapq.heappop(self._delayed)
+                    heapq.heappush(self._ready, (job.priority, sequence, job))
+                if self._ready:
+                    return heapq.heappop(self._ready)[2]
+                self._cond.wait(self._delayed[0][0] - now if self._delayed else None)
+
+    def _run(self):
+        while True:
+            job = self._take()
+            job.status = QueuedTask.RUNNING
+            job.attempts += 1
+            try:
+                execute(job, self)
+            except Exception as e:
+                log_error("Task %s (%s) could not be run: %s", job.pk, job.name, e)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_task_backend():
+    """
+    Returns the process-wide backend named by TASK_BACKEND, created on first use.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(settings.TASK_BACKEND)()
+    return _backend
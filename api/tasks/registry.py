@@ -0,0 +1,134 @@
+"""
+Background tasks for work that should not hold up a response.
+
+A service function becomes a task with the `task` decorator. Calling it still runs it
+inline; `.enqueue()` queues the call on the backend named by TASK_BACKEND and returns
+at once:
+
+    @task(lane='high')
+    def refresh_match_feed(profile_id):
+        ...
+
+    refresh_match_feed.enqueue(profile.pk)
+
+Arguments are stored as JSON, so pass IDs rather than model instances. A task can run
+more than once (a retry after it failed half way, a worker that died mid-task), so it
+must be safe to repeat. An `idempotency_key` makes the enqueue itself happen once: while
+a task with the same key is known to the backend, enqueueing again returns that task.
+
+Each task runs in a lane of TASK_LANES (best first): workers always take the ready task
+of the best lane. Failed attempts are retried up to `max_attempts` times, waiting
+TASK_RETRY_DELAY seconds and twice as long before each further retry.
+"""
+import datetime
+import functools
+import inspect
+import json
+from importlib import import_module
+
+from django.conf import settings
+from django.utils import timezone
+from api.models import QueuedTask
+
+# Keyword arguments of enqueue(), so not available to task functions
+ENQUEUE_OPTIONS = ('idempotency_key', 'lane', 'delay')
+
+_registry = {}
+
+
+class UnknownTask(Exception):
+    """
+    Raised for a queued task whose function no longer exists (e.g. renamed since).
+    """
+
+
+class TaskFunction:
+    """
+    A function registered as a task. Calls run it inline; enqueue() queues a call.
+    """
+    def __init__(self, function, lane, max_attempts, retry_delay):
+        functools.update_wrapper(self, function)
+        self.function = function
+        self.name = f"{function.__module__}.{function.__name__}"
+        self.lane = lane
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def __call__(self, *args, **kwargs):
+        return self.function(*args, **kwargs)
+
+    def enqueue(self, *args, idempotency_key=None, lane=None, delay=None, **kwargs):
+        """
+        Queues a call with these arguments and returns its QueuedTask. `lane` overrides
+        the task's lane and `delay` (seconds) postpones the first attempt. Inside a
+        transaction the task is only run once the transaction commits.
+        """
+        from api.tasks.backends import get_task_backend
+
+        lane = lane or self.lane
+        try:
+            json.dumps([args, kwargs])
+        except TypeError as e:
+            raise TypeError(f"Arguments of task {self.name} must be JSON serializable: {e}")
+        job = QueuedTask(
+            name=self.name,
+            args=list(args),
+            kwargs=kwargs,
+            lane=lane,
+            priority=lane_priority(lane),
+            idempotency_key=idempotency_key,
+            max_attempts=self.max_attempts or settings.TASK_MAX_ATTEMPTS,
+            run_at=timezone.now() + datetime.timedelta(seconds=delay or 0),
+        )
+        return get_task_backend().enqueue(job)
+
+    def retry_delay_after(self, attempts):
+        """
+        Seconds to wait before the next attempt, after `attempts` failed ones.
+        """
+        delay = (self.retry_delay or settings.TASK_RETRY_DELAY) * 2 ** (attempts - 1)
+        return min(delay, settings.TASK_RETRY_MAX_DELAY)
+
+
+def task(lane='default', max_attempts=None, retry_delay=None):
+    """
+    Registers a module-level function as a task (see the module docstring).
+    `max_attempts` and `retry_delay` default to TASK_MAX_ATTEMPTS and TASK_RETRY_DELAY.
+    """
+    def decorate(function):
+        if function.__qualname__ != function.__name__:
+            raise ValueError(f"Task {function.__qualname__} must be defined at module level.")
+        reserved = set(ENQUEUE_OPTIONS) & set(inspect.signature(function).parameters)
+        if reserved:
+            raise ValueError(f"Task {function.__qualname__} can't take parameters named {', '.join(sorted(reserved))}.")
+        task_function = TaskFunction(function, lane, max_attempts, retry_delay)
+        _registry[task_function.name] = task_function
+        return task_function
+    return decorate
+
+
+def get_task_function(name):
+    """
+    Returns the TaskFunction registered under `name`, importing its module first when
+    this process hasn't yet. Raises UnknownTask when there is no such task.
+    """
+    if name not in _registry:
+        module = name.rpartition('.')[0]
+        try:
+            import_module(module)
+        except ImportError:
+            pass
+    try:
+        return _registry[name]
+    except KeyError:
+        raise UnknownTask(f"No task is registered as {name}.")
+
+
+def lane_priority(lane):
+    """
+    Position of `lane` in TASK_LANES, the order in which workers serve lanes.
+    """
+    try:
+        return settings.TASK_LANES.index(lane)
+    except ValueError:
+        raise ValueError(f"Unknown task lane {lane!r}; TASK_LANES are {', '.join(settings.TASK_LANES)}.")
@@ -0,0 +1,97 @@
+"""
+Running queued tasks: `execute` runs one claimed task and reports the outcome to its
+backend, `run_worker` is the claim loop of one worker process of the
+run_task_workers command.
+"""
+import signal
+import time
+import traceback
+
+from django.db import close_old_connections
+from django.utils import timezone
+from api.tasks.registry import UnknownTask, get_task_function
+from api.utils.logger import log_error, log_info, log_warning
+from api.utils.metrics import registry
+
+TASKS_RUN = registry.counter(
+    'tasks_run_total', "Task attempts by task and outcome (succeeded, retried, failed).", ['task', 'result'])
+TASK_SECONDS = registry.histogram('task_seconds', "Run time of task attempts.", ['task'])
+TASK_WAIT_SECONDS = registry.histogram(
+    'task_wait_seconds', "Time from when a task was due to when an attempt started, by lane.", ['lane'])
+
+
+def execute(job, backend):
+    """
+    Runs a claimed task (a QueuedTask whose `attempts` counts this attempt) and tells
+    the backend whether it succeeded, should be retried or has failed for good.
+    """
+    TASK_WAIT_SECONDS.observe(max(0.0, (timezone.now() - job.run_at).total_seconds()), lane=job.lane)
+    try:
+        function = get_task_function(job.name)
+    except UnknownTask as e:
+        log_error("Task %s (%s) failed: %s", job.pk, job.name, e)
+        TASKS_RUN.inc(task=job.name, result='failed')
+        backend.fail(job, str(e))
+        return
+
+    # Tasks can run long after the previous one: start from a usable connection
+    close_old_connections()
+    started = time.perf_counter()
+    try:
+        function(*job.args, **job.kwargs)
+    except Exception as e:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = function.retry_delay_after(job.attempts)
+            log_warning(
+                "Task %s (%s) attempt %s/%s failed, retrying in %ss: %s",
+                job.pk, job.name, job.attempts, job.max_attempts, delay, e,
+            )
+            TASKS_RUN.inc(task=job.name, result='retried')
+            backend.retry(job, error, delay)
+        else:
+            log_error("Task %s (%s) failed after %s attempts: %s", job.pk, job.name, job.attempts, e)
+            TASKS_RUN.inc(task=job.name, result='failed')
+            backend.fail(job, error)
+    else:
+        TASKS_RUN.inc(task=job.name, result='succeeded')
+        backend.complete(job)
+    finally:
+        TASK_SECONDS.observe(time.perf_counter() - started, task=job.name)
+        close_old_connections()
+
+
+def run_worker(backend, lanes, stop, poll_interval, once=False):
+    """
+    Claims and runs tasks of `lanes` one at a time until the `stop` event is set,
+    waiting `poll_interval` seconds whenever none is ready. With `once`, returns as soon
+    as none is ready instead. Returns the number of tasks run.
+    """
+    count = 0
+    while not stop.is_set():
+        job = backend.claim(lanes)
+        if job is None:
+            if once:
+                break
+            close_old_connections()
+            stop.wait(poll_interval)
+            continue
+        execute(job, backend)
+        count += 1
+    return count
+
+
+def worker_process(lanes, stop, poll_interval):
+    """
+    Entry point of a run_task_workers process. Ctrl-C and a service manager's SIGTERM
+    reach the whole process group, so workers leave shutdown to the supervisor: once it
+    sets `stop` they finish the task in hand and exit.
+    """
+    import django
+    django.setup()
+    from api.tasks.backends import get_task_backend
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    count = run_worker(get_task_backend(), lanes, stop, poll_interval)
+    log_info("Task worker stopping after %s tasks", count)
@@ -0,0 +1,77 @@
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+from api.authentication.jwt_claims import ClaimsJWTAuthentication, revoke_token, revoke_user_tokens
+from api.serializers.custom_token_serializer import CustomTokenObtainPairSerializer
+from api.tests.utils import auth_header, clear_cache, make_profile
+
+
+@override_settings(THROTTLE_ENABLED=False, JWT_REVOCATION_ENABLED=True)
+class ClaimsJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        clear_cache()
+        self.profile = make_profile('owner@example.com')
+        self.token = CustomTokenObtainPairSerializer.get_token(self.profile.user).access_token
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return ClaimsJWTAuthentication().authenticate(request)
+
+    def test_user_from_claims_without_queries(self):
+        # simplejwt keeps the user ID claim as a string
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(self.token)
+            self.assertEqual(
+                (user.pk, user.profile_id, user.role, user.email),
+                (str(self.profile.user_id), self.profile.pk, 'user', 'owner@example.com'),
+            )
+
+    def test_revoked_token(self):
+        revoke_token(self.token)
+        with self.assertNumQueries(0), self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.token)
+
+    def test_revoked_user_tokens(self):
+        revoke_user_tokens(self.profile.user_id)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.token)
+
+        other = make_profile('other@example.com', gender='female', looking_for='male')
+        user, _ = self.authenticate(CustomTokenObtainPairSerializer.get_token(other.user).access_token)
+        self.assertEqual(user.pk, str(other.user_id))
+
+    @override_settings(JWT_REVOCATION_ENABLED=False)
+    def test_revocation_disabled(self):
+        revoke_token(self.token)
+        user, _ = self.authenticate(self.token)
+        self.assertEqual(user.pk, str(self.profile.user_id))
+
+
+@override_settings(THROTTLE_ENABLED=False)
+class ProfileOwnerPermissionTests(TestCase):
+    def setUp(self):
+        clear_cache()
+        self.owner = make_profile('owner@example.com')
+        self.other = make_profile('other@example.com', gender='female', looking_for='male')
+        self.url = f'/api/user/profiles/{self.owner.pk}/'
+
+    def patch(self, **headers):
+        return self.client.patch(self.url, {'bio': 'Updated'}, content_type='application/json', **headers)
+
+    def test_owner_can_write(self):
+        self.assertEqual(self.patch(**auth_header(self.owner)).status_code, 200)
+
+    def test_other_user_cannot_write(self):
+        self.assertEqual(self.patch(**auth_header(self.other)).status_code, 403)
+        self.owner.refresh_from_db()
+        self.assertNotEqual(self.owner.bio, 'Updated')
+
+    def test_admin_can_write(self):
+        admin = make_profile('admin@example.com', role='admin')
+        self.assertEqual(self.patch(**auth_header(admin)).status_code, 200)
+
+    def test_anonymous_cannot_write(self):
+        self.assertIn(self.patch().status_code, (401, 403))
+
+    def test_anyone_can_read(self):
+        self.assertEqual(self.client.get(self.url, **auth_header(self.other)).status_code, 200)
@@ -0,0 +1,50 @@
+import numpy as np
+from django.test import SimpleTestCase
+from api.utils.bloom import ScalableBloomFilter
+
+
+class ScalableBloomFilterTests(SimpleTestCase):
+    def test_round_trip(self):
+        bloom = ScalableBloomFilter(100, 0.01, salt=7)
+        bloom.add_many(range(250))  # Past the first layer
+
+        loaded = ScalableBloomFilter.from_bytes(bloom.to_bytes(), 0.01)
+        self.assertEqual(loaded.to_bytes(), bloom.to_bytes())
+        self.assertEqual((len(loaded), len(loaded.layers), loaded.salt), (250, len(bloom.layers), 7))
+        self.assertTrue(loaded.contains_many(range(250)).all())
+
+        # Layers added after loading are sized from the given error rate
+        loaded.add_many(range(250, 1000))
+        self.assertTrue(loaded.contains_many(range(1000)).all())
+
+    def test_unknown_format(self):
+        data = bytearray(ScalableBloomFilter(100, 0.01).to_bytes())
+        data[0] = 99
+        with self.assertRaises(ValueError):
+            ScalableBloomFilter.from_bytes(bytes(data), 0.01)
+
+    def test_grows_past_capacity(self):
+        bloom = ScalableBloomFilter(1000, 0.01)
+        self.assertEqual(bloom.add_many(range(7000)), 7000)
+
+        self.assertEqual([layer.capacity for layer in bloom.layers], [1000, 2000, 4000])
+        self.assertEqual(len(bloom), 7000)
+        self.assertTrue(bloom.contains_many(range(7000)).all())  # No false negatives
+        self.assertEqual(bloom.add_many(range(7000)), 0)  # Nothing new
+
+    def test_false_positive_rate(self):
+        for count in (1000, 7000):  # Full first layer, then three layers
+            with self.subTest(count=count):
+                bloom = ScalableBloomFilter(1000, 0.01, salt=42)
+                bloom.add_many(range(count))
+                rate = np.mean(bloom.contains_many(np.arange(10**6, 10**6 + 100_000)))
+                self.assertLess(rate, 2 * 0.01)
+
+    def test_salts_change_the_false_positives(self):
+        probes = np.arange(10**6, 10**6 + 100_000)
+        hits = []
+        for salt in (1, 2):
+            bloom = ScalableBloomFilter(1000, 0.01, salt=salt)
+            bloom.add_many(range(1000))
+            hits.append(set(probes[bloom.contains_many(probes)]))
+        self.assertLess(len(hits[0] & hits[1]), len(hits[0]) / 10)
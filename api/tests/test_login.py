@@ -0,0 +1,37 @@
+import asyncio
+from concurrent import futures
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import Throttled
+from api.services.auth_service import aauthenticate_by_email
+from api.tests.utils import PASSWORD, make_profile
+from api.utils.hashing_pool import BoundedHashPool
+
+
+@override_settings(THROTTLE_ENABLED=False, LOGIN_RETRY_AFTER=3)
+class LoginTests(TestCase):
+    def setUp(self):
+        make_profile('owner@example.com')
+
+    def login(self):
+        return self.client.post(
+            '/api/auth/login/', {'email': 'owner@example.com', 'password': PASSWORD}, content_type='application/json',
+        )
+
+    def test_login(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json()['data'])
+
+    def test_hash_timeout_is_throttled(self):
+        with mock.patch.object(BoundedHashPool, 'check_password', side_effect=futures.TimeoutError):
+            response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '3')
+
+    async def test_async_hash_timeout_is_throttled(self):
+        with mock.patch.object(BoundedHashPool, 'acheck_password', side_effect=asyncio.TimeoutError):
+            with self.assertRaises(Throttled) as raised:
+                await aauthenticate_by_email('owner@example.com', PASSWORD)
+        self.assertEqual(raised.exception.wait, 3)
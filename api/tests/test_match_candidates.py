@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.test import TestCase, override_settings
+from api.models import UserProfile
+from api.services.match_service import get_match_candidates
+from api.services.seen_service import record_seen
+from api.tests.utils import make_profile
+from api.utils.geo import MILES_PER_DEGREE_LAT, bounding_box
+
+# Where make_profile's zipcode puts everyone
+LAT, LON = 40.75, -73.99
+
+
+def move(profile, lat, lon):
+    UserProfile.objects.filter(pk=profile.pk).update(latitude=lat, longitude=lon)
+
+
+@override_settings(MATCH_INITIAL_RADIUS=5, MATCH_MAX_DISTANCE=500)
+class MatchCandidatesTests(TestCase):
+    def setUp(self):
+        self.searcher = make_profile('searcher@example.com', distance=50)
+        self.near = self.candidate('near', 3)
+        self.far = self.candidate('far', 30)
+
+    def candidate(self, name, miles_north, **fields):
+        profile = make_profile(f'{name}@example.com', gender='female', looking_for='male', **fields)
+        move(profile, LAT + miles_north / MILES_PER_DEGREE_LAT, LON)
+        return profile
+
+    def candidate_ids(self, **kwargs):
+        return [candidate_id for candidate_id, _ in get_match_candidates(self.searcher, **kwargs)]
+
+    def test_nearest_first_within_both_radii(self):
+        self.candidate('too_far', 80)
+        self.candidate('picky', 20, distance=10)  # The searcher is outside its own radius
+        make_profile('same@example.com')  # Not what the searcher is looking for
+
+        found = get_match_candidates(self.searcher)
+
+        self.assertEqual([candidate_id for candidate_id, _ in found], [self.near.pk, self.far.pk])
+        self.assertAlmostEqual(found[0][1], 3, places=1)
+
+    def test_rows_read_by_a_smaller_ring_are_filtered_again(self):
+        # Inside the first ring's bounding box, but beyond its radius
+        min_lat, max_lat, min_lon, max_lon = bounding_box(LAT, LON, 5)
+        corner = make_profile('corner@example.com', gender='female', looking_for='male')
+        move(corner, LAT + (max_lat - LAT) * 0.9, LON + (max_lon - LON) * 0.9)
+
+        self.assertEqual(self.candidate_ids(limit=3), [self.near.pk, corner.pk, self.far.pk])
+
+    def test_stops_growing_once_the_limit_is_met(self):
+        self.assertEqual(self.candidate_ids(limit=1), [self.near.pk])
+
+    def test_seen_profiles_are_left_out(self):
+        with transaction.atomic():
+            record_seen([(self.searcher.pk, self.near.pk)])
+
+        self.assertEqual(self.candidate_ids(), [self.far.pk])
+        self.assertEqual(self.candidate_ids(exclude_seen=False), [self.near.pk, self.far.pk])
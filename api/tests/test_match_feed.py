@@ -0,0 +1,38 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from api.models import MatchFeed, QueuedTask
+from api.services.match_service import build_match_feed, get_match_feed_page
+from api.tasks import backends
+from api.tests.utils import clear_cache, make_profile
+
+
+@override_settings(THROTTLE_ENABLED=False)
+class MatchFeedPageTests(TestCase):
+    def setUp(self):
+        clear_cache()
+        self.profile = make_profile('owner@example.com')
+        self.candidate = make_profile('candidate@example.com', gender='female', looking_for='male')
+
+    def test_unbuilt_feed_is_queued_not_built_inline(self):
+        with mock.patch.object(backends, '_backend', backends.DatabaseTaskBackend()):
+            entries, next_cursor = get_match_feed_page(self.profile)
+
+        self.assertEqual((entries, next_cursor), ([], None))
+        self.assertFalse(MatchFeed.objects.filter(profile=self.profile).exists())
+        self.assertEqual(QueuedTask.objects.get().args, [self.profile.pk])
+
+    def test_build_under_way_is_not_queued_again(self):
+        MatchFeed.objects.create(profile=self.profile)
+        with mock.patch.object(backends, '_backend', backends.DatabaseTaskBackend()):
+            entries, _ = get_match_feed_page(self.profile)
+
+        self.assertEqual(entries, [])
+        self.assertFalse(QueuedTask.objects.exists())
+
+    def test_built_feed(self):
+        build_match_feed(self.profile)
+        build_match_feed(self.profile)  # Rebuilding replaces the ranks
+
+        entries, _ = get_match_feed_page(self.profile)
+        self.assertEqual([entry.candidate_id for entry in entries], [self.candidate.pk])
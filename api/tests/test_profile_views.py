@@ -0,0 +1,68 @@
+from django.test import TestCase, override_settings
+from django.urls import path
+from api.models import UserProfile
+from api.tests.utils import auth_header, clear_cache, make_profile
+from api.views.user_profile_view import AsyncUserProfileViewSet
+
+# The profile routes with the async viewset, as served when ASYNC_VIEWS is set
+urlpatterns = [
+    path(
+        'profiles/<int:pk>/',
+        AsyncUserProfileViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update'}),
+        name='userprofile-detail',
+    ),
+]
+
+
+@override_settings(THROTTLE_ENABLED=False)
+class ProfileViewTests(TestCase):
+    def setUp(self):
+        clear_cache()
+        self.profile = make_profile('owner@example.com', bio='Hello')
+        self.url = f'/api/user/profiles/{self.profile.pk}/'
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.url).headers['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+
+    def test_patch_changes_only_the_given_fields(self):
+        response = self.client.patch(
+            self.url, {'distance': 20}, content_type='application/json', **auth_header(self.profile),
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.profile.refresh_from_db()
+        self.assertEqual((self.profile.distance, self.profile.bio, self.profile.gender), (20, 'Hello', 'male'))
+
+
+@override_settings(THROTTLE_ENABLED=False, ROOT_URLCONF=__name__)
+class AsyncProfileViewTests(TestCase):
+    def setUp(self):
+        clear_cache()
+        self.profile = make_profile('owner@example.com', bio='Hello')
+        self.url = f'/profiles/{self.profile.pk}/'
+
+    async def test_conditional_get(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+
+        response = await self.async_client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+
+        response = await self.async_client.get(self.url, headers={'If-None-Match': '"0"'})
+        self.assertEqual(response.status_code, 200)
+
+    async def test_patch_changes_only_the_given_fields(self):
+        response = await self.async_client.patch(
+            self.url, {'distance': 20}, content_type='application/json',
+            headers={'Authorization': auth_header(self.profile)['HTTP_AUTHORIZATION']},
+        )
+        self.assertEqual(response.status_code, 200)
+
+        profile = await UserProfile.objects.aget(pk=self.profile.pk)
+        self.assertEqual((profile.distance, profile.bio), (20, 'Hello'))
@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from api.middleware.instrumentation import query_budget_for
+from api.models import MatchFeed, QueuedTask, UserProfile
+from api.services.match_service import build_match_feed
+from api.tasks import backends
+from api.tests.utils import PASSWORD, ZIPCODE, auth_header, clear_cache, make_profile, make_zipcode
+from api.utils.query_budget import assert_query_budget
+
+
+@override_settings(THROTTLE_ENABLED=False)
+class QueryBudgetTests(TestCase):
+    """
+    The worst path of each view in QUERY_BUDGETS stays within its budget. Each request
+    starts from an empty cache unless stated otherwise.
+    """
+    def setUp(self):
+        clear_cache()
+        self.profile = make_profile('owner@example.com')
+        self.candidate = make_profile('candidate@example.com', gender='female', looking_for='male')
+        self.detail_url = f'/api/user/profiles/{self.profile.pk}/'
+
+    def test_login(self):
+        response = self.client.post(
+            '/api/auth/login/', {'email': 'owner@example.com', 'password': PASSWORD}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        assert_query_budget(response)
+
+    def test_profile_list(self):
+        response = self.client.get('/api/user/profiles/')
+        self.assertEqual(response.status_code, 200)
+        assert_query_budget(response)
+
+    def test_profile_detail(self):
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, 200)
+        assert_query_budget(response)
+
+    def test_conditional_profile_detail(self):
+        etag = self.client.get(self.detail_url).headers['ETag']
+
+        # A match is decided on the version and updated_at columns alone
+        for if_none_match, status_code, queries in ((etag, 304, 1), ('"0"', 200, 2)):
+            with self.subTest(if_none_match=if_none_match):
+                clear_cache()
+                response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=if_none_match)
+                self.assertEqual(response.status_code, status_code)
+                self.assertEqual(assert_query_budget(response), queries)
+
+    def test_profile_batch(self):
+        response = self.client.get(f'/api/user/profiles/batch/?ids={self.profile.pk},{self.candidate.pk}')
+        self.assertEqual(response.status_code, 200)
+        assert_query_budget(response)
+
+    def test_match_feed(self):
+        with mock.patch.object(backends, '_backend', backends.DatabaseTaskBackend()):
+            response = self.client.get('/api/match/feed/', **auth_header(self.profile))  # Not built: queued
+        self.assertEqual(response.status_code, 200)
+        assert_query_budget(response)
+
+        build_match_feed(self.profile)
+        response = self.client.get('/api/match/feed/', **auth_header(self.profile))
+        self.assertEqual(len(response.json()['data']['results']), 1)
+        assert_query_budget(response)
+
+        # Built but empty: the page is read again on the primary
+        MatchFeed.objects.filter(profile=self.profile).update(is_stale=False)
+        self.candidate.delete()
+        response = self.client.get('/api/match/feed/', **auth_header(self.profile))
+        self.assertEqual(response.json()['data']['results'], [])
+        assert_query_budget(response)
+
+
+@override_settings(THROTTLE_ENABLED=False)
+class RegisterQueryCountTests(TransactionTestCase):
+    """
+    Registration runs exactly its budget. Outside TestCase, so the transaction's
+    queries aren't joined by savepoints.
+    """
+    def setUp(self):
+        clear_cache()
+        make_zipcode()
+
+    def test_register(self):
+        data = {
+            'name': 'Ada', 'email': 'ada@example.com', 'password': PASSWORD, 'gender': 'female', 'bio': 'Hi',
+            'looking_for': 'male', 'zipcode': ZIPCODE, 'birthday': '1990-01-01', 'distance': 50,
+        }
+        with mock.patch.object(backends, '_backend', backends.DatabaseTaskBackend()):
+            response = self.client.post('/api/auth/register/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+        # SQLite opens the transaction with an explicit BEGIN
+        expected = query_budget_for('register', 'POST') + (connection.vendor == 'sqlite')
+        self.assertEqual(assert_query_budget(response, budget=expected), expected)
+        profile = UserProfile.objects.get(user__email='ada@example.com')
+        self.assertIsNotNone(profile.latitude)
+        self.assertEqual(QueuedTask.objects.get().args, [profile.pk])
@@ -0,0 +1,14 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_their_indexes(self):
+        # Runs on the test database, so it checks the indexes the migrations create
+        out = StringIO()
+        try:
+            call_command('check_query_plans', stdout=out)
+        except CommandError as e:
+            self.fail(f"{e}\n{out.getvalue()}")
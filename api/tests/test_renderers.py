@@ -0,0 +1,24 @@
+import datetime
+import decimal
+import unittest
+
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+from api.utils import renderers
+from api.utils.renderers import ORJSONRenderer
+
+
+@unittest.skipIf(renderers.orjson is None, "orjson is not installed")
+class ORJSONRendererTests(SimpleTestCase):
+    def assertRendersLikeDRF(self, data):
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_matches_drf(self):
+        self.assertRendersLikeDRF({
+            'results': [{'id': 1, 'bio': 'Line\u2028break', 'score': decimal.Decimal('1.50')}],
+            'updated_at': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            'next_cursor': None,
+        })
+
+    def test_non_string_keys(self):
+        self.assertRendersLikeDRF({1: 'a', 2.5: 'b', True: 'c', None: 'd'})
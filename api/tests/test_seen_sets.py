@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.test import TestCase
+from api.models import MatchFeedEntry, Swipe
+from api.services.match_service import build_match_feed
+from api.services.seen_service import get_seen_set, rebuild_seen_sets, record_seen
+from api.tests.utils import make_profile
+
+
+class SeenSetTests(TestCase):
+    def setUp(self):
+        self.owner = make_profile('owner@example.com')
+        self.candidates = [
+            make_profile(f'candidate{i}@example.com', gender='female', looking_for='male') for i in range(3)
+        ]
+
+    def test_record_seen_removes_the_swiped_profiles_from_the_feed(self):
+        build_match_feed(self.owner)
+        swiped, kept = self.candidates[0], self.candidates[1:]
+
+        with transaction.atomic():
+            record_seen([(self.owner.pk, swiped.pk)])
+
+        self.assertCountEqual(
+            MatchFeedEntry.objects.filter(owner=self.owner).values_list('candidate_id', flat=True),
+            [profile.pk for profile in kept],
+        )
+        seen = get_seen_set(self.owner.pk)
+        self.assertIn(swiped.pk, seen)
+        self.assertEqual(len(seen), 1)
+
+    def test_first_set_is_built_from_the_swipe_history(self):
+        Swipe.objects.create(swiper=self.owner, target=self.candidates[0], liked=True)
+
+        with transaction.atomic():
+            record_seen([(self.owner.pk, self.candidates[1].pk)])
+
+        seen = get_seen_set(self.owner.pk)
+        self.assertTrue(seen.contains_many([self.candidates[0].pk, self.candidates[1].pk]).all())
+
+    def test_rebuild(self):
+        for candidate in self.candidates:
+            Swipe.objects.create(swiper=self.owner, target=candidate, liked=False)
+
+        rebuild_seen_sets([self.owner.pk])
+        self.assertEqual(len(get_seen_set(self.owner.pk)), 3)
+
+    def test_never_swiped(self):
+        self.assertEqual(len(get_seen_set(self.owner.pk)), 0)
@@ -0,0 +1,99 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from api.models import Match, Swipe
+from api.services import swipe_service
+from api.services.swipe_service import SwipeBuffer, save_swipes
+from api.tests.utils import make_profile
+
+
+class SwipeBufferTests(SimpleTestCase):
+    """
+    Batching only: save_swipes is replaced, so the flusher thread never touches the database.
+    """
+    def setUp(self):
+        self.batches = []
+        self.written = threading.Event()
+        patcher = mock.patch.object(swipe_service, 'save_swipes', side_effect=self.save)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def save(self, swipes):
+        self.batches.append([(swipe.swiper_id, swipe.target_id, swipe.liked) for swipe in swipes])
+        self.written.set()
+        return []
+
+    def make_buffer(self, **options):
+        buffer = SwipeBuffer(**options)
+        self.addCleanup(buffer.stop)
+        return buffer
+
+    def test_flushes_a_full_batch(self):
+        buffer = self.make_buffer(batch_size=3, flush_interval=60)
+        buffer.submit(1, 2, True)
+        buffer.submit(1, 3, False)
+        self.assertFalse(self.written.wait(0.1))
+
+        buffer.submit(1, 4, True)
+        self.assertTrue(self.written.wait(5))
+        self.assertEqual(self.batches, [[(1, 2, True), (1, 3, False), (1, 4, True)]])
+        self.assertEqual(buffer.pending(), 0)
+
+    def test_flushes_a_partial_batch_after_the_interval(self):
+        buffer = self.make_buffer(batch_size=100, flush_interval=0.05)
+        started = time.monotonic()
+        buffer.submit(1, 2, True)
+
+        self.assertTrue(self.written.wait(5))
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(self.batches, [[(1, 2, True)]])
+
+    def test_a_new_decision_replaces_the_pending_one(self):
+        buffer = self.make_buffer(batch_size=100, flush_interval=60)
+        buffer.submit(1, 2, True)
+        buffer.submit(1, 2, False)
+        self.assertEqual(buffer.pending(), 1)
+
+        buffer.flush()
+        self.assertEqual(self.batches, [[(1, 2, False)]])
+
+
+class SaveSwipesTests(TestCase):
+    def setUp(self):
+        self.a = make_profile('a@example.com')
+        self.b = make_profile('b@example.com', gender='female', looking_for='male')
+        self.c = make_profile('c@example.com', gender='female', looking_for='male')
+
+    def swipe(self, swiper, target, liked=True):
+        return Swipe(swiper_id=swiper.pk, target_id=target.pk, liked=liked)
+
+    def test_last_decision_of_a_pair_wins(self):
+        save_swipes([self.swipe(self.a, self.b, False), self.swipe(self.a, self.b, True)])
+        self.assertEqual(list(Swipe.objects.values_list('swiper_id', 'target_id', 'liked')), [(self.a.pk, self.b.pk, True)])
+
+        save_swipes([self.swipe(self.a, self.b, False)])
+        self.assertFalse(Swipe.objects.get().liked)
+
+    def test_unknown_profiles_are_dropped(self):
+        save_swipes([self.swipe(self.a, self.b), Swipe(swiper_id=self.a.pk, target_id=999_999, liked=True)])
+        self.assertEqual(Swipe.objects.count(), 1)
+
+    def test_mutual_like_within_a_batch(self):
+        matches = save_swipes([self.swipe(self.a, self.b), self.swipe(self.b, self.a), self.swipe(self.a, self.c)])
+        self.assertEqual([(m.profile_a_id, m.profile_b_id) for m in matches], [(self.a.pk, self.b.pk)])
+
+    def test_mutual_like_across_batches(self):
+        self.assertEqual(save_swipes([self.swipe(self.b, self.a)]), [])
+        matches = save_swipes([self.swipe(self.a, self.b)])
+        self.assertEqual([(m.profile_a_id, m.profile_b_id) for m in matches], [(self.a.pk, self.b.pk)])
+
+    def test_one_match_per_pair(self):
+        save_swipes([self.swipe(self.a, self.b), self.swipe(self.b, self.a)])
+        self.assertEqual(save_swipes([self.swipe(self.a, self.b), self.swipe(self.b, self.a)]), [])
+        self.assertEqual(Match.objects.count(), 1)
+
+    def test_a_pass_is_not_a_match(self):
+        self.assertEqual(save_swipes([self.swipe(self.a, self.b), self.swipe(self.b, self.a, False)]), [])
+        self.assertFalse(Match.objects.exists())
@@ -0,0 +1,126 @@
+import datetime
+import threading
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from api.models import QueuedTask
+from api.tasks import backends
+from api.tasks.backends import DatabaseTaskBackend, LocalTaskBackend
+from api.tasks.registry import task
+from api.tasks.worker import run_worker
+
+calls = []
+ran = threading.Event()
+
+
+@task()
+def record(value):
+    calls.append(value)
+    ran.set()
+
+
+@task(max_attempts=2)
+def fail_always():
+    raise RuntimeError("Still broken")
+
+
+def run_ready(backend):
+    return run_worker(backend, ['high', 'default', 'low'], threading.Event(), poll_interval=0, once=True)
+
+
+class TaskTestCase(TestCase):
+    backend_class = DatabaseTaskBackend
+
+    def setUp(self):
+        calls.clear()
+        ran.clear()
+        self.backend = self.backend_class()
+        patcher = mock.patch.object(backends, '_backend', self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class DatabaseTaskBackendTests(TaskTestCase):
+    def test_enqueue_rolls_back_with_its_transaction(self):
+        try:
+            with transaction.atomic():
+                record.enqueue('rolled back')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        with transaction.atomic():
+            record.enqueue('committed')
+
+        self.assertEqual(run_ready(self.backend), 1)
+        self.assertEqual(calls, ['committed'])
+        self.assertEqual(QueuedTask.objects.get().status, QueuedTask.SUCCEEDED)
+
+    def test_duplicate_idempotency_key(self):
+        first = record.enqueue('first', idempotency_key='welcome:1')
+        second = record.enqueue('second', idempotency_key='welcome:1')
+
+        self.assertEqual(second.pk, first.pk)
+        run_ready(self.backend)
+        self.assertEqual(calls, ['first'])
+
+    @override_settings(TASK_RETRY_DELAY=10, TASK_RETRY_MAX_DELAY=15)
+    def test_failure_is_retried_with_backoff(self):
+        job = fail_always.enqueue()
+        before = timezone.now()
+        run_ready(self.backend)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (QueuedTask.QUEUED, 1))
+        self.assertIn("Still broken", job.last_error)
+        self.assertGreaterEqual(job.run_at, before + datetime.timedelta(seconds=10))
+        self.assertEqual(run_ready(self.backend), 0)  # Not due yet
+
+        # Doubled before each further retry, up to TASK_RETRY_MAX_DELAY
+        self.assertEqual([fail_always.retry_delay_after(n) for n in (1, 2, 3)], [10, 15, 15])
+
+    def test_failed_after_max_attempts(self):
+        job = fail_always.enqueue()
+        for _ in range(fail_always.max_attempts):
+            QueuedTask.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            run_ready(self.backend)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (QueuedTask.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(job.locked_until)
+
+    def test_expired_lease_is_queued_again(self):
+        job = record.enqueue('lost')
+        claimed = self.backend.claim(['default'])
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertIsNone(self.backend.claim(['default']))
+
+        QueuedTask.objects.filter(pk=job.pk).update(locked_until=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertEqual(self.backend.requeue_expired(), 1)
+        run_ready(self.backend)
+        self.assertEqual(calls, ['lost'])
+
+        # The first worker finishing late doesn't overwrite the second attempt's outcome
+        self.backend.fail(claimed, "late")
+        self.assertEqual(QueuedTask.objects.get().status, QueuedTask.SUCCEEDED)
+
+
+class LocalTaskBackendTests(TaskTestCase):
+    backend_class = LocalTaskBackend
+
+    def test_runs_only_once_the_transaction_commits(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            record.enqueue('after commit')
+            self.assertEqual(self.backend.pending(), 0)
+            self.assertFalse(ran.wait(0.1))
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertTrue(ran.wait(5))
+        self.assertEqual(calls, ['after commit'])
+
+    def test_duplicate_idempotency_key(self):
+        first = record.enqueue('first', idempotency_key='welcome:1')
+        second = record.enqueue('second', idempotency_key='welcome:1')
+        self.assertIs(second, first)
@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from api.throttling import throttles
+from api.throttling.limiter import SlidingWindowLimiter, parse_rate
+from api.tests.utils import PASSWORD, auth_header, clear_cache, make_profile
+
+
+class SlidingWindowLimiterTests(SimpleTestCase):
+    def setUp(self):
+        clear_cache()
+        self.limiter = SlidingWindowLimiter(prefix='test')
+
+    def hits(self, count, now, limit=3, period=60):
+        return [self.limiter.hit('key', limit, period, now=now) for _ in range(count)]
+
+    def test_limit_per_window(self):
+        self.assertEqual(self.hits(3, now=120), [(True, 0)] * 3)
+        allowed, retry_after = self.limiter.hit('key', 3, 60, now=120)
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+
+    def test_window_slides(self):
+        self.hits(3, now=120)
+        # Half way through the next window the previous one still counts for half:
+        # 3 * 0.5 + 1 allowed, then the estimate is over the limit
+        self.assertEqual([allowed for allowed, _ in self.hits(2, now=210)], [True, False])
+        # Once the previous window has decayed entirely, a full allowance again
+        self.assertEqual([allowed for allowed, _ in self.hits(4, now=300)], [True, True, True, False])
+
+    def test_waiting_retry_after_is_enough(self):
+        for first, then in ((120, 120), (120, 200), (120, 150)):
+            with self.subTest(first=first, then=then):
+                clear_cache()
+                limiter = SlidingWindowLimiter(prefix=f'test-{first}-{then}')
+                for _ in range(3):
+                    limiter.hit('key', 3, 60, now=first)
+                allowed, retry_after = limiter.hit('key', 3, 60, now=then)
+                while allowed:
+                    allowed, retry_after = limiter.hit('key', 3, 60, now=then)
+
+                self.assertEqual(limiter.hit('key', 3, 60, now=then + retry_after), (True, 0))
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/15min'), (10, 900))
+        self.assertEqual(parse_rate('1000/day'), (1000, 86400))
+        with self.assertRaises(ValueError):
+            parse_rate('10 per minute')
+
+
+@override_settings(
+    THROTTLE_ENABLED=True,
+    THROTTLE_POLICIES={'default': [('user', '2/min')], 'login': [('email', '2/min')]},
+    THROTTLE_ROUTES={'token_obtain_pair': 'login'},
+)
+class RoutePolicyThrottleTests(TestCase):
+    def setUp(self):
+        clear_cache()
+        patcher = mock.patch.object(throttles, '_limiter', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.first = make_profile('first@example.com')
+        self.second = make_profile('second@example.com', gender='female', looking_for='male')
+
+    def login(self, email):
+        return self.client.post('/api/auth/login/', {'email': email, 'password': PASSWORD}, content_type='application/json')
+
+    def assertThrottled(self, response):
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response.headers['Retry-After']), 1)
+        self.assertLessEqual(int(response.headers['Retry-After']), 120)
+
+    def test_login_attempts_per_email(self):
+        self.assertEqual([self.login('first@example.com').status_code for _ in range(2)], [200, 200])
+        self.assertThrottled(self.login('first@example.com'))
+        self.assertThrottled(self.login('FIRST@example.com '))  # Same account
+        self.assertEqual(self.login('second@example.com').status_code, 200)
+
+    def test_requests_per_user(self):
+        url = f'/api/user/profiles/{self.first.pk}/'
+        for _ in range(2):
+            self.assertEqual(self.client.get(url, **auth_header(self.first)).status_code, 200)
+        self.assertThrottled(self.client.get(url, **auth_header(self.first)))
+        self.assertEqual(self.client.get(url, **auth_header(self.second)).status_code, 200)
@@ -0,0 +1,19 @@
+import datetime
+
+from django.test import TestCase
+from api.serializers import UserProfileSerializer
+from api.tests.utils import make_profile
+
+
+class CurrentAgeTests(TestCase):
+    def test_age_follows_the_birthday(self):
+        today = datetime.date.today()
+        profile = make_profile('owner@example.com', birthday=datetime.date(today.year - 30, 1, 1), age=20)
+        self.assertEqual(UserProfileSerializer.serialize(profile)['age'], 30)
+
+        profile.birthday = datetime.date(today.year - 30, 12, 31)
+        self.assertEqual(profile.current_age, 30 if (today.month, today.day) == (12, 31) else 29)
+
+    def test_stored_age_without_birthday(self):
+        profile = make_profile('owner@example.com', age=30)
+        self.assertEqual(UserProfileSerializer.serialize(profile)['age'], 30)
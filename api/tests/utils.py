@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from api.models import UserProfile, ZipcodeLocation
+from api.serializers.custom_token_serializer import CustomTokenObtainPairSerializer
+
+PASSWORD = 'correct-horse-42'
+
+# Zipcode of the test profiles, around Manhattan
+ZIPCODE = '10001'
+
+
+def make_zipcode():
+    return ZipcodeLocation.objects.get_or_create(zipcode=ZIPCODE, defaults={'latitude': 40.75, 'longitude': -73.99})[0]
+
+
+def make_profile(email, gender='male', looking_for='female', **fields):
+    """
+    Creates a user and its located profile without going through registration.
+    """
+    make_zipcode()
+    user = User(username=email, email=email, first_name=email.split('@')[0])
+    user.set_password(PASSWORD)
+    user.profile_data = {'gender': gender, 'looking_for': looking_for, 'zipcode': ZIPCODE, 'distance': 50, **fields}
+    user.save()
+    return UserProfile.objects.select_related('user').get(user=user)
+
+
+def auth_header(profile):
+    """
+    Request headers authenticating as the profile's user with an access token.
+    """
+    token = CustomTokenObtainPairSerializer.get_token(profile.user).access_token
+    return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+
+def clear_cache():
+    # Profile payloads and validators outlive the test database they were read from
+    cache.clear()
@@ -0,0 +1,146 @@
+"""
+Sliding-window rate limiter.
+
+Each rule counts hits in fixed windows of its period and estimates the rate over the
+last full period as
+
+    previous_window_count * (1 - elapsed_fraction) + current_window_count
+
+so a burst at a window boundary cannot double the allowance, as it can with plain
+fixed windows, and no per-hit timestamps are stored.
+
+The current window's count is an atomic cache `incr`, which is safe across processes.
+A window's count never changes once the window is over, so the previous window's
+count is read from the cache once per key and window and then memoized in-process. In
+the steady state a rule therefore costs one cache round trip and O(1) work. Every hit
+is counted, including refused ones, so a client that keeps hammering stays limited.
+
+If the cache is unreachable, counting falls back to an in-process store: the limits
+then hold per process instead of globally, but requests are neither refused nor
+blocked by the outage.
+"""
+import math
+import re
+import threading
+import time
+
+from django.core.cache import caches
+from api.utils.logger import log_warning
+from api.utils.metrics import registry
+
+THROTTLE_BACKEND_ERRORS = registry.counter(
+    'throttle_backend_errors_total', "Rate limit counts that fell back to the in-process store.")
+
+_UNITS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+_RATE = re.compile(r'(\d+)/(\d*)(s|sec|m|min|h|hour|d|day)')
+
+
+def parse_rate(rate):
+    """
+    Parses "<count>/<period>" where the period is a unit optionally prefixed by a
+    multiplier: "5/min", "10/15min", "1000/day". Returns (count, seconds).
+    """
+    match = _RATE.fullmatch(rate.replace(' ', ''))
+    if match is None:
+        raise ValueError(f"Invalid rate {rate!r}; expected e.g. '5/min' or '10/15min'.")
+    count, multiplier, unit = match.groups()
+    return int(count), int(multiplier or 1) * _UNITS[unit]
+
+
+class SlidingWindowLimiter:
+    def __init__(self, cache_alias='default', prefix='rl'):
+        self.cache_alias = cache_alias
+        self.prefix = prefix
+        self._previous = {}  # (key, window) -> final count of that window
+        self._previous_lock = threading.Lock()
+        self._local = LocalCounterStore()
+        self._warned_at = 0.0
+
+    def hit(self, key, limit, period, now=None):
+        """
+        Counts one hit for `key` and returns (allowed, retry_after_seconds).
+        """
+        now = time.time() if now is None else now
+        window, elapsed = divmod(now, period)
+        window = int(window)
+        fraction = elapsed / period
+
+        current_key = f"{self.prefix}:{key}:{period}:{window}"
+        try:
+            current = self._incr(current_key, period)
+            previous = self._previous_count(f"{self.prefix}:{key}:{period}:{window - 1}", window)
+        except Exception as e:
+            THROTTLE_BACKEND_ERRORS.inc()
+            if now - self._warned_at > 60:
+                self._warned_at = now
+                log_warning("Rate limit cache unavailable, counting in-process: %s", e)
+            current = self._local.incr(current_key, period)
+            previous = self._local.get(f"{self.prefix}:{key}:{period}:{window - 1}")
+
+        estimate = previous * (1 - fraction) + current
+        if estimate <= limit:
+            return True, 0
+        return False, _retry_after(previous, current, limit, fraction, period)
+
+    def _incr(self, cache_key, period):
+        cache = caches[self.cache_alias]
+        try:
+            return cache.incr(cache_key)
+        except ValueError:
+            # First hit of the window. Kept for two periods, so the next window can
+            # still read it as its previous window.
+            if cache.add(cache_key, 1, timeout=2 * period):
+                return 1
+            return cache.incr(cache_key)
+
+    def _previous_count(self, cache_key, window):
+        memo_key = (cache_key, window)
+        count = self._previous.get(memo_key)
+        if count is None:
+            count = caches[self.cache_alias].get(cache_key, 0)
+            with self._previous_lock:
+                if len(self._previous) >= 100_000:
+                    # Memoized counts are only useful for one window; start over
+                    self._previous.clear()
+                self._previous[memo_key] = count
+        return count
+
+
+def _retry_after(previous, current, limit, fraction, period):
+    """
+    Seconds until the estimate leaves room for one more hit (falls to limit - 1),
+    assuming no hits in between, so a client that waits this long gets through.
+    """
+    room = limit - 1
+    if current > room:
+        # Wait out this window, then until this window's weight as the previous one
+        # has decayed far enough
+        seconds = (1 - fraction) * period + (1 - room / current) * period
+    else:
+        seconds = (previous * (1 - fraction) + current - room) / previous * period
+    return max(1, math.ceil(seconds))
+
+
+class LocalCounterStore:
+    """
+    In-process window counters with expiry, used while the cache is unreachable.
+    """
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def incr(self, key, period):
+        now = time.monotonic()
+        with self._lock:
+            count, expires = self._counts.get(key, (0, now + 2 * period))
+            if expires <= now:
+                count, expires = 0, now + 2 * period
+            self._counts[key] = (count + 1, expires)
+            if len(self._counts) > 100_000:
+                self._counts = {k: v for k, v in self._counts.items() if v[1] > now}
+            return count + 1
+
+    def get(self, key):
+        with self._lock:
+            count, expires = self._counts.get(key, (0, 0))
+        return count if expires > time.monotonic() else 0
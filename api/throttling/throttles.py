@@ -0,0 +1,84 @@
+import hashlib
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+from api.throttling.limiter import SlidingWindowLimiter, parse_rate
+from api.utils.metrics import registry
+
+THROTTLED_REQUESTS = registry.counter(
+    'throttled_requests_total', "Requests refused with 429 by a rate limit policy.", ['policy', 'scope'])
+
+_limiter = None
+_rules = {}
+
+
+class RoutePolicyThrottle(BaseThrottle):
+    """
+    Applies the THROTTLE_POLICIES rule list that THROTTLE_ROUTES assigns to the request's
+    URL name ("name:METHOD" first, then "name"), or the "default" policy.
+
+    Each rule is (scope, rate), with one of these scopes:
+
+    - ip: the client address (honours REST_FRAMEWORK NUM_PROXIES)
+    - anon: the client address, for anonymous requests only
+    - user: the authenticated user's ID, taken from the token claims
+    - email: the `email` field of the request body, e.g. login attempts per account
+
+    A rule whose scope doesn't apply to the request (no user, no email) is skipped, so
+    the default policy costs a single counter for any request.
+    """
+    def allow_request(self, request, view):
+        if not settings.THROTTLE_ENABLED:
+            return True
+        policy = _policy_for(request)
+        self._wait = 0
+        for scope, limit, period in _rules_for(policy):
+            ident = self._identity(scope, request)
+            if ident is None:
+                continue
+            allowed, retry_after = _get_limiter().hit(f"{policy}:{scope}:{ident}", limit, period)
+            if not allowed:
+                THROTTLED_REQUESTS.inc(policy=policy, scope=scope)
+                self._wait = retry_after
+                return False
+        return True
+
+    def wait(self):
+        return self._wait
+
+    def _identity(self, scope, request):
+        user = getattr(request, 'user', None)
+        authenticated = bool(user and user.is_authenticated)
+        if scope == 'ip' or (scope == 'anon' and not authenticated):
+            return self.get_ident(request)
+        if scope == 'user' and authenticated:
+            return str(user.pk)
+        if scope == 'email':
+            email = request.data.get('email') if hasattr(request.data, 'get') else None
+            if isinstance(email, str) and email.strip():
+                # Hashed: keeps addresses out of cache keys and bounds the key length
+                return hashlib.blake2b(email.strip().lower().encode(), digest_size=12).hexdigest()
+        return None
+
+
+def _policy_for(request):
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else None
+    routes = settings.THROTTLE_ROUTES
+    return routes.get(f"{view}:{request.method}", routes.get(view, 'default'))
+
+
+def _rules_for(policy):
+    # Parsed once per policy and settings object (override_settings swaps the dict)
+    policies = settings.THROTTLE_POLICIES
+    cached = _rules.get(policy)
+    if cached is None or cached[0] is not policies:
+        cached = _rules[policy] = (policies, [(scope, *parse_rate(rate)) for scope, rate in policies.get(policy, ())])
+    return cached[1]
+
+
+def _get_limiter():
+    global _limiter
+    if _limiter is None:
+        _limiter = SlidingWindowLimiter(settings.THROTTLE_CACHE)
+    return _limiter
@@ -0,0 +1,171 @@
+"""
+Bloom filters over integer IDs, stored as compact byte strings.
+
+A BloomFilter answers "was this ID added?" with no false negatives and a false
+positive rate of about `error_rate` once `capacity` IDs are in it. Each ID is mixed
+with splitmix64 (salted per filter, so two users' filters don't report the same false
+positives) and its k bit positions are derived from the two halves of the hash
+(Kirsch-Mitzenmacher double hashing). Membership of a whole array of IDs is tested in
+one NumPy pass, O(k) per ID whatever the number of IDs stored.
+
+ScalableBloomFilter grows without being told its final size: when the newest layer
+is full it adds one with twice the capacity and half the error rate, so the overall
+false positive rate stays around 2 * error_rate at most and a small set stays small.
+"""
+import math
+import struct
+
+import numpy as np
+
+_HEADER = struct.Struct('<BBQ')  # format version, layer count, salt
+_LAYER = struct.Struct('<IIIB')  # capacity, count, bits, hashes
+_FORMAT_VERSION = 1
+# NumPy scalars built once: creating them costs as much as a small array operation
+_MASK32, _ONE, _SHIFTS = np.uint64(0xFFFFFFFF), np.uint64(1), [np.uint64(n) for n in (32, 30, 27, 31)]
+_GOLDEN, _MIX1, _MIX2 = np.uint64(0x9E3779B97F4A7C15), np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB)
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate, salt=0):
+        self.capacity = capacity
+        self.count = 0
+        # Optimal size for `capacity` items at `error_rate`, rounded up to whole bytes
+        self.size = 8 * math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2 / 8)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.salt = salt
+        self.bits = np.zeros(self.size // 8, dtype=np.uint8)
+
+    @property
+    def is_full(self):
+        return self.count >= self.capacity
+
+    def add_many(self, ids, hashed=None):
+        """
+        Adds the IDs not already present and returns how many that was.
+        """
+        hashed = _hash(ids, self.salt) if hashed is None else hashed
+        new = np.unique(hashed[~self._contains(hashed)])
+        self._insert(new)
+        return len(new)
+
+    def contains_many(self, ids, hashed=None):
+        """
+        Returns a boolean array: True where the ID was (probably) added.
+        """
+        return self._contains(_hash(ids, self.salt) if hashed is None else hashed)
+
+    def __contains__(self, item):
+        return bool(self.contains_many([item])[0])
+
+    def __len__(self):
+        return self.count
+
+    def _contains(self, hashed):
+        if not len(hashed):
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(hashed)
+        return ((self.bits[positions >> 3] >> (positions & 7)) & 1).all(axis=1)
+
+    def _insert(self, hashed):
+        # `hashed` must hold distinct values that are not in the filter yet
+        if len(hashed):
+            positions = self._positions(hashed).ravel()
+            np.bitwise_or.at(self.bits, positions >> 3, (1 << (positions & 7)).astype(np.uint8))
+            self.count += len(hashed)
+
+    def _positions(self, hashed):
+        # One row of `hashes` bit positions per ID: h1 + i * h2 (mod size)
+        h1, h2 = hashed & _MASK32, (hashed >> _SHIFTS[0]) | _ONE
+        steps = np.arange(self.hashes, dtype=np.uint64)
+        return ((h1[:, None] + steps * h2[:, None]) % np.uint64(self.size)).astype(np.int64)
+
+
+class ScalableBloomFilter:
+    def __init__(self, capacity, error_rate, salt=0, layers=None):
+        self.error_rate = error_rate
+        self.salt = salt
+        self.layers = layers or [BloomFilter(capacity, error_rate, salt)]
+
+    def add_many(self, ids):
+        """
+        Adds the IDs not already present and returns how many that was.
+        """
+        hashed = _hash(ids, self.salt)
+        hashed = np.unique(hashed[~self._contains(hashed)])
+        added = len(hashed)
+        while len(hashed):
+            layer = self.layers[-1]
+            if layer.is_full:
+                layer = BloomFilter(layer.capacity * 2, self._layer_error_rate(len(self.layers)), self.salt)
+                self.layers.append(layer)
+            room = layer.capacity - layer.count
+            layer._insert(hashed[:room])
+            hashed = hashed[room:]
+        return added
+
+    def contains_many(self, ids):
+        """
+        Returns a boolean array: True where the ID was (probably) added.
+        """
+        return self._contains(_hash(ids, self.salt))
+
+    def __contains__(self, item):
+        return bool(self.contains_many([item])[0])
+
+    def __len__(self):
+        return sum(layer.count for layer in self.layers)
+
+    @property
+    def nbytes(self):
+        return sum(layer.bits.nbytes for layer in self.layers)
+
+    def to_bytes(self):
+        parts = [_HEADER.pack(_FORMAT_VERSION, len(self.layers), self.salt)]
+        for layer in self.layers:
+            parts.append(_LAYER.pack(layer.capacity, layer.count, layer.size, layer.hashes))
+            parts.append(layer.bits.tobytes())
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data, error_rate):
+        """
+        Loads a filter written by to_bytes. `error_rate` is the rate of the first layer,
+        used to size layers added from now on.
+        """
+        data = bytes(data)
+        version, layer_count, salt = _HEADER.unpack_from(data)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Unknown Bloom filter format {version}.")
+        offset = _HEADER.size
+        layers = []
+        for _ in range(layer_count):
+            capacity, count, size, hashes = _LAYER.unpack_from(data, offset)
+            offset += _LAYER.size
+            bits = np.frombuffer(data, dtype=np.uint8, count=size // 8, offset=offset).copy()
+            offset += size // 8
+            layer = BloomFilter.__new__(BloomFilter)
+            layer.capacity, layer.count, layer.size, layer.hashes, layer.salt, layer.bits = (
+                capacity, count, size, hashes, salt, bits)
+            layers.append(layer)
+        return cls(layers[0].capacity, error_rate, salt, layers)
+
+    def _contains(self, hashed):
+        found = np.zeros(len(hashed), dtype=bool)
+        for layer in self.layers:
+            if layer.count:
+                found |= layer._contains(hashed)
+        return found
+
+    def _layer_error_rate(self, index):
+        return self.error_rate * 0.5 ** index
+
+
+def _hash(ids, salt):
+    """
+    splitmix64 of each ID xor the salt, as a uint64 array. Integer overflow wraps,
+    which is what the mixer expects.
+    """
+    x = (np.asarray(ids, dtype=np.int64).astype(np.uint64) ^ np.uint64(salt)) + _GOLDEN
+    x = (x ^ (x >> _SHIFTS[1])) * _MIX1
+    x = (x ^ (x >> _SHIFTS[2])) * _MIX2
+    return x ^ (x >> _SHIFTS[3])
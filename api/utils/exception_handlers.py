@@ -12,7 +12,12 @@ def custom_exception_handler(exc, context):
     if response is not None:
         errors = response.data
         message = errors.pop('detail', 'An error occurred') if 'detail' in errors else 'Validation errors'
-        return error_response(message=message, errors=errors, status_code=response.status_code)
+        custom = error_response(message=message, errors=errors, status_code=response.status_code)
+        # Keep Retry-After (throttling) and WWW-Authenticate from the default response
+        for header in ('Retry-After', 'WWW-Authenticate'):
+            if header in response:
+                custom[header] = response[header]
+        return custom
 
     # If no response is generated, return a generic error response
     return error_response(message="An unexpected error occurred", status_code=500)
@@ -30,7 +35,12 @@ def custom_exception_handler(exc, context):
     if response is not None:
         errors = response.data
         message = errors.pop('detail', 'An error occurred') if 'detail' in errors else 'Validation errors'
-        return error_response(message=message, errors=errors, status_code=response.status_code)
+        custom = error_response(message=message, errors=errors, status_code=response.status_code)
+        # Keep Retry-After (throttling) and WWW-Authenticate from the default response
+        for header in ('Retry-After', 'WWW-Authenticate'):
+            if header in response:
+                custom[header] = response[header]
+        return custom
 
     # If no response is generated, return a generic error response
     return error_response(message="An unexpected error occurred", status_code=500)
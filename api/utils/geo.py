@@ -0,0 +1,46 @@
+import math
+
+import numpy as np
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """
+    Returns the great-circle distance between two points in miles.
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+
+def bounding_box(lat, lon, radius_miles):
+    """
+    Returns (min_lat, max_lat, min_lon, max_lon) for a box that contains every point
+    within radius_miles of (lat, lon). Used as an index-friendly prefilter before the
+    exact haversine check.
+    """
+    dlat = radius_miles / MILES_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(lat))
+    # Close to the poles a degree of longitude shrinks to nothing, so take every longitude
+    dlon = 180.0 if cos_lat < 1e-6 else min(radius_miles / (MILES_PER_DEGREE_LAT * cos_lat), 180.0)
+    return (
+        max(lat - dlat, -90.0),
+        min(lat + dlat, 90.0),
+        max(lon - dlon, -180.0),
+        min(lon + dlon, 180.0),
+    )
+
+
+def haversine_miles_array(lat, lon, lats, lons):
+    """
+    Vectorised haversine: distances in miles from (lat, lon) to every point in the
+    `lats`/`lons` NumPy arrays.
+    """
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
@@ -0,0 +1,69 @@
+"""
+Bounded worker pool for password hash verification.
+
+PBKDF2 is CPU bound and hashlib releases the GIL while hashing, so a small thread pool
+uses the available cores without letting a login storm queue unbounded work behind
+every request thread. Work beyond the pool's capacity is refused immediately.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+
+
+class PoolSaturated(Exception):
+    """
+    Raised when the pool already holds its maximum number of pending verifications.
+    """
+
+
+class BoundedHashPool:
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+
+    def check_password(self, password, encoded, timeout=None):
+        """
+        Verifies `password` against the stored hash on a pool thread. Raises PoolSaturated
+        without waiting when max_pending verifications are already running or queued.
+        """
+        return self._submit(password, encoded).result(timeout=timeout)
+
+    async def acheck_password(self, password, encoded, timeout=None):
+        """
+        Async variant of check_password: the event loop waits on the pool's future
+        instead of a thread blocking on it.
+        """
+        return await asyncio.wait_for(asyncio.wrap_future(self._submit(password, encoded)), timeout)
+
+    def _submit(self, password, encoded):
+        if not self._slots.acquire(blocking=False):
+            raise PoolSaturated()
+        try:
+            future = self._executor.submit(check_password, password, encoded)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hash_pool():
+    """
+    Returns the process-wide pool, created on first use from LOGIN_HASH_WORKERS and
+    LOGIN_HASH_MAX_PENDING.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BoundedHashPool(settings.LOGIN_HASH_WORKERS, settings.LOGIN_HASH_MAX_PENDING)
+    return _pool
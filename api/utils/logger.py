@@ -1,18 +1,185 @@
+"""
+Application logging.
+
+The helpers take a %-style message and its arguments, formatted only if a handler
+actually emits the record. Keyword arguments are attached as structured fields and
+show up as keys in JSON output:
+
+    log_info("User profile retrieved for ID %s", pk, profile_id=pk)
+
+Django calls configure_logging() with settings.LOGGING (see LOGGING_CONFIG). On top of
+dictConfig, it sets up three things:
+
+- Every record is stamped with the request's correlation ID, set by RequestIDMiddleware.
+- Records at INFO and below are sampled per request (LOG_SAMPLE_RATE). A sampled-in
+  request keeps all its records, and warnings and errors are always kept.
+- With LOG_ASYNC, the configured handlers are moved behind a bounded queue drained by
+  a listener thread, so a request only enqueues its records and never waits on disk or
+  console I/O. When the queue is full, records are dropped and counted rather than
+  blocking.
+"""
+import atexit
+import contextvars
+import copy
+import datetime
+import json
 import logging
+import logging.config
+import logging.handlers
+import queue
+import random
+import zlib
+
+from django.conf import settings
+from api.utils.metrics import registry
 
 logger = logging.getLogger(__name__)
 
-def log_action(action, message):
-    logger.info(f"{action}: {message}")
+LOG_RECORDS_DROPPED = registry.counter(
+    'log_records_dropped_total', "Log records dropped because the logging queue was full.")
+
+# Correlation ID of the request being handled, '-' outside requests
+request_id = contextvars.ContextVar('request_id', default='-')
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+def log_action(action, message, *args, **fields):
+    _log(logging.INFO, f"{action}: {message}", args, fields)
+
+def log_info(message, *args, **fields):
+    _log(logging.INFO, message, args, fields)
+
+def log_error(message, *args, **fields):
+    _log(logging.ERROR, message, args, fields)
+
+def log_warning(message, *args, **fields):
+    _log(logging.WARNING, message, args, fields)
+
+def log_debug(message, *args, **fields):
+    _log(logging.DEBUG, message, args, fields)
+
+def _log(level, message, args, fields):
+    if logger.isEnabledFor(level):
+        # stacklevel points records at the helper's caller, not at this module
+        logger.log(level, message, *args, extra={'fields': fields} if fields else None, stacklevel=3)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Stamps records with the current request ID and applies per-request sampling to
+    records at INFO and below.
+    """
+    def __init__(self, sample_rate=1.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        current = request_id.get()
+        if current == '-':
+            # django.request logs a failed response after the middleware returned, but
+            # passes the request along
+            current = getattr(getattr(record, 'request', None), 'request_id', '-')
+        record.request_id = current
+        if self.sample_rate >= 1.0 or record.levelno > logging.INFO:
+            return True
+        if current == '-':
+            return random.random() < self.sample_rate
+        # Keyed on the request ID so a request's records are kept or dropped together
+        return zlib.crc32(current.encode()) % 10_000 < self.sample_rate * 10_000
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object per line: time, level, logger, message,
+    request_id, any structured fields, and the traceback when there is one.
+    """
+    def format(self, record):
+        entry = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES and name not in ('fields', 'request_id') and name not in entry:
+                entry[name] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for a bounded queue: when the queue is full the record is counted and
+    dropped instead of blocking the caller.
+    """
+    _exception_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        # Merge the arguments now, while they still hold the caller's values, but leave
+        # formatting to the target handlers' formatters on the listener thread
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+_listeners = []
+
+def configure_logging(config):
+    """
+    LOGGING_CONFIG hook: applies `config` with dictConfig, then adds the correlation ID
+    and sampling filter and, with LOG_ASYNC, the queue in front of each logger's handlers.
+    """
+    stop_listeners()
+    logging.config.dictConfig(config)
+    context_filter = ContextFilter(settings.LOG_SAMPLE_RATE)
 
-def log_info(message):
-    logger.info(f"INFO: {message}")
+    loggers = [logging.getLogger(name) for name in config.get('loggers', {})]
+    if 'root' in config:
+        loggers.append(logging.getLogger())
 
-def log_error(message):
-    logger.error(f"ERROR: {message}")
+    # Loggers with the same handlers share one queue and listener thread
+    queue_handlers = {}
+    for configured in loggers:
+        handlers = tuple(configured.handlers)
+        if not handlers:
+            continue
+        if not settings.LOG_ASYNC:
+            for handler in handlers:
+                if context_filter not in handler.filters:
+                    handler.addFilter(context_filter)
+            continue
+        if handlers not in queue_handlers:
+            records = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+            queue_handler = DroppingQueueHandler(records)
+            queue_handler.addFilter(context_filter)
+            listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+            listener.start()
+            _listeners.append(listener)
+            queue_handlers[handlers] = queue_handler
+        for handler in handlers:
+            configured.removeHandler(handler)
+        configured.addHandler(queue_handlers[handlers])
 
-def log_warning(message):
-    logger.warning(f"WARNING: {message}")
+def stop_listeners():
+    """
+    Flushes the queued records and stops the listener threads.
+    """
+    while _listeners:
+        _listeners.pop().stop()
 
-def log_debug(message):
-    logger.debug(f"DEBUG: {message}")
+atexit.register(stop_listeners)
@@ -0,0 +1,36 @@
+import base64
+import json
+
+from rest_framework.exceptions import ValidationError
+
+def encode_cursor(position):
+    """
+    Encodes a keyset position (a dict of the last row's ordering values) as an opaque cursor.
+    """
+    raw = json.dumps(position, separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor, keys):
+    """
+    Decodes a cursor produced by encode_cursor and checks it carries exactly `keys`.
+    Returns None for an empty cursor (first page).
+    """
+    if not cursor:
+        return None
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid cursor.")
+    if not isinstance(position, dict) or set(position) != set(keys):
+        raise ValidationError("Invalid cursor.")
+    return position
+
+def keyset_page(rows, page_size, position_of):
+    """
+    Splits a list of page_size + 1 rows into (page, next_cursor). The extra row only
+    signals that another page exists; the cursor points at the last row shown.
+    """
+    rows = list(rows)
+    page = rows[:page_size]
+    next_cursor = encode_cursor(position_of(page[-1])) if len(rows) > page_size else None
+    return page, next_cursor
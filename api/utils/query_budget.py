@@ -0,0 +1,52 @@
+"""
+Test helpers for SQL query budgets.
+
+    response = client.post('/api/auth/register/', data)
+    assert_query_budget(response)              # budget from settings.QUERY_BUDGETS
+    assert_query_budget(response, budget=3)    # explicit budget
+
+    with query_budget(2):
+        get_user_profile_by_id(pk)
+"""
+import contextlib
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from api.middleware.instrumentation import query_budget_for
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def assert_query_budget(response, budget=None):
+    """
+    Fails when the request behind `response` ran more queries than `budget`, or than the
+    view's entry in settings.QUERY_BUDGETS when no budget is given. Requires
+    RequestMetricsMiddleware. Returns the query count.
+    """
+    metrics = getattr(response, 'request_metrics', None)
+    if metrics is None:
+        raise AssertionError("Response has no request metrics; is RequestMetricsMiddleware installed?")
+
+    if budget is None:
+        budget = query_budget_for(metrics['view'], metrics['method'])
+        if budget is None:
+            raise AssertionError(f"No query budget declared for {metrics['method']} '{metrics['view']}' in QUERY_BUDGETS.")
+
+    if metrics['queries'] > budget:
+        raise QueryBudgetExceeded(f"{metrics['view']} ran {metrics['queries']} queries, budget is {budget}.")
+    return metrics['queries']
+
+
+@contextlib.contextmanager
+def query_budget(budget, using='default'):
+    """
+    Fails when the block runs more than `budget` queries on the `using` database.
+    The captured queries are listed in the failure message.
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    if len(context) > budget:
+        queries = '\n'.join(f"  {i}. {q['sql']}" for i, q in enumerate(context.captured_queries, start=1))
+        raise QueryBudgetExceeded(f"{len(context)} queries executed, budget is {budget}:\n{queries}")
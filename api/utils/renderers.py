@@ -0,0 +1,37 @@
+"""
+JSON rendering with orjson.
+
+ORJSONRenderer produces the same JSON as DRF's JSONRenderer with compact output:
+values orjson can't encode natively go through DRF's JSONEncoder.default, and so do
+datetimes, so they keep DRF's format. It encodes in a single C call, without
+json.dumps's per-object Python callbacks. Falls back to DRF's renderer if orjson is
+not installed, and for indented output (`Accept: application/json; indent=4`).
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+_default = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # json.dumps turns int, float, bool and None keys into strings; orjson only does with OPT_NON_STR_KEYS
+        rendered = orjson.dumps(
+            data, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+        # Same as DRF: escape the two line separators that are invalid in JavaScript strings
+        if b'\xe2\x80\xa8' in rendered or b'\xe2\x80\xa9' in rendered:
+            rendered = rendered.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return rendered
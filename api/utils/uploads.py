@@ -0,0 +1,34 @@
+"""
+Upload handling that never holds a whole file in memory.
+"""
+import hashlib
+
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+
+
+class HashingFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams every uploaded file to a temporary file on disk, chunk by chunk, and
+    computes its SHA-256 as the chunks arrive. The digest is set as `content_hash` on
+    the uploaded file, so deduplicating it needs no second pass over the data.
+    Files larger than `max_bytes` are dropped as soon as they cross the limit.
+    """
+    def __init__(self, request=None, max_bytes=None):
+        super().__init__(request)
+        self.max_bytes = max_bytes
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.max_bytes is not None and start + len(raw_data) > self.max_bytes:
+            self.file.close()
+            raise SkipFile()
+        self._digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.content_hash = self._digest.hexdigest()
+        return uploaded
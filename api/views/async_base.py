@@ -0,0 +1,71 @@
+"""
+Async counterparts of DRF's APIView and ViewSet.
+
+DRF dispatches synchronously, so under ASGI an ordinary view runs in a worker thread.
+These classes dispatch on the event loop instead: authentication (claims only, see
+ClaimsJWTAuthentication), permissions and rendering run inline, async handlers are
+awaited and sync handlers are moved to a thread with sync_to_async. The rendered body
+is handed to Django as a plain HttpResponse, so Django doesn't hop to a thread again
+just to render it.
+"""
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import HttpResponse
+from rest_framework.views import APIView
+from rest_framework.viewsets import ViewSetMixin
+
+
+class AsyncAPIView(APIView):
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            self.initial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.render_response(self.response)
+
+    def render_response(self, response):
+        if not hasattr(response, 'render'):
+            return response  # A plain Django response (e.g. a 304 from get_conditional_response)
+
+        # Same timing hooks RequestMetricsMiddleware sets up through process_template_response
+        django_request = self.request._request
+        django_request._render_started = time.perf_counter()
+        response.render()
+        django_request._render_finished = time.perf_counter()
+
+        rendered = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            rendered[header] = value
+        return rendered
+
+
+class AsyncViewSet(ViewSetMixin, AsyncAPIView):
+    """
+    ViewSet whose actions may be coroutines. Sync actions (e.g. an inherited `list`)
+    still work and run in a thread.
+    """
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        # ViewSetMixin builds its own view function; mark it so Django awaits it
+        return markcoroutinefunction(view)
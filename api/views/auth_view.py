@@ -1,13 +1,15 @@
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny
-from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.exceptions import AuthenticationFailed, Throttled, ValidationError
 from rest_framework.response import Response
 from rest_framework import status, serializers
 from api.utils.responses import success_response, error_response
 from api.utils.validators import verify_required_params
-from api.services.auth_service import register_user  # Import the new service
+from api.services.auth_service import aauthenticate_by_email, aregister_user, register_user  # Import the new service
+from api.services.import_service import import_users, iter_import_rows, open_text_upload
 from rest_framework_simplejwt.views import TokenObtainPairView
-from api.serializers.auth_serializer import EmailTokenObtainPairSerializer
+from api.serializers.auth_serializer import EmailLoginSerializer, EmailTokenObtainPairSerializer
+from api.views.async_base import AsyncAPIView
 
 
 class RegisterView(APIView):
@@ -47,5 +49,95 @@ class EmailLoginView(APIView):
         except serializers.ValidationError as e:
             return error_response(message="Validation errors", errors=e.detail, status_code=status.HTTP_400_BAD_REQUEST)
 
+        except AuthenticationFailed as e:
+            return error_response(message="Invalid credentials", errors=e.detail, status_code=status.HTTP_401_UNAUTHORIZED)
+
+        except Throttled as e:
+            # The hashing pool is full: turn the client away before any hashing work
+            response = error_response(message=str(e.detail), status_code=status.HTTP_429_TOO_MANY_REQUESTS)
+            response['Retry-After'] = str(e.wait)
+            return response
+
         except Exception as e:
-            return error_response(message="An unexpected error occurred", errors=str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return error_response(message="An unexpected error occurred", errors=str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncRegisterView(AsyncAPIView):
+    """
+    RegisterView for ASGI deployments (routed when ASYNC_VIEWS is set).
+    """
+    permission_classes = [AllowAny]
+
+    async def post(self, request):
+        required_params = ['name', 'email', 'password', 'gender', 'bio', 'looking_for', 'zipcode', 'birthday', 'distance']
+
+        try:
+            verify_required_params(request.data, required_params)
+            await aregister_user(request.data)
+            return success_response(message="Registration successful.", status_code=201)
+
+        except ValidationError as e:
+            return error_response(message=str(e), status_code=400)
+
+        except Exception as e:
+            return error_response(message="Something went wrong.", errors=str(e), status_code=500)
+
+
+class AsyncEmailLoginView(AsyncAPIView):
+    """
+    EmailLoginView for ASGI deployments (routed when ASYNC_VIEWS is set). The email
+    lookup runs on the async ORM and the hash check is awaited on the hashing pool, so
+    no thread is held while either is in progress.
+    """
+    async def post(self, request, *args, **kwargs):
+        serializer = EmailLoginSerializer(data=request.data)
+
+        try:
+            serializer.is_valid(raise_exception=True)
+            user = await aauthenticate_by_email(serializer.validated_data['email'], serializer.validated_data['password'])
+            token_data = EmailTokenObtainPairSerializer.tokens_for_user(user)
+
+            return success_response(data=token_data, message="Login successful", status_code=status.HTTP_200_OK)
+
+        except serializers.ValidationError as e:
+            return error_response(message="Validation errors", errors=e.detail, status_code=status.HTTP_400_BAD_REQUEST)
+
+        except AuthenticationFailed as e:
+            return error_response(message="Invalid credentials", errors=e.detail, status_code=status.HTTP_401_UNAUTHORIZED)
+
+        except Throttled as e:
+            response = error_response(message=str(e.detail), status_code=status.HTTP_429_TOO_MANY_REQUESTS)
+            response['Retry-After'] = str(e.wait)
+            return response
+
+        except Exception as e:
+            return error_response(message="An unexpected error occurred", errors=str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class BulkRegisterView(APIView):
+    """
+    Admin-only batch registration. Accepts either an uploaded `file` (CSV or JSONL, see
+    `format`) that is streamed in chunks, or a JSON body with a `users` list.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        try:
+            if 'file' in request.FILES:
+                fmt = request.data.get('format', 'csv')
+                rows = iter_import_rows(open_text_upload(request.FILES['file']), fmt)
+            elif isinstance(request.data.get('users'), list):
+                rows = enumerate(
+                    (row if isinstance(row, dict) else None for row in request.data['users']), start=1
+                )
+            else:
+                raise ValidationError("Provide a CSV/JSONL `file` or a `users` list.")
+
+            report = import_users(rows)
+            return success_response(data=report.as_dict(max_errors=1000), message="Import finished.", status_code=200)
+
+        except (ValidationError, ValueError) as e:
+            return error_response(message=str(e), status_code=400)
+
+        except Exception as e:
+            return error_response(message="Something went wrong.", errors=str(e), status_code=500)
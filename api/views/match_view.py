@@ -0,0 +1,94 @@
+from django.conf import settings
+from rest_framework import viewsets
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from api.models import UserProfile
+from api.serializers.match_serializer import MatchCandidateSerializer
+from api.services.match_service import get_match_feed_page, rank_match_candidates
+from api.services.swipe_service import submit_swipes
+from api.services.user_profile_service import get_user_profile_for_user
+from api.utils.responses import success_response, error_response
+from api.utils.logger import log_error, log_info
+
+class MatchCandidateViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        try:
+            page = int(request.query_params.get('page', 1))
+            page_size = min(int(request.query_params.get('page_size', settings.MATCH_PAGE_SIZE)), settings.MATCH_CANDIDATE_LIMIT)
+            if page < 1 or page_size < 1:
+                raise ValueError
+        except ValueError:
+            return error_response(message="page and page_size must be positive integers.", status_code=400)
+
+        try:
+            profile = get_user_profile_for_user(request.user)
+            ranked = rank_match_candidates(profile, page=page, page_size=page_size)
+        except UserProfile.DoesNotExist:
+            log_error("User profile not found for user %s", request.user.pk)
+            return error_response(message="User profile not found", status_code=404)
+        except ValidationError as e:
+            return error_response(message="Validation errors", errors=e.detail, status_code=400)
+
+        # Hydrate the page in one query and keep the ranked order
+        distances = {pk: distance for pk, _, distance in ranked}
+        profiles = UserProfile.objects.select_related('user').in_bulk(distances.keys())
+        ordered = [profiles[pk] for pk, _, _ in ranked if pk in profiles]
+        log_info("%s match candidates returned for profile %s", len(ordered), profile.pk)
+
+        data = MatchCandidateSerializer.serialize_many(ordered, context={'distances': distances})
+        return success_response(data=data, message="Match candidates retrieved")
+
+
+class MatchFeedViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        try:
+            page_size = min(int(request.query_params.get('page_size', settings.MATCH_PAGE_SIZE)), settings.MATCH_CANDIDATE_LIMIT)
+            if page_size < 1:
+                raise ValueError
+        except ValueError:
+            return error_response(message="page_size must be a positive integer.", status_code=400)
+
+        try:
+            profile = get_user_profile_for_user(request.user)
+            entries, next_cursor = get_match_feed_page(profile, cursor=request.query_params.get('cursor'), page_size=page_size)
+        except UserProfile.DoesNotExist:
+            log_error("User profile not found for user %s", request.user.pk)
+            return error_response(message="User profile not found", status_code=404)
+        except ValidationError as e:
+            return error_response(message="Validation errors", errors=e.detail, status_code=400)
+
+        distances = {entry.candidate_id: entry.distance for entry in entries}
+        results = MatchCandidateSerializer.serialize_many(
+            [entry.candidate for entry in entries], context={'distances': distances}
+        )
+        return success_response(
+            data={'results': results, 'next_cursor': next_cursor},
+            message="Match feed retrieved",
+        )
+
+
+class SwipeViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+
+    def create(self, request):
+        """
+        Accepts {"target": <profile id>, "liked": true|false}, or {"swipes": [...]} of those.
+        Swipes are written in batches shortly after the response; mutual likes are
+        announced as match events.
+        """
+        swipes = request.data.get('swipes', [request.data]) if hasattr(request.data, 'get') else None
+        profile_id = getattr(request.user, 'profile_id', None)
+        try:
+            if profile_id is None:
+                profile_id = get_user_profile_for_user(request.user).pk
+            queued = submit_swipes(profile_id, swipes)
+        except UserProfile.DoesNotExist:
+            log_error("User profile not found for user %s", request.user.pk)
+            return error_response(message="User profile not found", status_code=404)
+        except ValidationError as e:
+            return error_response(message="Validation errors", errors=e.detail, status_code=400)
+        return success_response(data={'queued': queued}, message="Swipes accepted", status_code=202)
@@ -0,0 +1,79 @@
+from rest_framework import viewsets
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import NotFound, ValidationError
+from api.serializers.message_serializer import ConversationSerializer, InboxEntrySerializer, MessageSerializer
+from api.services.message_service import (
+    get_or_create_direct_conversation, list_conversation_messages, list_conversations, mark_conversation_read,
+)
+from api.utils.responses import success_response, error_response
+from api.utils.logger import log_error, log_info
+
+class ConversationViewSet(viewsets.ViewSet):
+    """
+    Lists the inbox, opens conversations and serves their history. Sending and receiving
+    messages happens over the WebSocket endpoint (api.realtime.consumer).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        try:
+            page_size = _page_size(request)
+            # One page of the inbox, most recently active conversations first
+            memberships, next_cursor = list_conversations(
+                request.user.id, cursor=request.query_params.get('cursor'), page_size=page_size
+            )
+        except ValidationError as e:
+            return error_response(message="Validation errors", errors=e.detail, status_code=400)
+
+        serializer = InboxEntrySerializer(memberships, many=True)
+        return success_response(data={"results": serializer.data, "next_cursor": next_cursor}, message="Conversations retrieved")
+
+    def create(self, request):
+        try:
+            other_user_id = int(request.data.get('user_id'))
+        except (TypeError, ValueError):
+            return error_response(message="user_id must be an integer.", status_code=400)
+
+        try:
+            conversation, created = get_or_create_direct_conversation(request.user.id, other_user_id)
+        except ValidationError as e:
+            return error_response(message="Validation errors", errors=e.detail, status_code=400)
+        except NotFound as e:
+            return error_response(message=str(e.detail), status_code=404)
+
+        if created:
+            log_info("Conversation %s opened by user %s", conversation.pk, request.user.id)
+        serializer = ConversationSerializer(conversation)
+        return success_response(data=serializer.data, message="Conversation ready", status_code=201 if created else 200)
+
+    def messages(self, request, pk=None):
+        try:
+            page_size = _page_size(request)
+            messages, next_cursor = list_conversation_messages(
+                pk, request.user.id, cursor=request.query_params.get('cursor'), page_size=page_size
+            )
+        except ValidationError as e:
+            return error_response(message="Validation errors", errors=e.detail, status_code=400)
+        except NotFound as e:
+            log_error("Conversation %s not found for user %s", pk, request.user.id)
+            return error_response(message=str(e.detail), status_code=404)
+
+        serializer = MessageSerializer(messages, many=True)
+        return success_response(data={"results": serializer.data, "next_cursor": next_cursor}, message="Messages retrieved")
+
+    def read(self, request, pk=None):
+        try:
+            mark_conversation_read(pk, request.user.id)
+        except NotFound as e:
+            return error_response(message=str(e.detail), status_code=404)
+        return success_response(message="Conversation marked as read")
+
+def _page_size(request):
+    page_size = request.query_params.get('page_size')
+    try:
+        page_size = int(page_size) if page_size else None
+    except ValueError:
+        page_size = 0
+    if page_size is not None and page_size < 1:
+        raise ValidationError({"page_size": "Must be a positive integer."})
+    return page_size
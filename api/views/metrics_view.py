@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from api.utils.metrics import registry
+
+def metrics_view(request):
+    """
+    Exposes the in-process metrics in the Prometheus text format. Only the addresses in
+    METRICS_ALLOWED_IPS may scrape it.
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
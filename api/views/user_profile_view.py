@@ -1,57 +1,251 @@
 from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework import status
+from api.models import UserProfile
+from api.permissions.permissions import IsProfileOwnerOrReadOnly
 from api.serializers import UserProfileSerializer
-from api.services.user_profile_service import get_user_profile_by_id, create_user_profile, update_user_profile
+from api.services.user_profile_service import get_serialized_user_profile, create_user_profile, update_user_profile, list_user_profiles
+from api.services.user_profile_service import acreate_user_profile, aget_serialized_user_profile, aupdate_user_profile
+from api.services.user_profile_service import VersionConflict, aget_user_profile_validators, get_user_profile_validators
+from api.services.user_profile_service import get_serialized_user_profiles
+from api.services.picture_service import picture_urls, upload_profile_picture
+from api.models import ProfilePicture
+from api.utils.uploads import HashingFileUploadHandler
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, parse_etags
+from api.views.async_base import AsyncViewSet
 from api.utils.logger import log_error, log_info
 from rest_framework.exceptions import ValidationError
 
 class UserProfileViewSet(viewsets.ViewSet):
+    permission_classes = [IsProfileOwnerOrReadOnly]
+
+    def list(self, request):
+        try:
+            page_size = request.query_params.get('page_size')
+            page_size = int(page_size) if page_size else None
+            if page_size is not None and page_size < 1:
+                raise ValueError
+        except ValueError:
+            return Response({"error": "page_size must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Fetch one keyset page of profiles using the service layer
+            profiles, next_cursor = list_user_profiles(
+                request.query_params, cursor=request.query_params.get('cursor'), page_size=page_size
+            )
+            results = UserProfileSerializer.serialize_many(profiles)
+            return Response({"results": results, "next_cursor": next_cursor})
+        except ValidationError as e:
+            log_error("Validation error during profile listing: %s", e)
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     def retrieve(self, request, pk=None):
         try:
-            # Fetch the user profile using the service layer
-            profile = get_user_profile_by_id(pk)
-            log_info(f"User profile retrieved for ID {pk}")
-            
-            # Serialize the retrieved profile
-            serializer = UserProfileSerializer(profile)
-            return Response(serializer.data)
+            if _is_conditional(request):
+                # Compared against the version alone: the profile isn't loaded or serialized
+                not_modified = _not_modified(request, *get_user_profile_validators(pk))
+                if not_modified is not None:
+                    return not_modified
+
+            # Fetch the serialized user profile through the cache in the service layer
+            data = get_serialized_user_profile(pk)
+            log_info("User profile retrieved for ID %s", pk)
+            return Response(data, headers=_validator_headers(data['version'], parse_datetime(data['updated_at'])))
         except UserProfile.DoesNotExist:
-            log_error(f"User profile not found for ID {pk}")
+            log_error("User profile not found for ID %s", pk)
             return Response({"error": "User profile not found"}, status=status.HTTP_404_NOT_FOUND)
 
+    def batch(self, request):
+        """
+        Returns the profiles listed in `ids` (comma separated, at most PROFILE_BATCH_MAX_IDS)
+        in the requested order, e.g. to hydrate a swipe deck in one round trip. `fields`
+        limits each profile to the named fields. IDs of unknown profiles are listed
+        under "missing".
+        """
+        try:
+            ids = list(dict.fromkeys(int(pk) for pk in request.query_params.get('ids', '').split(',') if pk.strip()))
+        except ValueError:
+            return Response({"error": "ids must be a comma-separated list of profile IDs."}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids or len(ids) > settings.PROFILE_BATCH_MAX_IDS:
+            return Response(
+                {"error": f"Pass between 1 and {settings.PROFILE_BATCH_MAX_IDS} profile IDs."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fields = [name.strip() for name in request.query_params.get('fields', '').split(',') if name.strip()]
+        unknown = set(fields) - set(UserProfileSerializer.Meta.fields)
+        if unknown:
+            return Response({"error": f"Unknown fields: {', '.join(sorted(unknown))}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        payloads = get_serialized_user_profiles(ids)
+        if fields:
+            payloads = {pk: {name: payload[name] for name in fields} for pk, payload in payloads.items()}
+        log_info("%s of %s user profiles retrieved in a batch", len(payloads), len(ids))
+        return Response({
+            "results": [payloads[pk] for pk in ids if pk in payloads],
+            "missing": [pk for pk in ids if pk not in payloads],
+        })
+
     def create(self, request):
         try:
             # Create a user profile using the service layer
-            profile = create_user_profile(request.data)
-            log_info(f"User profile created for user {profile.user.username}")
-            
-            # Serialize the created profile
-            serializer = UserProfileSerializer(profile)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        except ValidationError as e:
-            log_error(f"Validation error during profile creation: {e}")
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return _created(create_user_profile(request.data))
         except Exception as e:
-            log_error(f"Error during profile creation: {e}")
-            return Response({"error": "An error occurred while creating the profile."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return _create_failed(e)
 
     def update(self, request, pk=None):
         try:
             # Fetch and update the user profile using the service layer
-            profile = update_user_profile(pk, request.data)
-            log_info(f"User profile updated for ID {pk}")
-            
-            # Serialize the updated profile
-            serializer = UserProfileSerializer(profile)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return _updated(pk, update_user_profile(pk, request.data, if_match=_if_match_versions(request)))
+        except Exception as e:
+            return _update_failed(pk, e)
+
+    # update_user_profile only changes the fields present in the request
+    partial_update = update
+
+    def picture(self, request, pk=None):
+        # Stream the multipart body to disk, hashing as it arrives, before DRF parses it
+        request._request.upload_handlers = [
+            HashingFileUploadHandler(request._request, max_bytes=settings.PROFILE_PICTURE_MAX_BYTES)
+        ]
+        uploaded = request.FILES.get('picture')
+        if uploaded is None:
+            return Response(
+                {"error": f"Upload a 'picture' file of at most {settings.PROFILE_PICTURE_MAX_BYTES // (1024 * 1024)} MB."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            picture = upload_profile_picture(pk, uploaded)
+            log_info("Profile picture %s (%s) uploaded for ID %s", picture.content_hash, picture.status, pk)
         except UserProfile.DoesNotExist:
-            log_error(f"User profile not found for ID {pk}")
+            log_error("User profile not found for ID %s", pk)
             return Response({"error": "User profile not found"}, status=status.HTTP_404_NOT_FOUND)
         except ValidationError as e:
-            log_error(f"Validation error during profile update: {e}")
+            log_error("Validation error during profile picture upload: %s", e)
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # A picture seen before is shown at once; a new one once its variants are written
+        ready = picture.status == ProfilePicture.READY
+        return Response(
+            {"status": picture.status, "profile_picture_urls": picture_urls(picture.content_hash) if ready else None},
+            status=status.HTTP_200_OK if ready else status.HTTP_202_ACCEPTED,
+        )
+
+class AsyncUserProfileViewSet(AsyncViewSet, UserProfileViewSet):
+    """
+    UserProfileViewSet for ASGI deployments (routed when ASYNC_VIEWS is set). retrieve
+    reads through the cache and the async ORM; create and update run the service call
+    with sync_to_async and share their responses with the sync handlers. list, batch and picture are inherited and run in a thread.
+    """
+    async def retrieve(self, request, pk=None):
+        try:
+            if _is_conditional(request):
+                not_modified = _not_modified(request, *await aget_user_profile_validators(pk))
+                if not_modified is not None:
+                    return not_modified
+
+            data = await aget_serialized_user_profile(pk)
+            log_info("User profile retrieved for ID %s", pk)
+            return Response(data, headers=_validator_headers(data['version'], parse_datetime(data['updated_at'])))
+        except UserProfile.DoesNotExist:
+            log_error("User profile not found for ID %s", pk)
+            return Response({"error": "User profile not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    async def create(self, request):
+        try:
+            return _created(await acreate_user_profile(request.data))
         except Exception as e:
-            log_error(f"Error during profile update: {e}")
-            return Response({"error": "An error occurred while updating the profile."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return _create_failed(e)
+
+    async def update(self, request, pk=None):
+        try:
+            return _updated(pk, await aupdate_user_profile(pk, request.data, if_match=_if_match_versions(request)))
+        except Exception as e:
+            return _update_failed(pk, e)
+
+    partial_update = update
+
+
+def _created(profile):
+    log_info("User profile created for user %s", profile.user.username)
+    return Response(
+        UserProfileSerializer.serialize(profile), status=status.HTTP_201_CREATED,
+        headers=_validator_headers(profile.version, profile.updated_at),
+    )
+
+def _create_failed(error):
+    """
+    The error response for an exception raised while creating a profile.
+    """
+    if isinstance(error, ValidationError):
+        log_error("Validation error during profile creation: %s", error)
+        return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+    log_error("Error during profile creation: %s", error)
+    return Response({"error": "An error occurred while creating the profile."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def _updated(pk, profile):
+    log_info("User profile updated for ID %s", pk)
+    return Response(
+        UserProfileSerializer.serialize(profile), status=status.HTTP_200_OK,
+        headers=_validator_headers(profile.version, profile.updated_at),
+    )
+
+def _update_failed(pk, error):
+    """
+    The error response for an exception raised while updating profile `pk`.
+    """
+    if isinstance(error, UserProfile.DoesNotExist):
+        log_error("User profile not found for ID %s", pk)
+        return Response({"error": "User profile not found"}, status=status.HTTP_404_NOT_FOUND)
+    if isinstance(error, VersionConflict):
+        log_info("Update of profile %s rejected: %s", pk, error)
+        return _precondition_failed(error)
+    if isinstance(error, ValidationError):
+        log_error("Validation error during profile update: %s", error)
+        return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+    log_error("Error during profile update: %s", error)
+    return Response({"error": "An error occurred while updating the profile."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def _validator_headers(version, updated_at):
+    return {'ETag': f'"{version}"', 'Last-Modified': http_date(updated_at.timestamp())}
+
+def _is_conditional(request):
+    return 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+def _not_modified(request, version, updated_at):
+    """
+    Returns a 304 carrying the current validators when the client's copy is current,
+    else None.
+    """
+    headers = _validator_headers(version, updated_at)
+    response = get_conditional_response(
+        request, etag=headers['ETag'], last_modified=int(updated_at.timestamp()),
+    )
+    if response is None:
+        return None
+    for name, value in headers.items():
+        response.headers[name] = value
+    return response
+
+def _if_match_versions(request):
+    """
+    Returns the set of versions an If-Match header accepts, or None when any version
+    does (no header, or "*"). Weak and foreign ETags never match (RFC 9110 13.1.1).
+    """
+    header = request.META.get('HTTP_IF_MATCH')
+    if header is None:
+        return None
+    etags = parse_etags(header)
+    if etags == ['*']:
+        return None
+    return {int(etag[1:-1]) for etag in etags if etag[1:-1].isdigit()}
+
+def _precondition_failed(conflict):
+    return Response(
+        {"error": "The profile was changed since you read it. Fetch it again and retry."},
+        status=status.HTTP_412_PRECONDITION_FAILED,
+        headers=_validator_headers(conflict.current_version, conflict.updated_at),
+    )